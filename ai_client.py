@@ -3,12 +3,18 @@ AI Client wrapper for Student AI Travel Planner
 This module handles communication with Gemini and OpenAI APIs.
 """
 
+import asyncio
+import contextlib
+import contextvars
 import json
-from config import get_api_key, get_provider, get_groq_model
+import threading
+import time
+import weakref
 
 # Import Gemini library (with error handling for missing package)
 try:
     import google.generativeai as genai
+    from google.generativeai import client as genai_client
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
@@ -20,13 +26,103 @@ try:
 except ImportError:
     OPENAI_AVAILABLE = False
 
+import compact_format
+import metrics
+import usage
+from cassette import Cassette, CassetteMissError
+from config import (
+    AI_HEDGE_BUDGET,
+    AI_HEDGE_DELAY_SECONDS,
+    AI_HEDGE_MIN_DELAY_SECONDS,
+    AI_HEDGE_PERCENTILE,
+    AI_RECORD,
+    CASSETTE_PATH,
+    CASSETTE_REPLAY_SPEED,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    RATE_LIMIT_MAX_QUEUE,
+    RATE_LIMIT_MAX_WAIT_SECONDS,
+    ConfigurationError,
+    get_api_key,
+    get_base_url,
+    get_gemini_model,
+    get_groq_model,
+    get_model,
+    get_openai_model,
+    get_provider,
+    get_rate_limits,
+    get_routing_mode,
+)
+from itinerary_schema import gemini_schema, schema_name
+from ratelimit import ProviderRateLimiter, RateLimitExceeded
+from retry import Deadline, DeadlineExceeded
+from router import ProviderRouter, exclude_from_latency
+from token_budget import estimate_tokens
 
-def generate_itinerary(prompt: str) -> str:
+# Groq endpoint; GROQ_BASE_URL in .env can point it elsewhere (e.g. fake_llm_server.py)
+GROQ_BASE_URL = get_base_url("groq")
+SUPPORTED_PROVIDERS = ("gemini", "openai", "groq")
+# AI_PROVIDER=replay serves recorded responses from the cassette (see cassette.py)
+REPLAY_PROVIDER = "replay"
+# Characters per chunk when a recorded response is replayed as a stream
+REPLAY_CHUNK_CHARS = 64
+# Output token cap for callers that do not size one; planner.py sizes it per trip
+MAX_OUTPUT_TOKENS = 900
+# OpenAI model prefixes (plus "gpt-4" itself) without strict json_schema response
+# formats; structured output falls back to JSON mode for them (see _openai_response_format)
+_OPENAI_JSON_MODE_ONLY = ("gpt-3.5", "gpt-4-")
+# Keys of which at least one appears in any itinerary response (see _looks_like_itinerary):
+# full itineraries, single days from planner.regenerate_day() and compact responses
+_ITINERARY_MARKERS = ('"itinerary"', '"activities"', f'"{compact_format.DAYS_KEY}"')
+
+# Provider clients own HTTP connection pools, so building one per request means
+# a fresh TCP/TLS handshake every time. Clients are created once per process,
+# keyed by (provider, api_key, base_url), and shared between threads.
+_client_pool = {}
+_client_pool_lock = threading.Lock()
+# Async clients are tied to the event loop they were created on
+_async_client_pools = weakref.WeakKeyDictionary()
+
+# Routes requests across providers; rebuilt when the configuration changes
+_router = None
+_router_key = None
+_router_lock = threading.Lock()
+
+# Client-side rate limiters, one per provider
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+# Cassette used for recording and replay; opened on first use
+_cassette = None
+_cassette_lock = threading.Lock()
+
+# Lists collecting the provider that answered each call (see track_providers)
+_answered = contextvars.ContextVar("answered_providers", default=())
+
+
+@metrics.timed("generate_itinerary")
+def generate_itinerary(prompt: str, hedge_budget: int = None, deadline: Deadline = None,
+                       max_tokens: int = None, schema: dict = None) -> str:
     """
     Generate travel itinerary using the configured AI provider.
     
+    The request goes through the provider router. With failover routing
+    turned on (AI_ROUTING in config.py), another provider with an API key
+    takes over when the configured provider is failing or its circuit
+    breaker is open.
+    
+    With a hedge budget, a provider that is slower than its usual
+    AI_HEDGE_PERCENTILE latency is raced against the next provider and the
+    first response that looks like an itinerary wins.
+    
     Args:
         prompt (str): The prompt containing travel details and requirements
+        hedge_budget (int): Extra provider calls allowed for this request;
+            defaults to AI_HEDGE_BUDGET from config.py (0 disables hedging)
+        deadline (Deadline): Overall time budget; provider timeouts are cut to what is left
+        max_tokens (int): Output token limit; defaults to MAX_OUTPUT_TOKENS
+        schema (dict): JSON Schema the response must follow, using the
+            provider's structured output (see itinerary_schema.py); None for free text
         
     Returns:
         str: Raw AI response containing the itinerary
@@ -34,63 +130,702 @@ def generate_itinerary(prompt: str) -> str:
     Raises:
         Exception: If API call fails or provider is not available
     """
-    api_key = get_api_key()
-    provider = get_provider()
+    router = get_router()
+    deadline = deadline or Deadline()
+    call = lambda provider: (provider, _generate_with_provider(provider, prompt, deadline, max_tokens, schema))
+    budget = AI_HEDGE_BUDGET if hedge_budget is None else hedge_budget
+    if budget <= 0 or len(router.providers) < 2:
+        provider, text = router.call(call)
+    else:
+        provider, text = router.call_hedged(call, _hedge_delay(router), max_hedges=budget, accept=_accept_answer)
+    _note_provider(provider)
+    return text
+
+
+@metrics.timed("generate_itinerary")
+async def generate_itinerary_async(prompt: str, hedge_budget: int = None, deadline: Deadline = None,
+                                   max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Async version of generate_itinerary().
+    
+    Uses the providers' async clients, so many itineraries can be generated
+    concurrently from one event loop without a thread per request. When
+    hedging, the losing request is cancelled.
+    
+    Args:
+        prompt (str): The prompt containing travel details and requirements
+        hedge_budget (int): Extra provider calls allowed for this request
+        deadline (Deadline): Overall time budget; provider timeouts are cut to what is left
+        max_tokens (int): Output token limit; defaults to MAX_OUTPUT_TOKENS
+        schema (dict): JSON Schema the response must follow, using the
+            provider's structured output (see itinerary_schema.py); None for free text
+        
+    Returns:
+        str: Raw AI response containing the itinerary
+        
+    Raises:
+        Exception: If API call fails or provider is not available
+    """
+    router = get_router()
+    deadline = deadline or Deadline()
+
+    async def call(provider):
+        return provider, await _generate_with_provider_async(provider, prompt, deadline, max_tokens, schema)
+
+    budget = AI_HEDGE_BUDGET if hedge_budget is None else hedge_budget
+    if budget <= 0 or len(router.providers) < 2:
+        provider, text = await router.call_async(call)
+    else:
+        provider, text = await router.call_hedged_async(call, _hedge_delay(router), max_hedges=budget,
+                                                        accept=_accept_answer)
+    _note_provider(provider)
+    return text
+
+
+def _hedge_delay(router: ProviderRouter):
+    """
+    Build the per-provider hedge delay from the configured latency percentile.
+    """
+    return lambda provider: router.hedge_delay(
+        provider,
+        percentile=AI_HEDGE_PERCENTILE,
+        default=AI_HEDGE_DELAY_SECONDS,
+        minimum=AI_HEDGE_MIN_DELAY_SECONDS,
+    )
+
+
+def _accept_answer(answer: tuple) -> bool:
+    """
+    Hedging check for a (provider, text) answer.
+    """
+    return _looks_like_itinerary(answer[1])
+
+
+@contextlib.contextmanager
+def track_providers(providers: list = None):
+    """
+    Collect the provider that answered each call made inside a with block.
+    
+    With failover or hedging this can be a provider other than AI_PROVIDER.
+    Blocks nest and follow the context like usage.track(); threads started
+    inside the block must copy the context to be counted.
+    
+    Args:
+        providers (list): List to append to; a new one by default
+        
+    Yields:
+        list: Provider names, one per answered generate or stream call
+    """
+    providers = providers if providers is not None else []
+    token = _answered.set(_answered.get() + (providers,))
+    try:
+        yield providers
+    finally:
+        _answered.reset(token)
+
+
+def _note_provider(provider: str):
+    """
+    Add the provider that answered a call to every enclosing track_providers() block.
+    """
+    for providers in _answered.get():
+        providers.append(provider)
+    metrics.record_provider(provider)
+
+
+def _looks_like_itinerary(text: str) -> bool:
+    """
+    Cheap check that a response can win a hedged race; full parsing happens in planner.py.
+    
+    Accepts full itineraries, compact ones and single regenerated days.
+    """
+    return bool(text) and any(marker in text for marker in _ITINERARY_MARKERS)
+
+
+def stream_itinerary(prompt: str, deadline: Deadline = None, max_tokens: int = None, schema: dict = None):
+    """
+    Stream the itinerary text from the configured AI provider as it is generated.
+    
+    Falls back to another provider only if the first one fails before
+    producing any output.
+    
+    Args:
+        prompt (str): The prompt containing travel details and requirements
+        deadline (Deadline): Overall time budget for opening and reading the stream
+        max_tokens (int): Output token limit; defaults to MAX_OUTPUT_TOKENS
+        schema (dict): JSON Schema the response must follow; None for free text
+        
+    Yields:
+        str: Chunks of the raw AI response, in order
+        
+    Raises:
+        Exception: If API call fails or provider is not available
+    """
+    deadline = deadline or Deadline()
+
+    def stream(provider):
+        yield from _stream_with_provider(provider, prompt, deadline, max_tokens, schema)
+        _note_provider(provider)
+
+    yield from get_router().stream(stream)
+
+
+def _generate_with_provider(provider: str, prompt: str, deadline: Deadline = None,
+                            max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Generate an itinerary with one specific provider.
+    """
+    deadline = deadline or Deadline()
+    if provider == REPLAY_PROVIDER:
+        return _replay(prompt, deadline)
+    api_key = get_api_key(provider)
+    _check_provider_available(provider)
+    waited = get_rate_limiter(provider).acquire(_estimate_request_tokens(prompt, max_tokens),
+                                                max_wait=deadline.remaining())
+    exclude_from_latency(waited)
+    timeout = _remaining_timeout(deadline)
+    started = time.monotonic()
+
+    if provider == "gemini":
+        text = _call_gemini(prompt, api_key, timeout, max_tokens, schema)
+    elif provider == "openai":
+        text = _call_openai(prompt, api_key, timeout, max_tokens, schema)
+    else:
+        text = _call_groq(prompt, api_key, timeout, max_tokens, schema)
+    _record(provider, prompt, text, time.monotonic() - started)
+    return text
+
+
+async def _generate_with_provider_async(provider: str, prompt: str, deadline: Deadline = None,
+                                        max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Generate an itinerary with one specific provider without blocking the event loop.
+    """
+    deadline = deadline or Deadline()
+    if provider == REPLAY_PROVIDER:
+        return await _replay_async(prompt, deadline)
+    api_key = get_api_key(provider)
+    _check_provider_available(provider)
+    waited = await get_rate_limiter(provider).acquire_async(_estimate_request_tokens(prompt, max_tokens),
+                                                            max_wait=deadline.remaining())
+    exclude_from_latency(waited)
+    timeout = _remaining_timeout(deadline)
+    started = time.monotonic()
 
+    if provider == "gemini":
+        text = await _call_gemini_async(prompt, api_key, timeout, max_tokens, schema)
+    elif provider == "openai":
+        text = await _call_openai_async(prompt, api_key, timeout, max_tokens, schema)
+    else:
+        text = await _call_groq_async(prompt, api_key, timeout, max_tokens, schema)
+    _record(provider, prompt, text, time.monotonic() - started)
+    return text
+
+
+def _stream_with_provider(provider: str, prompt: str, deadline: Deadline = None,
+                          max_tokens: int = None, schema: dict = None):
+    """
+    Stream an itinerary from one specific provider.
+    """
+    deadline = deadline or Deadline()
+    if provider == REPLAY_PROVIDER:
+        yield from _replay_stream(prompt, deadline)
+        return
+    api_key = get_api_key(provider)
+    _check_provider_available(provider)
+    waited = get_rate_limiter(provider).acquire(_estimate_request_tokens(prompt, max_tokens),
+                                                max_wait=deadline.remaining())
+    exclude_from_latency(waited)
+    timeout = _remaining_timeout(deadline)
+    started = time.monotonic()
+
+    if provider == "gemini":
+        chunks = _stream_gemini(prompt, api_key, timeout, max_tokens, schema)
+    elif provider == "openai":
+        chunks = _stream_openai(prompt, api_key, timeout, max_tokens, schema)
+    else:
+        chunks = _stream_groq(prompt, api_key, timeout, max_tokens, schema)
+    if not AI_RECORD:
+        yield from chunks
+        return
+    received = []
+    for chunk in chunks:
+        received.append(chunk)
+        yield chunk
+    _record(provider, prompt, "".join(received), time.monotonic() - started)
+
+
+def get_cassette() -> Cassette:
+    """
+    Return the cassette used for recording (AI_RECORD) and replay (AI_PROVIDER=replay).
+    
+    Returns:
+        Cassette: The shared cassette at CASSETTE_PATH, or one installed with set_cassette()
+    """
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH)
+        return _cassette
+
+
+def set_cassette(cassette: Cassette):
+    """
+    Replace the shared cassette (e.g. with a temporary one in tests or benchmarks).
+    
+    Args:
+        cassette (Cassette): The cassette to use, or None to reopen CASSETTE_PATH on next use
+    """
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None and _cassette is not cassette:
+            _cassette.close()
+        _cassette = cassette
+
+
+def _record(provider: str, prompt: str, text: str, latency: float):
+    """
+    Append a provider response to the cassette when AI_RECORD is on.
+    """
+    if AI_RECORD:
+        get_cassette().record(prompt, text, latency, provider, get_model(provider))
+
+
+def _replay_delay(entry: dict, deadline: Deadline) -> float:
+    """
+    Seconds to wait before serving a recording, scaled by CASSETTE_REPLAY_SPEED.
+    
+    Raises:
+        DeadlineExceeded: If the recorded latency would run past the deadline
+    """
+    if CASSETTE_REPLAY_SPEED <= 0:
+        return 0.0
+    delay = entry["latency"] / CASSETTE_REPLAY_SPEED
+    remaining = deadline.remaining()
+    if remaining is not None and delay > remaining:
+        raise DeadlineExceeded("The recorded response is slower than the request deadline.")
+    return delay
+
+
+def _replay(prompt: str, deadline: Deadline) -> str:
+    """
+    Serve a recorded response, optionally after its recorded latency.
+    """
+    entry = get_cassette().lookup(prompt)
+    time.sleep(_replay_delay(entry, deadline))
+    return entry["response"]
+
+
+async def _replay_async(prompt: str, deadline: Deadline) -> str:
+    """
+    Async version of _replay().
+    """
+    entry = get_cassette().lookup(prompt)
+    await asyncio.sleep(_replay_delay(entry, deadline))
+    return entry["response"]
+
+
+def _replay_stream(prompt: str, deadline: Deadline):
+    """
+    Replay a recorded response as a stream of fixed-size chunks.
+    """
+    entry = get_cassette().lookup(prompt)
+    time.sleep(_replay_delay(entry, deadline))
+    text = entry["response"]
+    for start in range(0, len(text), REPLAY_CHUNK_CHARS):
+        yield text[start:start + REPLAY_CHUNK_CHARS]
+
+
+def _remaining_timeout(deadline: Deadline):
+    """
+    Return the provider timeout left on a deadline, or None for the client default.
+    
+    Raises:
+        DeadlineExceeded: If no time is left
+    """
+    deadline.check()
+    return deadline.remaining()
+
+
+def get_router() -> ProviderRouter:
+    """
+    Return the provider router for the current configuration.
+    
+    The configured provider is always first. In failover and latency modes
+    every other provider with an API key and installed package is added as
+    a fallback. The router (and its health history) is rebuilt only when
+    that provider list or the routing mode changes.
+    
+    Returns:
+        ProviderRouter: The shared router
+    """
+    global _router, _router_key
+    mode = get_routing_mode()
+    providers = [get_provider()]
+    # Replay is deterministic; never fall back to a live provider
+    if mode != "single" and providers[0] != REPLAY_PROVIDER:
+        providers += [name for name in SUPPORTED_PROVIDERS
+                      if name not in providers and _provider_configured(name)]
+    key = (mode, tuple(providers))
+    with _router_lock:
+        if _router is None or _router_key != key:
+            _router = ProviderRouter(
+                providers,
+                mode=mode,
+                failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=CIRCUIT_RESET_SECONDS,
+                # Missing keys, bad model names and a full local queue are not provider outages;
+                # other ValueErrors (e.g. from SDKs decoding a response) are
+                local_errors=(ConfigurationError, RateLimitExceeded, DeadlineExceeded, CassetteMissError),
+            )
+            _router_key = key
+        return _router
+
+
+def provider_health() -> dict:
+    """
+    Report rolling latency, error rate and circuit breaker state per provider.
+    
+    Returns:
+        dict: provider name -> statistics, plus "hedging" with hedge counters
+    """
+    router = get_router()
+    health = router.snapshot()
+    health["hedging"] = router.hedge_stats()
+    return health
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """
+    Return the client-side rate limiter for a provider.
+    
+    Limits come from <PROVIDER>_RPM and <PROVIDER>_TPM in config.py. The
+    limiter is rebuilt if those settings change.
+    
+    Args:
+        provider (str): Provider name
+        
+    Returns:
+        ProviderRateLimiter: The shared limiter for the provider
+    """
+    rpm, tpm = get_rate_limits(provider)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None or limiter.limits != (rpm, tpm):
+            limiter = ProviderRateLimiter(
+                provider,
+                rpm=rpm,
+                tpm=tpm,
+                max_queue=RATE_LIMIT_MAX_QUEUE,
+                max_wait=RATE_LIMIT_MAX_WAIT_SECONDS,
+            )
+            _rate_limiters[provider] = limiter
+        return limiter
+
+
+def rate_limit_stats() -> dict:
+    """
+    Report queue depth and wait times of the client-side rate limiters.
+    
+    Returns:
+        dict: provider name -> limiter statistics
+    """
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+def _estimate_request_tokens(prompt: str, max_tokens: int = None) -> int:
+    """
+    Token count of a request for the TPM bucket: the estimated prompt size
+    plus the full output allowance.
+    """
+    return estimate_tokens(prompt) + (max_tokens or MAX_OUTPUT_TOKENS)
+
+
+def _provider_configured(provider: str) -> bool:
+    """
+    Check whether a provider has both its package installed and an API key.
+    """
+    try:
+        _check_provider_available(provider)
+        get_api_key(provider)
+    except Exception:
+        return False
+    return True
+
+
+def _check_provider_available(provider: str):
+    """
+    Make sure the SDK for a provider is installed.
+    
+    Raises:
+        Exception: If the provider's package is missing
+        ConfigurationError: If the provider name is unknown
+    """
     if provider == "gemini":
         if not GEMINI_AVAILABLE:
             raise Exception("Gemini requires 'google-generativeai' package. Install with: pip install google-generativeai")
-        return _call_gemini(prompt, api_key)
     elif provider == "openai":
         if not OPENAI_AVAILABLE:
             raise Exception("OpenAI requires 'openai' package. Install with: pip install openai")
-        return _call_openai(prompt, api_key)
     elif provider == "groq":
         if not OPENAI_AVAILABLE:
             raise Exception("Groq provider requires 'openai'. Install with: pip install openai")
-        return _call_groq(prompt, api_key)
     else:
-        raise ValueError(f"Unknown AI provider '{provider}'. Set AI_PROVIDER to 'gemini', 'openai', or 'groq'.")
+        raise ConfigurationError(f"Unknown AI provider '{provider}'. Set AI_PROVIDER to 'gemini', 'openai', 'groq' or 'replay'.")
+
+
+def _get_client(provider: str, api_key: str, base_url: str = None):
+    """
+    Return the pooled client for a provider, creating it on first use.
+    
+    Args:
+        provider (str): Provider name (gemini, openai, or groq)
+        api_key (str): API key the client authenticates with
+        base_url (str): API base URL; defaults to the provider's configured endpoint
+        
+    Returns:
+        object: A configured Gemini model or OpenAI client
+    """
+    base_url = base_url or get_base_url(provider)
+    key = (provider, api_key, base_url)
+    client = _client_pool.get(key)
+    if client is None:
+        with _client_pool_lock:
+            # Re-check under the lock so concurrent first calls build one client
+            client = _client_pool.get(key)
+            if client is None:
+                client = _create_client(provider, api_key, base_url)
+                _client_pool[key] = client
+    return client
+
+
+def _get_async_client(provider: str, api_key: str, base_url: str = None):
+    """
+    Return the pooled async client for a provider on the running event loop.
+    
+    Async HTTP connections belong to the loop that opened them, so async
+    clients are pooled per event loop. For Gemini this is a model with its
+    own grpc.aio client; Gemini over a custom endpoint uses REST, which has
+    no async client, so the shared sync model is returned. If the installed
+    google-generativeai has no way to build a grpc.aio client per loop, a
+    new Gemini model is built for every call instead.
+    """
+    base_url = base_url or get_base_url(provider)
+    if provider == "gemini":
+        # Configures genai for this key; done outside _client_pool_lock, which it takes
+        model = _get_client(provider, api_key, base_url)
+        if base_url:
+            return model
+        if _gemini_async_client_factory() is None:
+            return genai.GenerativeModel(get_gemini_model())
+
+    loop = asyncio.get_running_loop()
+    key = (provider, api_key, base_url)
+    with _client_pool_lock:
+        loop_pool = _async_client_pools.get(loop)
+        if loop_pool is None:
+            loop_pool = {}
+            _async_client_pools[loop] = loop_pool
+        client = loop_pool.get(key)
+        if client is None:
+            client = _create_async_client(provider, api_key, base_url)
+            loop_pool[key] = client
+    return client
 
 
-def _call_gemini(prompt: str, api_key: str) -> str:
+def _create_async_client(provider: str, api_key: str, base_url: str = None):
+    """
+    Build a new async client for the running event loop. Use _get_async_client() instead.
+    """
+    if provider == "gemini":
+        model = genai.GenerativeModel(get_gemini_model())
+        # genai otherwise shares one process-wide async client, bound to the
+        # first loop that used it; give this loop a client of its own
+        model._async_client = _gemini_async_client_factory()("generative_async")
+        return model
+    return openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+def _gemini_async_client_factory():
+    """
+    Return google-generativeai's private client factory, or None if this SDK version lacks it.
+    
+    The factory builds clients from the settings of the last genai.configure()
+    call, which _get_client() makes for the current key.
+    """
+    manager = getattr(genai_client, "_client_manager", None)
+    return getattr(manager, "make_client", None)
+
+
+def _create_client(provider: str, api_key: str, base_url: str = None):
+    """
+    Build a new client for a provider. Use _get_client() instead of calling this directly.
+    """
+    if provider == "gemini":
+        # genai keeps one process-wide transport; configure it once per key
+        if base_url:
+            # Custom endpoints (proxies, fake_llm_server.py) are reached over REST
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": base_url})
+        else:
+            genai.configure(api_key=api_key)
+        return genai.GenerativeModel(get_gemini_model())
+    # Retries are handled by planner.py's RetryPolicy; SDK retries would multiply them
+    return openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+def close_clients():
+    """
+    Close and forget all pooled provider clients.
+    
+    The next call to a provider builds a fresh client. Useful after rotating
+    API keys and in tests. Async clients are dropped without awaiting their
+    shutdown; their connections close with the event loop that owns them.
+    """
+    with _client_pool_lock:
+        clients = list(_client_pool.values())
+        _client_pool.clear()
+        _async_client_pools.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+def _call_gemini(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+                 schema: dict = None) -> str:
     """
     Call Google Gemini API.
     
     Args:
         prompt (str): The prompt to send
         api_key (str): Gemini API key
+        timeout (float): Request timeout in seconds; None for the client default
+        max_tokens (int): Output token limit; None for MAX_OUTPUT_TOKENS (Gemini: the model default)
+        schema (dict): JSON Schema for structured output; None for free text
         
     Returns:
         str: Gemini response
     """
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    response = model.generate_content(prompt)
+    model = _get_client("gemini", api_key)
+    response = model.generate_content(prompt, **_gemini_options(timeout, max_tokens, schema))
+    _record_usage("gemini", prompt, response.text, response)
     return response.text
 
 
-def _call_openai(prompt: str, api_key: str) -> str:
+async def _call_gemini_async(prompt: str, api_key: str, timeout: float = None,
+                             max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Call Google Gemini API without blocking the event loop.
+    """
+    model = _get_async_client("gemini", api_key)
+    if get_base_url("gemini"):
+        # The REST transport used for custom endpoints has no async client
+        response = await asyncio.to_thread(model.generate_content, prompt, **_gemini_options(timeout, max_tokens, schema))
+    else:
+        response = await model.generate_content_async(prompt, **_gemini_options(timeout, max_tokens, schema))
+    _record_usage("gemini", prompt, response.text, response)
+    return response.text
+
+
+def _gemini_options(timeout: float = None, max_tokens: int = None, schema: dict = None) -> dict:
+    """
+    Build the keyword arguments shared by the Gemini calls.
+    """
+    options = {}
+    generation_config = {}
+    if max_tokens is not None:
+        generation_config["max_output_tokens"] = max_tokens
+    if schema is not None:
+        generation_config["response_mime_type"] = "application/json"
+        generation_config["response_schema"] = gemini_schema(schema)
+    if generation_config:
+        options["generation_config"] = generation_config
+    if timeout is not None:
+        options["request_options"] = {"timeout": timeout}
+    return options
+
+
+def _call_openai(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+                 schema: dict = None) -> str:
     """
     Call OpenAI API.
     
     Args:
         prompt (str): The prompt to send
         api_key (str): OpenAI API key
+        timeout (float): Request timeout in seconds; None for the client default
+        max_tokens (int): Output token limit; None for MAX_OUTPUT_TOKENS
+        schema (dict): JSON Schema for structured output; None for free text
         
     Returns:
         str: OpenAI response
     """
-    client = openai.OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model='gpt-3.5-turbo',
-        messages=[
+    client = _get_client("openai", api_key)
+    response = client.chat.completions.create(**_openai_request(prompt, timeout, max_tokens, schema))
+    text = _extract_openai_text(response)
+    _record_usage("openai", prompt, text, response)
+    return text
+
+
+async def _call_openai_async(prompt: str, api_key: str, timeout: float = None,
+                             max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Call OpenAI API without blocking the event loop.
+    """
+    client = _get_async_client("openai", api_key)
+    response = await client.chat.completions.create(**_openai_request(prompt, timeout, max_tokens, schema))
+    text = _extract_openai_text(response)
+    _record_usage("openai", prompt, text, response)
+    return text
+
+
+def _openai_request(prompt: str, timeout: float = None, max_tokens: int = None, schema: dict = None) -> dict:
+    """
+    Build the chat completion arguments shared by the sync and async OpenAI calls.
+    """
+    request = {
+        "model": get_openai_model(),
+        "messages": [
             {"role": "system", "content": "You are an expert travel planner specializing in budget-friendly student trips."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.7,
-        max_tokens=900
-    )
+        "temperature": 0.7,
+        "max_tokens": max_tokens or MAX_OUTPUT_TOKENS,
+    }
+    if schema is not None:
+        request["response_format"] = _openai_response_format(request["model"], schema)
+    if timeout is not None:
+        request["timeout"] = timeout
+    return request
+
+
+def _openai_response_format(model: str, schema: dict) -> dict:
+    """
+    Choose the response_format for structured output on an OpenAI model.
+    
+    Strict JSON schemas need gpt-4o-2024-08-06, gpt-4o-mini or a newer model.
+    Older models such as the default gpt-3.5-turbo reject them on every call,
+    so they get JSON mode instead: the response is still bare JSON, but its
+    shape is only guided by the prompt.
+    """
+    name = model.lower()
+    if name == "gpt-4" or name.startswith(_OPENAI_JSON_MODE_ONLY):
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema_name(schema), "schema": schema, "strict": True},
+    }
+
+
+def _extract_openai_text(response) -> str:
+    """
+    Pull the message text out of an OpenAI chat completion response.
+    """
     # The new OpenAI client returns structured messages; extract text safely.
     if hasattr(response.choices[0].message, 'content'):
         return response.choices[0].message.content.strip()
@@ -101,31 +836,74 @@ def _call_openai(prompt: str, api_key: str) -> str:
     return str(response)
 
 
-def _call_groq(prompt: str, api_key: str) -> str:
+def _call_groq(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+               schema: dict = None) -> str:
     """
     Call Groq via the OpenAI-compatible Groq API endpoint.
     
     Args:
         prompt (str): The prompt to send
         api_key (str): Groq API key
+        timeout (float): Request timeout in seconds; None for the client default
+        max_tokens (int): Output token limit; None for MAX_OUTPUT_TOKENS
+        schema (dict): JSON Schema for structured output; None for free text
         
     Returns:
         str: Groq response
     """
+    request = _groq_request(prompt, timeout, max_tokens, schema)
+    client = _get_client("groq", api_key)
+    response = client.responses.create(**request)
+    text = _extract_groq_text(response)
+    _record_usage("groq", prompt, text, response)
+    return text
+
+
+async def _call_groq_async(prompt: str, api_key: str, timeout: float = None,
+                           max_tokens: int = None, schema: dict = None) -> str:
+    """
+    Call Groq without blocking the event loop.
+    """
+    request = _groq_request(prompt, timeout, max_tokens, schema)
+    client = _get_async_client("groq", api_key)
+    response = await client.responses.create(**request)
+    text = _extract_groq_text(response)
+    _record_usage("groq", prompt, text, response)
+    return text
+
+
+def _groq_request(prompt: str, timeout: float = None, max_tokens: int = None, schema: dict = None) -> dict:
+    """
+    Build the responses API arguments shared by the sync and async Groq calls.
+    
+    Raises:
+        ConfigurationError: If the configured Groq model is not OpenAI-compatible
+    """
     model = get_groq_model()
     if not model.startswith("openai/"):
-        raise ValueError(
+        raise ConfigurationError(
             "Groq models must use OpenAI-compatible naming, e.g. 'openai/gpt-oss-20b'. "
             f"Got: '{model}'"
         )
+    request = {
+        "model": model,
+        "input": prompt,
+        "temperature": 0.7,
+        "max_output_tokens": max_tokens or MAX_OUTPUT_TOKENS,
+    }
+    if schema is not None:
+        request["text"] = {
+            "format": {"type": "json_schema", "name": schema_name(schema), "schema": schema, "strict": True},
+        }
+    if timeout is not None:
+        request["timeout"] = timeout
+    return request
 
-    client = openai.OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-    response = client.responses.create(
-        model=model,
-        input=prompt,
-        temperature=0.7,
-        max_output_tokens=900
-    )
+
+def _extract_groq_text(response) -> str:
+    """
+    Pull the output text out of a Groq responses API result.
+    """
     if hasattr(response, "output_text") and response.output_text:
         return response.output_text.strip()
     if hasattr(response, "output") and response.output:
@@ -133,6 +911,114 @@ def _call_groq(prompt: str, api_key: str) -> str:
     return str(response)
 
 
+def _stream_gemini(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+                   schema: dict = None):
+    """
+    Stream text chunks from Google Gemini.
+    """
+    model = _get_client("gemini", api_key)
+    received = []
+    last = None
+    for chunk in model.generate_content(prompt, stream=True, **_gemini_options(timeout, max_tokens, schema)):
+        # Every chunk carries the running usage; the last one has the totals
+        last = chunk
+        # Chunks without text parts (e.g. safety metadata) raise on .text
+        try:
+            text = chunk.text
+        except ValueError:
+            continue
+        if text:
+            received.append(text)
+            yield text
+    _record_usage("gemini", prompt, "".join(received), last)
+
+
+def _stream_openai(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+                   schema: dict = None):
+    """
+    Stream text chunks from the OpenAI chat completions API.
+    """
+    client = _get_client("openai", api_key)
+    stream = client.chat.completions.create(**_openai_request(prompt, timeout, max_tokens, schema), stream=True,
+                                            stream_options={"include_usage": True})
+    received = []
+    last = None
+    for chunk in stream:
+        # With include_usage the final chunk has no choices, only usage
+        if getattr(chunk, "usage", None):
+            last = chunk
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            received.append(text)
+            yield text
+    _record_usage("openai", prompt, "".join(received), last)
+
+
+def _stream_groq(prompt: str, api_key: str, timeout: float = None, max_tokens: int = None,
+                 schema: dict = None):
+    """
+    Stream text chunks from the Groq responses API.
+    """
+    request = _groq_request(prompt, timeout, max_tokens, schema)
+    client = _get_client("groq", api_key)
+    stream = client.responses.create(**request, stream=True)
+    received = []
+    completed = None
+    for event in stream:
+        event_type = getattr(event, "type", None)
+        if event_type == "response.output_text.delta" and event.delta:
+            received.append(event.delta)
+            yield event.delta
+        elif event_type == "response.completed":
+            completed = getattr(event, "response", None)
+    _record_usage("groq", prompt, "".join(received), completed)
+
+
+def _record_usage(provider: str, prompt: str, text: str, response):
+    """
+    Count a call's token usage, estimating it from text length if the provider reported none.
+    
+    Args:
+        provider (str): Provider that answered
+        prompt (str): Prompt that was sent
+        text (str): Response text
+        response: Provider response (or final stream event) carrying the usage, or None
+    """
+    prompt_tokens, completion_tokens = _response_usage(response)
+    if prompt_tokens is None or completion_tokens is None:
+        usage.record(provider, get_model(provider), estimate_tokens(prompt), estimate_tokens(text), estimated=True)
+    else:
+        usage.record(provider, get_model(provider), prompt_tokens, completion_tokens)
+
+
+def _response_usage(response):
+    """
+    Read (prompt tokens, completion tokens) from any provider's response.
+    
+    Chat completions report usage.prompt_tokens/completion_tokens, the
+    responses API usage.input_tokens/output_tokens and Gemini
+    usage_metadata.prompt_token_count/candidates_token_count.
+    
+    Returns:
+        tuple: Token counts, or (None, None) if the response has no usage
+    """
+    data = getattr(response, "usage", None)
+    if data is not None:
+        prompt_tokens = getattr(data, "prompt_tokens", None)
+        if prompt_tokens is None:
+            prompt_tokens = getattr(data, "input_tokens", None)
+        completion_tokens = getattr(data, "completion_tokens", None)
+        if completion_tokens is None:
+            completion_tokens = getattr(data, "output_tokens", None)
+        return prompt_tokens, completion_tokens
+    data = getattr(response, "usage_metadata", None)
+    if data is not None and getattr(data, "total_token_count", 0):
+        return getattr(data, "prompt_token_count", None), getattr(data, "candidates_token_count", None)
+    return None, None
+
+
 def _parse_groq_output(data):
     if not data:
         return ""
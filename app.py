@@ -5,52 +5,12 @@ A beginner-friendly web app for generating personalized travel itineraries.
 
 import streamlit as st
 import json
-from planner import plan_trip, validate_itinerary, calculate_total_cost
-from config import get_provider
+import metrics
+import usage
+from planner import plan_trip_stream, validate_itinerary, calculate_total_cost
+from config import METRICS_ENABLED, get_provider
 from ai_client import test_provider_availability
-
-# Currency helpers
-# Minimal symbol/decimal mapping with sensible defaults
-CURRENCY_META = {
-    "USD": {"symbol": "$", "decimals": 2},
-    "EUR": {"symbol": "€", "decimals": 2},
-    "GBP": {"symbol": "£", "decimals": 2},
-    "JPY": {"symbol": "¥", "decimals": 0},
-    "CNY": {"symbol": "¥", "decimals": 2},
-    "INR": {"symbol": "₹", "decimals": 2},
-    "AUD": {"symbol": "A$", "decimals": 2},
-    "CAD": {"symbol": "C$", "decimals": 2},
-    "CHF": {"symbol": "CHF ", "decimals": 2},
-    "SEK": {"symbol": "SEK ", "decimals": 2},
-    "NOK": {"symbol": "NOK ", "decimals": 2},
-    "DKK": {"symbol": "DKK ", "decimals": 2},
-    "ZAR": {"symbol": "R", "decimals": 2},
-    "BRL": {"symbol": "R$", "decimals": 2},
-    "KRW": {"symbol": "₩", "decimals": 0},
-    "SGD": {"symbol": "S$", "decimals": 2},
-    "HKD": {"symbol": "HK$", "decimals": 2},
-    "NZD": {"symbol": "NZ$", "decimals": 2},
-    "MXN": {"symbol": "MX$", "decimals": 2},
-    "AED": {"symbol": "AED ", "decimals": 2},
-    "SAR": {"symbol": "SAR ", "decimals": 2},
-}
-
-def get_currency_meta(code: str) -> dict:
-    meta = CURRENCY_META.get(code)
-    if meta is None:
-        # Default to 2 decimals and prefix with code
-        return {"symbol": f"{code} ", "decimals": 2}
-    return meta
-
-def format_currency(amount: float, code: str) -> str:
-    meta = get_currency_meta(code)
-    decimals = meta["decimals"]
-    symbol = meta["symbol"]
-    fmt = f"{{:,.{decimals}f}}"
-    try:
-        return f"{symbol}{fmt.format(float(amount))}"
-    except Exception:
-        return f"{symbol}{amount}"
+from currency import get_currency_meta, format_currency
 
 # Page configuration
 st.set_page_config(
@@ -63,6 +23,9 @@ st.set_page_config(
 def main():
     """Main application function."""
     
+    if METRICS_ENABLED:
+        metrics.start_metrics_server()
+    
     # Header
     st.title("✈️ Student AI Travel Planner")
     st.markdown("""
@@ -204,38 +167,64 @@ def main():
         elif not interests:
             st.error("❌ Please select at least one interest!")
         else:
-            # Show loading spinner
+            # Show loading spinner while days stream in underneath
             with st.spinner("🤖 AI is planning your perfect student trip..."):
                 try:
-                    # Generate itinerary
-                    itinerary, summary = plan_trip(
+                    # Generate itinerary and display each day as it arrives
+                    events = plan_trip_stream(
                         destination, duration, budget, interests, transport, stay, currency
                     )
-                    
-                    # Display results
-                    display_results(itinerary, summary, debug_mode, destination, currency)
+                    with usage.track() as trip_usage:
+                        display_streaming_results(events, debug_mode, destination, currency)
+                    if debug_mode:
+                        display_usage(trip_usage)
                     
                 except Exception as e:
                     st.error(f"❌ Error generating itinerary: {str(e)}")
                     st.info("💡 Tip: Check your API keys in config.py or enable debug mode for more details.")
 
-def display_results(itinerary, summary, debug_mode=False, destination="Unknown", currency="USD"):
-    """Display the generated itinerary and summary."""
+# Includes waiting for the streamed days, since rendering happens as they arrive
+@metrics.timed("display_stream")
+def display_streaming_results(events, debug_mode=False, destination="Unknown", currency="USD"):
+    """Display the itinerary day by day as it streams in from the AI."""
     
     st.header("🗺️ Your Personalized Itinerary")
     
-    # Check if itinerary is valid
-    if isinstance(itinerary, dict) and "error" in itinerary:
-        st.error(f"❌ {itinerary['error']}")
-        st.info(f"💡 {itinerary.get('suggestion', 'Please try again later.')}")
-        return
+    # Summary and totals are only known at the end; reserve their place above the days
+    overview = st.container()
+    st.subheader("📅 Daily Breakdown")
     
-    # Validate itinerary structure
-    if not validate_itinerary(itinerary):
-        st.error("❌ Invalid itinerary format received from AI")
-        if debug_mode:
-            st.json(itinerary)
-        return
+    itinerary = []
+    summary = ""
+    for kind, value in events:
+        if kind == "error":
+            with overview:
+                display_error(value[0])
+            return
+        if kind == "summary":
+            summary = value
+            continue
+        itinerary.append(value)
+        if validate_itinerary([value]):
+            display_day(value, currency)
+    
+    with overview:
+        if not itinerary or not validate_itinerary(itinerary):
+            st.error("❌ Invalid itinerary format received from AI")
+            if debug_mode:
+                st.json(itinerary)
+            return
+        display_overview(itinerary, summary, currency)
+    
+    display_downloads(itinerary, summary, debug_mode, destination, currency)
+
+def display_error(error_itinerary):
+    """Display the error returned by the planner."""
+    st.error(f"❌ {error_itinerary['error']}")
+    st.info(f"💡 {error_itinerary.get('suggestion', 'Please try again later.')}")
+
+def display_overview(itinerary, summary, currency="USD"):
+    """Display the trip summary and cost breakdown."""
     
     # Calculate total cost
     total_cost = calculate_total_cost(itinerary)
@@ -252,28 +241,42 @@ def display_results(itinerary, summary, debug_mode=False, destination="Unknown",
         st.metric("Days", len(itinerary))
     with col3:
         st.metric("Avg Daily Cost", format_currency(total_cost/len(itinerary), currency))
-    
-    # Display daily itinerary
-    st.subheader("📅 Daily Breakdown")
-    
-    for day_data in itinerary:
-        with st.expander(f"Day {day_data['day']} - {format_currency(day_data['cost'], currency)}"):
-            col1, col2 = st.columns([2, 1])
+
+def display_day(day_data, currency="USD"):
+    """Display one day of the itinerary in an expander."""
+    with st.expander(f"Day {day_data['day']} - {format_currency(day_data['cost'], currency)}"):
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.write("**Activities:**")
+            for activity in day_data['activities']:
+                st.write(f"• {activity}")
             
-            with col1:
-                st.write("**Activities:**")
-                for activity in day_data['activities']:
-                    st.write(f"• {activity}")
-                
-                st.write("**Notes:**")
-                st.info(day_data['notes'])
+            st.write("**Notes:**")
+            st.info(day_data['notes'])
+        
+        with col2:
+            st.write("**Transport:**")
+            st.write(f"🚌 {day_data['transport']}")
             
-            with col2:
-                st.write("**Transport:**")
-                st.write(f"🚌 {day_data['transport']}")
-                
-                st.write("**Daily Cost:**")
-                st.write(f"💰 {format_currency(day_data['cost'], currency)}")
+            st.write("**Daily Cost:**")
+            st.write(f"💰 {format_currency(day_data['cost'], currency)}")
+
+def display_usage(trip_usage):
+    """Display the tokens and estimated cost of the last plan (debug mode)."""
+    st.write("**Token Usage:**")
+    data = trip_usage.to_dict()
+    if trip_usage.calls == 0:
+        st.caption("No provider calls (answered from cache)")
+        return
+    st.caption(
+        f"{data['prompt_tokens']} prompt + {data['completion_tokens']} completion tokens "
+        f"in {data['calls']} call(s), about ${data['cost_usd']:.4f}"
+        + (" (estimated from text length)" if data["estimated_calls"] else "")
+    )
+
+def display_downloads(itinerary, summary, debug_mode=False, destination="Unknown", currency="USD"):
+    """Display debug information and the JSON download button."""
     
     # Debug information
     if debug_mode:
@@ -290,7 +293,7 @@ def display_results(itinerary, summary, debug_mode=False, destination="Unknown",
         "destination": destination,
         "currency": currency,
         "summary": summary,
-        "total_cost": total_cost,
+        "total_cost": calculate_total_cost(itinerary),
         "itinerary": itinerary
     }, indent=2)
     
@@ -0,0 +1,163 @@
+"""
+Batch planning for Student AI Travel Planner
+This module plans many trips at once with bounded concurrency, streaming results as they finish.
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import planner
+import usage
+
+# Fields of a trip request that are passed on to plan_trip()
+TRIP_FIELDS = ("destination", "duration", "budget", "interests", "transport", "stay", "currency")
+
+# How many times an item waits and tries again when the provider's request queue is full
+QUEUE_FULL_RETRIES = 5
+
+# One finished trip. itinerary/summary are plan_trip()'s result; error is a
+# message when the trip could not be planned (invalid input or provider error);
+# usage is the trip's token usage (usage.UsageTotals.to_dict()).
+BatchResult = namedtuple("BatchResult", ["index", "request", "itinerary", "summary", "error", "seconds", "usage"],
+                         defaults=(None,))
+
+
+def plan_trips(requests, concurrency=4, **options):
+    """
+    Plan many trips concurrently, yielding each result as soon as it is ready.
+
+    Requests are read lazily and at most `concurrency` trips are in flight,
+    so memory stays flat however long the input is. Results come back in
+    completion order; use BatchResult.index to restore input order. Provider
+    calls go through the usual rate limiters. An item whose provider queue
+    is full waits for the suggested retry time instead of failing.
+
+    Args:
+        requests (iterable): Trip requests as dicts with plan_trip() argument
+            names (destination, duration, budget, interests, transport, stay,
+            currency); other keys such as an id are ignored but kept in the result
+        concurrency (int): Maximum number of trips planned at the same time
+        **options: Extra plan_trip() keyword arguments for every trip (e.g. use_cache, deadline)
+
+    Yields:
+        BatchResult: One per request. Errors are reported per item and never stop the batch.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    items = enumerate(requests)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="plan-trips")
+    pending = set()
+    try:
+        while True:
+            for index, request in items:
+                pending.add(executor.submit(_plan_one, index, request, options))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Reached when the caller stops early: drop queued work, finish running trips
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def plan_trips_async(requests, concurrency=4, **options):
+    """
+    Async version of plan_trips(), built on plan_trip_async().
+
+    Takes the same arguments and yields the same BatchResult items, in
+    completion order, with at most `concurrency` trips in flight on the loop.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    items = enumerate(requests)
+    pending = set()
+    try:
+        while True:
+            for index, request in items:
+                pending.add(asyncio.ensure_future(_plan_one_async(index, request, options)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _plan_one(index, request, options):
+    """Plan one trip, turning any failure into a per-item error."""
+    started = time.perf_counter()
+    with usage.track() as trip_usage:
+        try:
+            kwargs = _trip_kwargs(request, options)
+            for attempt in range(QUEUE_FULL_RETRIES + 1):
+                itinerary, summary = planner.plan_trip(**kwargs)
+                delay = _queue_full_delay(itinerary)
+                if delay is None or attempt == QUEUE_FULL_RETRIES:
+                    break
+                time.sleep(delay)
+        except Exception as e:
+            return BatchResult(index, request, None, None, str(e), time.perf_counter() - started,
+                               trip_usage.to_dict())
+    return BatchResult(index, request, itinerary, summary, _error_message(itinerary),
+                       time.perf_counter() - started, trip_usage.to_dict())
+
+
+async def _plan_one_async(index, request, options):
+    """Async version of _plan_one()."""
+    started = time.perf_counter()
+    with usage.track() as trip_usage:
+        try:
+            kwargs = _trip_kwargs(request, options)
+            for attempt in range(QUEUE_FULL_RETRIES + 1):
+                itinerary, summary = await planner.plan_trip_async(**kwargs)
+                delay = _queue_full_delay(itinerary)
+                if delay is None or attempt == QUEUE_FULL_RETRIES:
+                    break
+                await asyncio.sleep(delay)
+        except Exception as e:
+            return BatchResult(index, request, None, None, str(e), time.perf_counter() - started,
+                               trip_usage.to_dict())
+    return BatchResult(index, request, itinerary, summary, _error_message(itinerary),
+                       time.perf_counter() - started, trip_usage.to_dict())
+
+
+def _trip_kwargs(request, options):
+    """
+    Pick plan_trip() arguments out of a request dict.
+
+    Raises:
+        ValueError: If the request is not a dict or misses a required field
+    """
+    if not isinstance(request, dict):
+        raise ValueError(f"Trip request must be a JSON object, got {type(request).__name__}")
+    missing = [field for field in TRIP_FIELDS[:-1] if field not in request]
+    if missing:
+        raise ValueError(f"Trip request is missing: {', '.join(missing)}")
+    kwargs = {field: request[field] for field in TRIP_FIELDS if field in request}
+    kwargs.update(options)
+    return kwargs
+
+
+def _queue_full_delay(itinerary):
+    """Seconds to wait before retrying a trip rejected by a full rate limit queue, or None."""
+    if isinstance(itinerary, dict) and itinerary.get("reason") == "queue_full":
+        return max(0.1, itinerary.get("retry_after") or 0)
+    return None
+
+
+def _error_message(itinerary):
+    """Return the error message from plan_trip()'s error dict, or None for a real itinerary."""
+    if isinstance(itinerary, dict) and "error" in itinerary:
+        return itinerary["error"]
+    return None
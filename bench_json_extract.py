@@ -0,0 +1,104 @@
+"""
+Benchmark for JSON extraction from AI responses
+Compares json_extract.extract_json_object with the old greedy regex on large adversarial responses.
+
+Usage:
+    python bench_json_extract.py [--size-mb 4] [--repeat 3]
+"""
+
+import argparse
+import json
+import re
+import time
+
+from ai_client import _get_dummy_response
+from json_extract import extract_json_object
+
+# The greedy pattern _parse_ai_response used before json_extract existed
+LEGACY_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+# The legacy regex is quadratic on some inputs, so it only gets a small sample
+LEGACY_MAX_BYTES = 64 * 1024
+
+
+def legacy_extract(text):
+    """The old extraction: greedy regex match, then a single json.loads."""
+    match = LEGACY_PATTERN.search(text)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except ValueError:
+        return None
+    if isinstance(data, dict) and "itinerary" in data and "summary" in data:
+        return data
+    return None
+
+
+def build_cases(size):
+    """
+    Build adversarial responses of roughly `size` characters.
+
+    Returns:
+        dict: case name -> (response text, whether it contains a valid itinerary)
+    """
+    payload = json.dumps(json.loads(_get_dummy_response()))
+    prose = "Tip: pack light {seriously} and keep {your passport} safe. "
+    fenced = "```json\n" + payload + "\n```\n"
+
+    return {
+        # Chatty preamble full of stray brace pairs, real JSON in a fence at the end
+        "prose_braces_then_fence": (prose * (size // len(prose)) + fenced, True),
+        # Several JSON-looking blocks; only the last one has itinerary and summary
+        "many_decoy_objects": (('{"note": "not it", "n": 1}\n' * (size // 27)) + payload, True),
+        # Opening braces that never close: worst case for the greedy regex
+        "unbalanced_open_braces": ("{" * size, False),
+        # Valid itinerary followed by a trailing brace block that breaks the greedy span
+        "trailing_brace_block": (payload + "\nNotes: {" + "x" * size + "}", True),
+        # Truncated response: the real object is inside an unclosed wrapper
+        "truncated_wrapper": ('{"response": ' + payload + ', "extra": "' + "y" * size, True),
+    }
+
+
+def time_call(func, text, repeat):
+    """Return (best seconds, result) over `repeat` runs."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(size_mb=4.0, repeat=3):
+    """Run every case and print a comparison table."""
+    size = int(size_mb * 1024 * 1024)
+    print("⏱️ JSON Extraction Benchmark")
+    print("=" * 78)
+    print(f"{'case':<26}{'size':>10}{'extractor':>14}{'found':>8}{'legacy@64KB':>14}{'found':>8}")
+    print("-" * 78)
+
+    for name, (text, expected) in build_cases(size).items():
+        seconds, result = time_call(extract_json_object, text, repeat)
+        found = result is not None
+        assert found == expected, f"{name}: extractor found={found}, expected {expected}"
+
+        sample = text[-LEGACY_MAX_BYTES:] if name == "prose_braces_then_fence" else text[:LEGACY_MAX_BYTES]
+        legacy_seconds, legacy_result = time_call(legacy_extract, sample, 1)
+
+        print(
+            f"{name:<26}{len(text) / 1048576:>8.1f}MB{seconds * 1000:>12.1f}ms{str(found):>8}"
+            f"{legacy_seconds * 1000:>12.1f}ms{str(legacy_result is not None):>8}"
+        )
+
+    print("-" * 78)
+    print("💡 The legacy column runs on a 64KB slice only; its cost grows quadratically on unbalanced input.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction on adversarial AI responses")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Approximate size of each response")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best time is reported)")
+    args = parser.parse_args()
+    run_benchmark(args.size_mb, args.repeat)
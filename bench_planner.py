@@ -0,0 +1,313 @@
+"""
+Benchmark suite for the planner hot path
+Times prompt building, response parsing, validation, costing, currency formatting and
+end-to-end plan_trip against a replayed provider, for itineraries of 1 to 30 days.
+Results can be saved as a baseline; later runs fail when a case is slower than the
+baseline by more than a threshold.
+
+Usage:
+    python bench_planner.py                     # run and compare with bench_baseline.json if present
+    python bench_planner.py --save              # run and write bench_baseline.json
+    python bench_planner.py --threshold 0.5 --filter parse
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import ai_client
+import compact_format
+import config
+import planner
+from cassette import Cassette
+from config import PROJECT_ROOT
+from currency import format_currency
+from fake_llm_server import fake_itinerary_text
+
+# Itinerary sizes (days) every size-dependent case is run at
+DAY_SIZES = (1, 3, 7, 14, 30)
+# Default baseline file, kept next to this script
+BASELINE_PATH = str(PROJECT_ROOT / "bench_baseline.json")
+# A case regresses when its best time exceeds the baseline by more than this fraction
+DEFAULT_THRESHOLD = 0.25
+
+TRIP = {"destination": "Lisbon", "budget": 900, "interests": ["history", "food", "nature"],
+        "transport": "metro", "stay": "hostel", "currency": "EUR"}
+
+
+def build_responses(days):
+    """
+    Build the response variants the parser is timed on.
+
+    Returns:
+        dict: variant name -> response text
+    """
+    prompt = planner._create_prompt(TRIP["destination"], days, TRIP["budget"], TRIP["interests"],
+                                    TRIP["transport"], TRIP["stay"], TRIP["currency"])
+    clean = fake_itinerary_text(prompt)
+    prose = "Tip: pack light {seriously} and keep {your passport} safe. "
+    data = json.loads(clean)
+    return {
+        "clean": clean,
+        # The same itinerary in the compact wire format, expanded after parsing
+        "compact": compact_format.dumps(data["itinerary"], data["summary"]),
+        "fenced": "Here is your trip!\n```json\n" + clean + "\n```\nHave fun!",
+        "noisy": prose * 20 + clean + "\n" + prose * 20,
+        # Cut off mid-JSON: the extractor scans it all, then the planner falls back
+        "truncated": clean[: len(clean) // 2],
+    }
+
+
+def build_cases(sizes=DAY_SIZES):
+    """
+    Build every micro-benchmark case.
+
+    Returns:
+        dict: case name -> function of no arguments
+    """
+    cases = {}
+    for days in sizes:
+        args = (TRIP["destination"], days, TRIP["budget"], TRIP["interests"],
+                TRIP["transport"], TRIP["stay"], TRIP["currency"])
+        cases[f"create_prompt/{days}d"] = lambda args=args: planner._create_prompt(*args)
+        for variant, text in build_responses(days).items():
+            cases[f"parse/{variant}/{days}d"] = lambda text=text: planner._parse_ai_response(text)
+        itinerary = json.loads(build_responses(days)["clean"])["itinerary"]
+        cases[f"validate/{days}d"] = lambda itinerary=itinerary: planner.validate_itinerary(itinerary)
+        cases[f"total_cost/{days}d"] = lambda itinerary=itinerary: planner.calculate_total_cost(itinerary)
+    for code in ("USD", "EUR", "JPY", "INR"):
+        cases[f"format_currency/{code}"] = lambda code=code: format_currency(1234567.891, code)
+    return cases
+
+
+def build_plan_trip_cases(sizes=DAY_SIZES):
+    """
+    Build end-to-end plan_trip cases; run them inside offline_provider().
+
+    Returns:
+        dict: case name -> function of no arguments
+    """
+    cases = {}
+    for days in sizes:
+        trip = dict(TRIP, duration=days)
+        cases[f"plan_trip/{days}d"] = lambda trip=trip: planner.plan_trip(use_cache=False, **trip)
+    return cases
+
+
+@contextlib.contextmanager
+def offline_provider(sizes=DAY_SIZES):
+    """
+    Serve plan_trip from a temporary cassette so no network or API key is needed.
+
+    Every benchmark trip is recorded with a fake itinerary first, then the
+    replay provider answers instantly (CASSETTE_REPLAY_SPEED is ignored).
+    """
+    previous_provider, previous_speed = config.AI_PROVIDER, ai_client.CASSETTE_REPLAY_SPEED
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(os.path.join(tmp, "bench.jsonl.gz"))
+        config.AI_PROVIDER = ai_client.REPLAY_PROVIDER
+        ai_client.CASSETTE_REPLAY_SPEED = 0
+        try:
+            for days in sizes:
+                trip = dict(TRIP, duration=days)
+                _, prompt, _ = planner._prepare_trip(**trip)
+                # With PLAN_CHUNK_DAYS set, long trips are planned in chunks, each with its own prompt
+                prompts = [prompt] + [chunk.prompt for chunk in planner._prepare_chunks(**trip)]
+                for prompt in prompts:
+                    cassette.record(prompt, fake_itinerary_text(prompt), 0.0, "bench")
+            ai_client.set_cassette(cassette)
+            yield
+        finally:
+            ai_client.set_cassette(None)
+            config.AI_PROVIDER = previous_provider
+            ai_client.CASSETTE_REPLAY_SPEED = previous_speed
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """
+    Time a function the way timeit does: calibrate a loop count, then take repeated samples.
+
+    Args:
+        func (callable): Function of no arguments
+        repeat (int): Samples to take
+        min_time (float): Minimum seconds per sample; sets the loop count
+
+    Returns:
+        dict: best and median seconds per call, and loops per sample
+    """
+    loops = 1
+    while True:
+        elapsed = _time_loops(func, loops)
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed / loops] + [_time_loops(func, loops) / loops for _ in range(repeat - 1)]
+    return {"best": min(samples), "median": statistics.median(samples), "loops": loops}
+
+
+def _time_loops(func, loops):
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - started
+
+
+def run_cases(cases, repeat=5, min_time=0.05, name_filter=None):
+    """
+    Measure every case whose name contains name_filter.
+
+    Returns:
+        dict: case name -> measure() result
+    """
+    results = {}
+    for name, func in cases.items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, repeat, min_time)
+    return results
+
+
+def run_suite(repeat=5, min_time=0.05, name_filter=None, sizes=DAY_SIZES):
+    """
+    Run the micro-benchmarks and the end-to-end plan_trip cases.
+
+    Returns:
+        dict: case name -> measure() result
+    """
+    results = run_cases(build_cases(sizes), repeat, min_time, name_filter)
+    with offline_provider(sizes):
+        results.update(run_cases(build_plan_trip_cases(sizes), repeat, min_time, name_filter))
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): This run, from run_suite()
+        baseline (dict): Baseline results (the "results" of a saved baseline file)
+        threshold (float): Allowed slowdown as a fraction of the baseline time
+
+    Returns:
+        list: (case name, baseline seconds or None, current seconds, ratio or None, status)
+            with status "regressed", "improved", "ok" or "new"
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("best")
+        if not base:
+            rows.append((name, None, result["best"], None, "new"))
+            continue
+        ratio = result["best"] / base
+        if ratio > 1 + threshold:
+            status = "regressed"
+        elif ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, base, result["best"], ratio, status))
+    return rows
+
+
+def load_baseline(path):
+    """
+    Read a baseline file.
+
+    Returns:
+        dict: The file's contents, or None if there is no baseline
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    """Write results as the new baseline, with the interpreter and machine they came from."""
+    data = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def format_report(rows):
+    """
+    Format comparison rows as a table.
+
+    Returns:
+        str: The table
+    """
+    icons = {"regressed": "❌", "improved": "🚀", "ok": "✅", "new": "🆕"}
+    lines = [f"{'case':<28}{'baseline':>12}{'current':>12}{'change':>10}", "-" * 66]
+    for name, base, current, ratio, status in rows:
+        base_text = "-" if base is None else _format_seconds(base)
+        change = "-" if ratio is None else f"{(ratio - 1) * 100:+.0f}%"
+        lines.append(f"{name:<28}{base_text:>12}{_format_seconds(current):>12}{change:>10}  {icons[status]}")
+    return "\n".join(lines)
+
+
+def _format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    return f"{seconds * 1e3:.2f} ms"
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Returns:
+        int: 0, or 1 if any case regressed beyond the threshold
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the planner hot path")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, e.g. 0.25 for 25%%")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case (the best is compared)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    print("⏱️ Planner Benchmark")
+    print("=" * 66)
+    results = run_suite(args.repeat, args.min_time, args.filter)
+
+    baseline = None if args.save else load_baseline(args.baseline)
+    rows = compare(results, baseline["results"] if baseline else {}, args.threshold)
+    print(format_report(rows))
+    print("-" * 66)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"💡 No baseline at {args.baseline}; run with --save to create one.")
+        return 0
+    if baseline.get("python") != platform.python_version():
+        print(f"⚠️ Baseline was recorded on Python {baseline.get('python')}; timings may not be comparable.")
+
+    regressed = [row[0] for row in rows if row[4] == "regressed"]
+    if regressed:
+        print(f"❌ {len(regressed)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(regressed)}")
+        return 1
+    print(f"✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
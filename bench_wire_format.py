@@ -0,0 +1,104 @@
+"""
+Benchmark for the compact response format
+Compares the full itinerary JSON with compact_format's short-key arrays: output tokens, the
+generation time they imply, and the local cost of parsing and expanding each.
+
+Usage:
+    python bench_wire_format.py [--tokens-per-second 60] [--repeat 200]
+"""
+
+import argparse
+import json
+import time
+
+import compact_format
+import planner
+from bench_planner import DAY_SIZES, TRIP
+from fake_llm_server import fake_itinerary_text
+from token_budget import estimate_tokens
+
+# Typical output speed of the hosted models, used to turn tokens into generation time
+DEFAULT_TOKENS_PER_SECOND = 60
+
+
+def build_pair(days):
+    """
+    Build the same itinerary in both formats, as the planner's prompts ask for them.
+
+    Returns:
+        tuple: (full response text, compact response text)
+    """
+    args = (TRIP["destination"], days, TRIP["budget"], TRIP["interests"],
+            TRIP["transport"], TRIP["stay"], TRIP["currency"])
+    full = fake_itinerary_text(planner._create_prompt(*args))
+    data = json.loads(full)
+    compact = compact_format.dumps(data["itinerary"], data["summary"])
+    assert planner._try_parse_ai_response(compact) == planner._try_parse_ai_response(full)
+    return full, compact
+
+
+def time_parse(text, repeat):
+    """Return the best seconds to parse (and expand) a response over `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        planner._try_parse_ai_response(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(sizes=DAY_SIZES, tokens_per_second=DEFAULT_TOKENS_PER_SECOND, repeat=200):
+    """
+    Measure both formats at each trip length.
+
+    Returns:
+        list: dict per size with days, full/compact tokens, generation seconds and parse seconds
+    """
+    rows = []
+    for days in sizes:
+        full, compact = build_pair(days)
+        row = {"days": days}
+        for name, text in (("full", full), ("compact", compact)):
+            tokens = estimate_tokens(text)
+            row[f"{name}_tokens"] = tokens
+            row[f"{name}_generate"] = tokens / tokens_per_second
+            row[f"{name}_parse"] = time_parse(text, repeat)
+        rows.append(row)
+    return rows
+
+
+def format_report(rows, tokens_per_second=DEFAULT_TOKENS_PER_SECOND):
+    """
+    Format benchmark rows as a table.
+
+    Returns:
+        str: The table
+    """
+    lines = [
+        f"{'days':>5}{'tokens':>9}{'compact':>9}{'saved':>8}"
+        f"{'gen s':>9}{'compact':>9}{'parse µs':>11}{'compact':>9}",
+        "-" * 69,
+    ]
+    for row in rows:
+        saved = 1 - row["compact_tokens"] / row["full_tokens"]
+        lines.append(
+            f"{row['days']:>5}{row['full_tokens']:>9}{row['compact_tokens']:>9}{saved:>8.0%}"
+            f"{row['full_generate']:>9.1f}{row['compact_generate']:>9.1f}"
+            f"{row['full_parse'] * 1e6:>11.1f}{row['compact_parse'] * 1e6:>9.1f}"
+        )
+    lines.append("-" * 69)
+    lines.append(f"💡 Tokens are estimated offline; generation time assumes {tokens_per_second:g} output "
+                 f"tokens/s. Measure real usage with AI_RESPONSE_FORMAT=compact and usage.stats().")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the full and compact response formats")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND,
+                        help="model output speed used to estimate generation time")
+    parser.add_argument("--repeat", type=int, default=200, help="parse runs per case (best time is reported)")
+    args = parser.parse_args()
+    print("⏱️ Response Format Benchmark")
+    print("=" * 69)
+    print(format_report(run_benchmark(DAY_SIZES, args.tokens_per_second, args.repeat), args.tokens_per_second))
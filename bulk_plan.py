@@ -0,0 +1,266 @@
+"""
+Bulk planning command line for Student AI Travel Planner
+This script plans trips from a JSONL file (or stdin) and writes one JSON result per line as they finish.
+
+Usage:
+    python bulk_plan.py trips.jsonl -o plans.jsonl --concurrency 8
+    cat trips.jsonl | python bulk_plan.py - -o plans.jsonl
+    python bulk_plan.py trips.jsonl -o plans.jsonl --resume    # continue after a crash
+
+Each input line is a JSON object with plan_trip() argument names, e.g.
+    {"id": "fair-001", "destination": "Paris", "duration": 3, "budget": 200,
+     "interests": ["history", "food"], "transport": "metro", "stay": "hostel", "currency": "EUR"}
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+from batch import plan_trips
+from histogram import LatencyHistogram
+from planner import calculate_total_cost, validate_itinerary
+
+
+class Checkpoint:
+    """
+    Progress of a bulk run: which input lines are finished and how much output is safe.
+
+    Finished lines are kept as a watermark (every line below it is done) plus
+    the few finished lines above it, so the checkpoint stays small however
+    long the input is. The output offset is where the output file is cut back
+    to on resume, dropping any lines written after the last checkpoint so no
+    result is written twice.
+    """
+
+    def __init__(self, path, watermark=0, done=(), offset=0):
+        self.path = path
+        self.watermark = watermark
+        self.done = set(done)
+        self.offset = offset
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a checkpoint file.
+
+        Returns:
+            Checkpoint: The saved progress, or an empty checkpoint if there is no file
+        """
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, data["watermark"], data["done"], data["offset"])
+
+    def is_done(self, line):
+        return line < self.watermark or line in self.done
+
+    def mark_done(self, line):
+        """Record a finished line and advance the watermark past consecutive finished lines."""
+        self.done.add(line)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self, offset):
+        """
+        Atomically write the checkpoint.
+
+        Args:
+            offset (int): Output file size covering every finished line
+        """
+        self.offset = offset
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "done": sorted(self.done), "offset": offset}, f)
+        os.replace(tmp_path, self.path)
+
+
+def build_record(line, request, itinerary, summary, error, seconds, usage=None):
+    """
+    Build the output JSON record for one finished trip.
+
+    Returns:
+        dict: The request, the itinerary and summary, whether the itinerary is
+            valid, its total cost, any error, the time taken and the token usage
+    """
+    valid = error is None and validate_itinerary(itinerary)
+    record = {"line": line}
+    if isinstance(request, dict) and "id" in request:
+        record["id"] = request["id"]
+    record.update({
+        "request": request,
+        "itinerary": itinerary,
+        "summary": summary,
+        "valid": valid,
+        "total_cost": calculate_total_cost(itinerary) if valid else None,
+        "currency": request.get("currency", "USD") if isinstance(request, dict) else None,
+        "error": error,
+        "seconds": round(seconds, 3),
+        "usage": usage,
+    })
+    return record
+
+
+def run(input_file, output_file, concurrency=4, checkpoint=None, checkpoint_every=100, options=None,
+        log=None):
+    """
+    Plan every trip in input_file and write results to output_file as they finish.
+
+    Args:
+        input_file (file): JSONL trip requests
+        output_file (file): Where result records are written
+        concurrency (int): Trips planned at the same time
+        checkpoint (Checkpoint): Progress to resume from and update; None disables checkpointing
+        checkpoint_every (int): Results between checkpoint saves
+        options (dict): Extra plan_trip() keyword arguments
+        log (file): Where the final statistics are printed; defaults to stderr
+
+    Returns:
+        dict: Run statistics (see format_stats)
+    """
+    latencies = LatencyHistogram()
+    stats = {"planned": 0, "ok": 0, "errors": 0, "invalid": 0, "skipped": 0, "tokens": 0, "cost_usd": 0.0}
+    # Batch index -> (input line, JSON error); at most `concurrency` entries
+    pending = {}
+
+    def requests():
+        for line, text in enumerate(input_file):
+            if checkpoint is not None and checkpoint.is_done(line):
+                stats["skipped"] += 1
+                continue
+            if not text.strip():
+                if checkpoint is not None:
+                    checkpoint.mark_done(line)
+                continue
+            try:
+                request, parse_error = json.loads(text), None
+            except ValueError as e:
+                request, parse_error = None, f"Invalid JSON: {e}"
+            pending[next(batch_index)] = (line, parse_error)
+            yield request
+
+    # plan_trips numbers the requests it is given; blank and finished lines are not given to it
+    batch_index = itertools.count()
+    started = time.perf_counter()
+    since_checkpoint = 0
+    try:
+        for result in plan_trips(requests(), concurrency=concurrency, **(options or {})):
+            line, parse_error = pending.pop(result.index)
+            error = parse_error or result.error
+            record = build_record(line, result.request, result.itinerary, result.summary, error, result.seconds,
+                                  result.usage)
+            output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            stats["planned"] += 1
+            latencies.record(result.seconds)
+            if result.usage:
+                stats["tokens"] += result.usage["total_tokens"]
+                stats["cost_usd"] += result.usage["cost_usd"]
+            if error is not None:
+                stats["errors"] += 1
+            elif record["valid"]:
+                stats["ok"] += 1
+            else:
+                stats["invalid"] += 1
+
+            if checkpoint is not None:
+                checkpoint.mark_done(line)
+                since_checkpoint += 1
+                if since_checkpoint >= checkpoint_every:
+                    output_file.flush()
+                    checkpoint.save(output_file.tell())
+                    since_checkpoint = 0
+    finally:
+        output_file.flush()
+        if checkpoint is not None:
+            checkpoint.save(output_file.tell())
+        stats["seconds"] = time.perf_counter() - started
+        stats["latency"] = latencies.summary(percentiles=(50, 90, 95, 99))
+        print(format_stats(stats), file=log or sys.stderr)
+    return stats
+
+
+def format_stats(stats):
+    """
+    Format run statistics for the terminal.
+
+    Returns:
+        str: A short multi-line report
+    """
+    seconds = stats["seconds"]
+    throughput = stats["planned"] / seconds if seconds > 0 else 0.0
+    latency = stats["latency"]
+
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f} ms"
+
+    return "\n".join([
+        "📊 Bulk planning finished",
+        f"   Planned: {stats['planned']} (ok {stats['ok']}, invalid {stats['invalid']}, "
+        f"errors {stats['errors']}, skipped {stats['skipped']})",
+        f"   Time: {seconds:.1f} s, throughput {throughput:.2f} trips/s",
+        f"   Latency: p50 {ms(latency['p50'])}, p90 {ms(latency['p90'])}, "
+        f"p95 {ms(latency['p95'])}, p99 {ms(latency['p99'])}, max {ms(latency['max'])}",
+        f"   Tokens: {stats.get('tokens', 0)}, estimated cost ${stats.get('cost_usd', 0.0):.4f}",
+    ])
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Returns:
+        int: Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Plan trips in bulk from JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL trip requests, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, or - for stdout")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="trips planned at the same time")
+    parser.add_argument("--resume", action="store_true", help="continue from the output's checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="results between checkpoints")
+    parser.add_argument("--deadline", type=float, default=None, help="seconds allowed per trip")
+    parser.add_argument("--no-cache", action="store_true", help="always call the AI provider")
+    args = parser.parse_args(argv)
+
+    if args.resume and args.output == "-":
+        parser.error("--resume needs an output file")
+
+    options = {"use_cache": not args.no_cache}
+    if args.deadline is not None:
+        options["deadline"] = args.deadline
+
+    checkpoint = None
+    if args.output == "-":
+        output_file = sys.stdout
+    else:
+        checkpoint = Checkpoint.load(f"{args.output}.checkpoint") if args.resume else \
+            Checkpoint(f"{args.output}.checkpoint")
+        output_file = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+        if args.resume:
+            # Drop results written after the last checkpoint; they are planned again
+            output_file.truncate(checkpoint.offset)
+            output_file.seek(checkpoint.offset)
+            if checkpoint.watermark or checkpoint.done:
+                print(f"↩️  Resuming after {checkpoint.watermark + len(checkpoint.done)} finished trips",
+                      file=sys.stderr)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        run(input_file, output_file, args.concurrency, checkpoint, args.checkpoint_every, options)
+    except KeyboardInterrupt:
+        print("⏹️  Interrupted; rerun with --resume to continue", file=sys.stderr)
+        return 130
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Response cache for Student AI Travel Planner
+This module stores generated itineraries so identical trip requests skip the AI call.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import (
+    CACHE_ENABLED,
+    CACHE_MAX_DISK_ENTRIES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+)
+
+
+def make_cache_key(**fields):
+    """
+    Build a stable cache key from request fields.
+
+    Fields are serialized as canonical JSON (sorted keys, no whitespace) and
+    hashed, so the same values always give the same key.
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache: an in-memory LRU in front of an optional SQLite file.
+
+    Values are JSON-serializable objects. They are stored as JSON text and
+    decoded on every hit, so callers can never mutate a cached entry.
+    Entries expire after `ttl` seconds in both tiers. Each tier evicts its
+    least recently used entries once it is over its size limit.
+    """
+
+    def __init__(self, path=None, ttl=86400, max_entries=512, max_disk_entries=10000):
+        """
+        Args:
+            path (str): SQLite file for the persistent tier, or None for memory only
+            ttl (float): Seconds an entry stays valid
+            max_entries (int): Maximum entries kept in memory
+            max_disk_entries (int): Maximum entries kept in the SQLite file
+        """
+        self.path = str(path) if path else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Returns:
+            object: The cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return json.loads(payload)
+                del self._memory[key]
+
+            db = self._connect()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload, expires_at = row
+                    if expires_at > now:
+                        db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                        db.commit()
+                        self._remember(key, expires_at, payload)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(payload)
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key (str): Cache key, usually from make_cache_key()
+            value (object): JSON-serializable value
+        """
+        payload = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, payload)
+            self.stores += 1
+
+            db = self._connect()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, payload, expires_at, now),
+                )
+                count = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.max_disk_entries:
+                    db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                    db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (max(0, count - self.max_disk_entries),),
+                    )
+                db.commit()
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def stats(self):
+        """
+        Return hit/miss counters for monitoring.
+
+        Returns:
+            dict: Counters plus the current in-memory size and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Close the SQLite connection, if one is open."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, expires_at, payload):
+        """Insert into the memory tier and evict the least recently used overflow."""
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _connect(self):
+        """Open the SQLite tier on first use. Must be called with the lock held."""
+        if self._db is None and self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._db.commit()
+        return self._db
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide response cache configured in config.py.
+
+    Returns:
+        ResponseCache: The shared cache, or None if caching is disabled and
+            no cache was installed with set_response_cache()
+    """
+    global _response_cache
+    if _response_cache is not None:
+        return _response_cache
+    if not CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    path=CACHE_PATH,
+                    ttl=CACHE_TTL_SECONDS,
+                    max_entries=CACHE_MAX_ENTRIES,
+                    max_disk_entries=CACHE_MAX_DISK_ENTRIES,
+                )
+    return _response_cache
+
+
+def set_response_cache(cache):
+    """
+    Replace the process-wide response cache (e.g. with a memory-only one in tests).
+
+    Args:
+        cache (ResponseCache): The cache to use, or None to rebuild from config on next use
+    """
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = cache
@@ -0,0 +1,128 @@
+"""
+Record/replay cassettes for Student AI Travel Planner
+This module stores real provider responses with their latency so benchmarks can replay them offline.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+
+class CassetteMissError(KeyError):
+    """Raised when a replayed prompt was never recorded."""
+
+    def __str__(self):
+        return self.args[0] if self.args else "Prompt not found in cassette"
+
+
+def prompt_key(prompt):
+    """
+    Key a prompt by its SHA-256, so cassettes do not store the prompt text.
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    A gzip-compressed JSONL file of recorded provider calls.
+
+    Each line holds the prompt hash, the provider and model that answered,
+    the observed latency in seconds and the raw response text. Recording
+    appends a new gzip member per session, so a cassette can be extended
+    across runs without rewriting it. A prompt recorded several times is
+    replayed round-robin through its recordings.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Cassette file, conventionally ending in .jsonl.gz
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._writer = None
+        self._entries = None
+        self._next = {}
+
+    def record(self, prompt, response, latency, provider=None, model=None):
+        """
+        Append one provider call.
+
+        Args:
+            prompt (str): Prompt that was sent
+            response (str): Raw response text
+            latency (float): Seconds the call took
+            provider (str): Provider that answered
+            model (str): Model that answered
+        """
+        entry = {"key": prompt_key(prompt), "provider": provider, "model": model,
+                 "latency": round(latency, 4), "response": response}
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = gzip.open(self.path, "at", encoding="utf-8")
+            self._writer.write(line)
+            self._writer.flush()
+            if self._entries is not None:
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def lookup(self, prompt):
+        """
+        Return the next recording for a prompt.
+
+        Returns:
+            dict: Entry with provider, model, latency and response
+
+        Raises:
+            CassetteMissError: If the prompt was never recorded
+        """
+        key = prompt_key(prompt)
+        with self._lock:
+            entries = self._load().get(key)
+            if not entries:
+                raise CassetteMissError(
+                    f"No recording for this prompt in {self.path}. Record it first with AI_RECORD=true."
+                )
+            index = self._next.get(key, 0)
+            self._next[key] = (index + 1) % len(entries)
+            return entries[index]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._load().values())
+
+    def close(self):
+        """Finish the current gzip member so the file is complete on disk."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _load(self):
+        """Read every recording into memory on first use. Call with the lock held."""
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                if self._writer is not None:
+                    self._writer.flush()
+                with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                    for line in _complete_lines(f):
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+        return self._entries
+
+
+def _complete_lines(f):
+    """Yield lines, stopping quietly at a gzip member cut off by a crash."""
+    try:
+        for line in f:
+            if line.endswith("\n"):
+                yield line
+    except (EOFError, gzip.BadGzipFile):
+        return
@@ -0,0 +1,144 @@
+"""
+Request coalescing for Student AI Travel Planner
+This module lets concurrent identical requests share one AI provider call ("single flight").
+"""
+
+import asyncio
+import threading
+
+from retry import DeadlineExceeded
+
+
+class _Call:
+    """One in-flight threaded call and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its result.
+
+    The first caller for a key (the leader) runs the function. Callers that
+    arrive with the same key before it finishes wait and receive the same
+    result, or the same exception. Once the call finishes the key is released,
+    so later callers start a fresh call.
+
+    Threaded callers (do) and asyncio callers (do_async) are coalesced
+    separately; async calls are also scoped to their event loop.
+
+    Only the leader's calls run inside the leader's context, so token usage
+    and answered providers are recorded for the leader alone; callers that
+    need them pass them back in the result (see planner._share_call).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, timeout=None):
+        """
+        Call func(), or wait for the identical call already in flight.
+
+        Args:
+            key (str): Canonical request key
+            func (callable): Zero-argument function that performs the call
+            timeout (float): Longest a waiting caller blocks, or None for no limit;
+                the leader is not interrupted
+
+        Returns:
+            object: The (shared) return value of func
+
+        Raises:
+            DeadlineExceeded: If the shared call is still running after timeout seconds
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise DeadlineExceeded("The request ran out of time waiting for an identical request.")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, coro_func, timeout=None):
+        """
+        Await coro_func(), or join the identical call already in flight on this loop.
+
+        The shared call runs as its own task, so a cancelled or timed-out
+        waiter does not cancel it for the others.
+
+        Args:
+            key (str): Canonical request key
+            coro_func (callable): Zero-argument function returning a coroutine
+            timeout (float): Longest to wait for the result, or None for no limit
+
+        Returns:
+            object: The (shared) result of the coroutine
+
+        Raises:
+            DeadlineExceeded: If the shared call is still running after timeout seconds
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = loop.create_task(coro_func())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda _: self._forget_task(task_key))
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                raise  # The shared call itself timed out
+            raise DeadlineExceeded("The request ran out of time waiting for an identical request.") from None
+
+    def _forget_task(self, task_key):
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+    def stats(self):
+        """
+        Return coalescing counters.
+
+        Returns:
+            dict: executed (provider calls made), coalesced (calls saved),
+                in_flight (calls running now) and the share of calls saved
+        """
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "saved_ratio": self.coalesced / total if total else 0.0,
+            }
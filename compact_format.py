@@ -0,0 +1,84 @@
+"""
+Compact response format for Student AI Travel Planner
+This module defines a short-key, array-based itinerary format that costs fewer output tokens,
+and expands it locally into the usual itinerary list of dicts.
+"""
+
+import json
+
+# Top-level keys of a compact response: the days and the trip summary
+DAYS_KEY = "d"
+SUMMARY_KEY = "s"
+KEYS = (DAYS_KEY, SUMMARY_KEY)
+# Order of the values in each compact day; the day number is its position
+DAY_FIELDS = ("activities", "cost", "transport", "notes")
+
+# Replaces the OUTPUT FORMAT section of the planner prompt
+PROMPT_FORMAT = """OUTPUT FORMAT:
+Reply with minified JSON only (no spaces or line breaks outside strings) in this compact schema:
+
+{"d":[[["Activity 1","Activity 2","Activity 3"],50,"metro/bus/walking","Important tips and safety notes"]],"s":"A concise 2-3 sentence summary of the trip, highlighting key experiences and budget considerations for students."}
+
+"d" lists the days in order; each day is [activities, cost, transport, notes]. "s" is the trip summary.
+"""
+
+
+def is_compact(data):
+    """
+    Tell whether parsed JSON is a compact response.
+
+    Returns:
+        bool: True for an object with "d" and "s" and no "itinerary"
+    """
+    return isinstance(data, dict) and DAYS_KEY in data and SUMMARY_KEY in data and "itinerary" not in data
+
+
+def expand_day(values, number):
+    """
+    Expand one compact day into an itinerary day.
+
+    Args:
+        values (list): [activities, cost, transport, notes]
+        number (int): Day number
+
+    Returns:
+        dict: Day with "day", "activities", "cost", "transport" and "notes"
+
+    Raises:
+        ValueError: If the day does not have one value per field
+    """
+    if not isinstance(values, list) or len(values) != len(DAY_FIELDS):
+        raise ValueError(f"Compact day {number} must be a list of {len(DAY_FIELDS)} values")
+    day = {"day": number}
+    day.update(zip(DAY_FIELDS, values))
+    return day
+
+
+def expand(data):
+    """
+    Expand a parsed compact response.
+
+    Args:
+        data (dict): Parsed JSON with "d" and "s"
+
+    Returns:
+        tuple: (itinerary, summary) in the same shape as the full format
+
+    Raises:
+        ValueError: If the days are not a list of compact days
+    """
+    days = data[DAYS_KEY]
+    if not isinstance(days, list):
+        raise ValueError("Compact response 'd' must be a list of days")
+    return [expand_day(values, number) for number, values in enumerate(days, 1)], data[SUMMARY_KEY]
+
+
+def dumps(itinerary, summary):
+    """
+    Write an itinerary in the compact format, as a model following PROMPT_FORMAT would.
+
+    Returns:
+        str: Minified JSON
+    """
+    days = [[day.get(field) for field in DAY_FIELDS] for day in itinerary]
+    return json.dumps({DAYS_KEY: days, SUMMARY_KEY: summary}, separators=(",", ":"), ensure_ascii=False)
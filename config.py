@@ -19,6 +19,88 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "").strip()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "").strip()
 GROQ_MODEL = os.getenv("GROQ_MODEL", "openai/gpt-oss-20b").strip()
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash").strip()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo").strip()
+# API endpoints; override to use a proxy or the local fake_llm_server.py
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "").strip() or None
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1").strip()
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "").strip() or None
+
+# Provider routing: "single", "failover" or "latency" (see get_routing_mode).
+# Failover and latency routing send prompts to other providers, so they are opt-in.
+AI_ROUTING = os.getenv("AI_ROUTING", "single").strip().lower()
+# Circuit breaker: open after this many consecutive failures, retry after the cooldown
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Hedging: if a provider is slower than its usual latency, race the next provider.
+# AI_HEDGE_BUDGET is the number of extra calls allowed per request (0 disables hedging).
+AI_HEDGE_BUDGET = int(os.getenv("AI_HEDGE_BUDGET", "0"))
+AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "95"))
+AI_HEDGE_DELAY_SECONDS = float(os.getenv("AI_HEDGE_DELAY_SECONDS", "8"))
+AI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("AI_HEDGE_MIN_DELAY_SECONDS", "1"))
+
+# Client-side rate limits per provider (0 = unlimited). Requests over the limit
+# wait in a queue instead of failing with 429 errors.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "0"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "0"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+GROQ_RPM = int(os.getenv("GROQ_RPM", "0"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "0"))
+RATE_LIMIT_MAX_QUEUE = int(os.getenv("RATE_LIMIT_MAX_QUEUE", "32"))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+
+# Retries: transient errors (timeouts, 429, 5xx, unparseable responses) are retried
+# with jittered exponential backoff, all within one end-to-end deadline per trip
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "90"))
+
+# Output token limits: each request's limit is sized to the trip (see token_budget.py)
+# within these bounds, with OUTPUT_TOKENS_MARGIN headroom over the expected size
+OUTPUT_TOKENS_MIN = int(os.getenv("OUTPUT_TOKENS_MIN", "256"))
+OUTPUT_TOKENS_MAX = int(os.getenv("OUTPUT_TOKENS_MAX", "4096"))
+OUTPUT_TOKENS_MARGIN = float(os.getenv("OUTPUT_TOKENS_MARGIN", "1.3"))
+
+# Chunked planning: trips of PLAN_CHUNK_MIN_DURATION days or more are written in ranges of
+# about PLAN_CHUNK_DAYS days, generated concurrently and stitched together (0 = off, the default)
+PLAN_CHUNK_DAYS = int(os.getenv("PLAN_CHUNK_DAYS", "0"))
+PLAN_CHUNK_MIN_DURATION = int(os.getenv("PLAN_CHUNK_MIN_DURATION", "15"))
+
+# Response format: "full" asks for the documented itinerary JSON, "compact" for short keys
+# and arrays (see compact_format.py), which costs fewer output tokens
+AI_RESPONSE_FORMAT = os.getenv("AI_RESPONSE_FORMAT", "full").strip().lower()
+# Structured output: AI_STRUCTURED_OUTPUT=true makes each provider return JSON following
+# itinerary_schema.py (OpenAI/Groq json_schema, Gemini response_schema); implies the full format
+AI_STRUCTURED_OUTPUT = os.getenv("AI_STRUCTURED_OUTPUT", "false").strip().lower() in ("1", "true", "yes", "on")
+
+# Record/replay: AI_RECORD=true appends every provider response to the cassette;
+# AI_PROVIDER=replay answers from the cassette instead of calling a provider
+AI_RECORD = os.getenv("AI_RECORD", "false").strip().lower() in ("1", "true", "yes", "on")
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", str(PROJECT_ROOT / ".cache" / "cassette.jsonl.gz")).strip()
+# 0 replays instantly, 1 waits the recorded latency, 2 replays twice as fast
+CASSETTE_REPLAY_SPEED = float(os.getenv("CASSETTE_REPLAY_SPEED", "0"))
+
+# Metrics: AI_METRICS=true times planner stages and serves them in Prometheus
+# text format at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = os.getenv("AI_METRICS", "false").strip().lower() in ("1", "true", "yes", "on")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1").strip()
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+# Response cache: identical trip requests are answered without calling the AI again
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Persistent tier in the user's cache directory ($XDG_CACHE_HOME or ~/.cache), not the project
+USER_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", "").strip() or Path.home() / ".cache") / "student-ai-travel-planner"
+CACHE_PATH = os.path.expanduser(os.getenv("CACHE_PATH", str(USER_CACHE_DIR / "itineraries.sqlite3")).strip())
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("CACHE_MAX_DISK_ENTRIES", "10000"))
+# Relative width of budget buckets in request keys (0.05 = budgets within ~5% share a key; 0 = exact)
+REQUEST_BUDGET_TOLERANCE = float(os.getenv("REQUEST_BUDGET_TOLERANCE", "0"))
+
+class ConfigurationError(ValueError):
+    """Raised when a provider cannot be used as configured (missing key, unknown name, bad model)."""
 
 def get_provider():
     """
@@ -29,39 +111,91 @@ def get_provider():
     """
     return AI_PROVIDER
 
-def get_api_key():
+def get_api_key(provider=None):
     """
     Returns the API key for the selected provider.
 
+    Args:
+        provider (str): Provider name; defaults to the configured provider
+
     Returns:
-        str: API key for the configured provider
+        str: API key for the provider
 
     Raises:
-        ValueError: If no API key is set for the provider
+        ConfigurationError: If no API key is set for the provider
     """
-    if AI_PROVIDER == "gemini":
+    provider = provider or AI_PROVIDER
+    if provider == "gemini":
         if not GEMINI_API_KEY:
-            raise ValueError(
+            raise ConfigurationError(
                 "Gemini API key not set. Please add GEMINI_API_KEY to .env or your environment variables."
             )
         return GEMINI_API_KEY
-    elif AI_PROVIDER == "openai":
+    elif provider == "openai":
         if not OPENAI_API_KEY:
-            raise ValueError(
+            raise ConfigurationError(
                 "OpenAI API key not set. Please add OPENAI_API_KEY to .env or your environment variables."
             )
         return OPENAI_API_KEY
-    elif AI_PROVIDER == "groq":
+    elif provider == "groq":
         if not GROQ_API_KEY:
-            raise ValueError(
+            raise ConfigurationError(
                 "Groq API key not set. Please add GROQ_API_KEY to .env or your environment variables."
             )
         return GROQ_API_KEY
     else:
-        raise ValueError(
-            f"Unknown AI provider '{AI_PROVIDER}'. Set AI_PROVIDER to 'gemini', 'openai', or 'groq'."
+        raise ConfigurationError(
+            f"Unknown AI provider '{provider}'. Set AI_PROVIDER to 'gemini', 'openai', or 'groq'."
         )
 
+def get_routing_mode():
+    """
+    Returns how requests are spread across providers.
+
+    Returns:
+        str: "single" (AI_PROVIDER only), "failover" (AI_PROVIDER first, then
+            other providers with keys) or "latency" (fastest healthy provider first)
+    """
+    return AI_ROUTING
+
+def get_rate_limits(provider=None):
+    """
+    Returns the client-side rate limits for a provider.
+
+    Args:
+        provider (str): Provider name; defaults to the configured provider
+
+    Returns:
+        tuple: (requests per minute, tokens per minute); 0 means unlimited
+    """
+    provider = provider or AI_PROVIDER
+    if provider == "gemini":
+        return GEMINI_RPM, GEMINI_TPM
+    if provider == "openai":
+        return OPENAI_RPM, OPENAI_TPM
+    if provider == "groq":
+        return GROQ_RPM, GROQ_TPM
+    return 0, 0
+
+def get_base_url(provider=None):
+    """
+    Returns the API base URL for a provider.
+
+    Args:
+        provider (str): Provider name; defaults to the configured provider
+
+    Returns:
+        str: Base URL, or None to use the SDK's default endpoint
+    """
+    provider = provider or AI_PROVIDER
+    if provider == "openai":
+        return OPENAI_BASE_URL
+    if provider == "groq":
+        return GROQ_BASE_URL
+    if provider == "gemini":
+        return GEMINI_BASE_URL
+    return None
+
 def get_groq_model():
     """
     Returns the configured Groq model name.
@@ -70,3 +204,40 @@ def get_groq_model():
         str: Groq model identifier
     """
     return GROQ_MODEL
+
+def get_gemini_model():
+    """
+    Returns the configured Gemini model name.
+
+    Returns:
+        str: Gemini model identifier
+    """
+    return GEMINI_MODEL
+
+def get_openai_model():
+    """
+    Returns the configured OpenAI model name.
+
+    Returns:
+        str: OpenAI model identifier
+    """
+    return OPENAI_MODEL
+
+def get_model(provider=None):
+    """
+    Returns the model name used for a provider.
+
+    Args:
+        provider (str): Provider name; defaults to the configured provider
+
+    Returns:
+        str: Model identifier
+    """
+    provider = provider or AI_PROVIDER
+    if provider == "gemini":
+        return GEMINI_MODEL
+    if provider == "openai":
+        return OPENAI_MODEL
+    if provider == "groq":
+        return GROQ_MODEL
+    return ""
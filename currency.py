@@ -0,0 +1,46 @@
+"""
+Currency helpers for Student AI Travel Planner
+This module holds currency symbols and decimal places, and formats amounts for display.
+"""
+
+# Minimal symbol/decimal mapping with sensible defaults
+CURRENCY_META = {
+    "USD": {"symbol": "$", "decimals": 2},
+    "EUR": {"symbol": "€", "decimals": 2},
+    "GBP": {"symbol": "£", "decimals": 2},
+    "JPY": {"symbol": "¥", "decimals": 0},
+    "CNY": {"symbol": "¥", "decimals": 2},
+    "INR": {"symbol": "₹", "decimals": 2},
+    "AUD": {"symbol": "A$", "decimals": 2},
+    "CAD": {"symbol": "C$", "decimals": 2},
+    "CHF": {"symbol": "CHF ", "decimals": 2},
+    "SEK": {"symbol": "SEK ", "decimals": 2},
+    "NOK": {"symbol": "NOK ", "decimals": 2},
+    "DKK": {"symbol": "DKK ", "decimals": 2},
+    "ZAR": {"symbol": "R", "decimals": 2},
+    "BRL": {"symbol": "R$", "decimals": 2},
+    "KRW": {"symbol": "₩", "decimals": 0},
+    "SGD": {"symbol": "S$", "decimals": 2},
+    "HKD": {"symbol": "HK$", "decimals": 2},
+    "NZD": {"symbol": "NZ$", "decimals": 2},
+    "MXN": {"symbol": "MX$", "decimals": 2},
+    "AED": {"symbol": "AED ", "decimals": 2},
+    "SAR": {"symbol": "SAR ", "decimals": 2},
+}
+
+def get_currency_meta(code: str) -> dict:
+    meta = CURRENCY_META.get(code)
+    if meta is None:
+        # Default to 2 decimals and prefix with code
+        return {"symbol": f"{code} ", "decimals": 2}
+    return meta
+
+def format_currency(amount: float, code: str) -> str:
+    meta = get_currency_meta(code)
+    decimals = meta["decimals"]
+    symbol = meta["symbol"]
+    fmt = f"{{:,.{decimals}f}}"
+    try:
+        return f"{symbol}{fmt.format(float(amount))}"
+    except Exception:
+        return f"{symbol}{amount}"
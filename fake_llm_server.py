@@ -0,0 +1,451 @@
+"""
+Local stand-in LLM server for Student AI Travel Planner
+This script serves fake itineraries over the OpenAI, Groq and Gemini HTTP APIs so load tests need no network.
+
+Usage:
+    python fake_llm_server.py --port 8765 --latency lognormal:0.8,0.4 --error-rate 0.02 --rate-429 0.05
+
+Then point the app at it (any non-empty API key works):
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    GROQ_BASE_URL=http://127.0.0.1:8765/openai/v1
+    GEMINI_BASE_URL=http://127.0.0.1:8765
+
+Endpoints:
+    POST .../chat/completions                    OpenAI chat completions (stream=true for SSE)
+    POST .../responses                           OpenAI responses API, as used for Groq (stream=true for SSE)
+    POST /v1beta/models/<model>:generateContent  Gemini
+    POST /v1beta/models/<model>:streamGenerateContent  Gemini streaming (JSON array, or SSE with alt=sse)
+    GET  /stats                                  Request counters
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import compact_format
+
+ACTIVITIES = [
+    "Free walking tour of the old town", "Visit the main history museum (student discount)",
+    "Picnic lunch at a local market", "Sunset at a free viewpoint", "Street food crawl",
+    "Explore the university district", "Cheap tapas or small-plates dinner", "Local park and botanical garden",
+    "Street art neighbourhood walk", "Day pass on public transport to the coast", "Free-entry evening at a gallery",
+]
+# planner._create_day_prompt asks for one replacement day
+_DAY_PROMPT = re.compile(r"wants a new plan for day (\d+) only")
+
+
+class LatencyModel:
+    """
+    A distribution of response times, parsed from a short spec.
+
+    Specs (seconds):
+        fixed:0.5            always 0.5
+        uniform:0.2,1.5      uniform between 0.2 and 1.5
+        normal:0.8,0.2       normal with mean 0.8 and standard deviation 0.2 (clipped at 0)
+        lognormal:0.8,0.5    log-normal with median 0.8 and shape 0.5 (long right tail)
+        exponential:0.5      exponential with mean 0.5
+    """
+
+    def __init__(self, spec="fixed:0", rng=None):
+        self.spec = spec
+        self._rng = rng or random.Random()
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Bad latency spec '{spec}'. Examples: fixed:0.5, uniform:0.2,1.5, lognormal:0.8,0.5")
+
+    def sample(self):
+        """Return one latency in seconds."""
+        p = self.params
+        if self.kind == "fixed":
+            return p[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, self._rng.gauss(p[0], p[1]))
+        if self.kind == "lognormal":
+            return self._rng.lognormvariate(math.log(p[0]) if p[0] > 0 else -50, p[1])
+        return self._rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+
+
+class FakeLLMConfig:
+    """Behaviour of the fake server; every rate is a probability per request."""
+
+    def __init__(self, latency="fixed:0", chunk_delay=0.0, chunk_chars=40, error_rate=0.0, rate_429=0.0,
+                 malformed_rate=0.0, slow_rate=0.0, slow_seconds=30.0, seed=None):
+        """
+        Args:
+            latency (str): LatencyModel spec for the time before the first byte
+            chunk_delay (float): Seconds between streamed chunks
+            chunk_chars (int): Characters per streamed chunk
+            error_rate (float): Share of requests answered with HTTP 500
+            rate_429 (float): Share of requests answered with HTTP 429 and Retry-After
+            malformed_rate (float): Share of requests whose text is not valid itinerary JSON
+                (structured-output requests are never malformed)
+            slow_rate (float): Share of requests that hang for slow_seconds (tail latency)
+            slow_seconds (float): How long a slow request hangs
+            seed (int): Random seed for reproducible runs
+        """
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.malformed_rate = malformed_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0, "slow": 0, "streams": 0}
+
+    def roll(self, rate):
+        with self._lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def delay(self):
+        """Sample the time before the first byte, including injected hangs."""
+        if self.roll(self.slow_rate):
+            self.count("slow")
+            return self.slow_seconds
+        with self._lock:
+            return self.latency.sample()
+
+
+def fake_itinerary_text(prompt, rng=None):
+    """
+    Build an itinerary JSON response that matches the destination, duration and currency in a prompt.
+
+    Args:
+        prompt (str): Prompt built by planner._create_prompt (other prompts get a 3-day trip);
+            a "DAYS: first-last" line limits the response to that part of the trip,
+            prompts asking for the compact format get a compact response, and
+            planner._create_day_prompt prompts get a single day object
+
+    Returns:
+        str: JSON text in the format the planner asks for
+    """
+    rng = rng or random.Random(len(prompt))
+    destination = _prompt_field(prompt, "DESTINATION", "the city")
+    days = int(_prompt_field(prompt, "DURATION", "3 days").split()[0] or 3)
+    budget_text = _prompt_field(prompt, "BUDGET", "300 USD total").split()
+    budget = float(budget_text[0]) if budget_text else 300.0
+    currency = budget_text[1] if len(budget_text) > 1 else "USD"
+    daily = max(1, round(budget / max(days, 1) * 0.8))
+
+    def make_day(day):
+        return {
+            "day": day,
+            "activities": rng.sample(ACTIVITIES, 3),
+            "cost": daily,
+            "transport": rng.choice(["metro", "bus", "walking"]),
+            "notes": f"Day {day} in {destination}: carry a reusable bottle and keep valuables close.",
+        }
+
+    replaced = _DAY_PROMPT.search(prompt)
+    if replaced:
+        return json.dumps(make_day(int(replaced.group(1))), indent=2)
+
+    first, _, last = _prompt_field(prompt, "DAYS", f"1-{days}").partition("-")
+    first, last = int(first), int(last or first)
+    itinerary = [make_day(day) for day in range(first, last + 1)]
+    days = last - first + 1
+    summary = (f"A {days}-day student trip to {destination} built around free sights and cheap local food, "
+               f"spending about {daily * days} {currency} of the {budget:g} {currency} budget.")
+    if compact_format.PROMPT_FORMAT in prompt:
+        return compact_format.dumps(itinerary, summary)
+    return json.dumps({"itinerary": itinerary, "summary": summary}, indent=2)
+
+
+def malformed_text(text, rng):
+    """Damage a response the way real models sometimes do."""
+    choice = rng.randrange(3)
+    if choice == 0:
+        return text[: len(text) // 2]  # truncated mid-JSON
+    if choice == 1:
+        return "Sure! Here is a great plan: day one, explore; day two, relax. Enjoy!"
+    return text.replace('"cost":', '"cost" =', 1)  # invalid JSON syntax
+
+
+def _prompt_field(prompt, name, default):
+    match = re.search(rf"^{name}:\s*(.+)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else default
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Routes requests to the OpenAI, responses (Groq) and Gemini emulations."""
+
+    protocol_version = "HTTP/1.1"
+    config = FakeLLMConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up mid-response (a timed-out or abandoned call)
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.config._lock:
+                counters = dict(self.config.counters)
+            self._send_json(200, counters)
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Body is not JSON"}})
+            return
+        path = self.path.split("?", 1)[0]
+        config = self.config
+        config.count("requests")
+
+        time.sleep(config.delay())
+        if config.roll(config.rate_429):
+            config.count("rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error",
+                                            "code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                            {"Retry-After": "1"})
+            return
+        if config.roll(config.error_rate):
+            config.count("errors")
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error",
+                                            "code": 500, "status": "INTERNAL"}})
+            return
+
+        if path.endswith("/chat/completions"):
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            self._openai_chat(body, self._answer(prompt, body.get("response_format")))
+        elif path.endswith("/responses"):
+            prompt = body.get("input")
+            if isinstance(prompt, list):
+                prompt = "\n".join(str(item.get("content", "")) for item in prompt if isinstance(item, dict))
+            self._openai_responses(body, self._answer(str(prompt or ""), (body.get("text") or {}).get("format")))
+        elif ":generateContent" in path or ":streamGenerateContent" in path:
+            prompt = "\n".join(part.get("text", "") for content in body.get("contents", [])
+                               for part in content.get("parts", []))
+            generation = body.get("generationConfig") or {}
+            self._gemini(path, self._answer(prompt, generation.get("responseSchema")))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown endpoint {path}"}})
+
+    def _answer(self, prompt, structured=None):
+        text = fake_itinerary_text(prompt)
+        # Structured output is decoded against the schema, so it is never malformed
+        if not structured and self.config.roll(self.config.malformed_rate):
+            self.config.count("malformed")
+            with self.config._lock:
+                text = malformed_text(text, self.config.rng)
+        return text
+
+    def _chunks(self, text):
+        size = self.config.chunk_chars
+        for start in range(0, len(text), size):
+            if start and self.config.chunk_delay:
+                time.sleep(self.config.chunk_delay)
+            yield text[start:start + size]
+
+    def _openai_chat(self, body, text):
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = _usage(body, text)
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop", "logprobs": None}],
+                "usage": usage,
+            })
+            return
+        self.config.count("streams")
+        self._start_sse()
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        self._sse({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                        "finish_reason": None}]})
+        for chunk in self._chunks(text):
+            self._sse({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+        self._sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._sse({**base, "choices": [], "usage": usage})
+        self._sse_raw("[DONE]")
+        self._end_chunked()
+
+    def _openai_responses(self, body, text):
+        model = body.get("model", "fake-model")
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        item_id = f"msg_{uuid.uuid4().hex[:12]}"
+        usage = _usage(body, text)
+        response = {
+            "id": response_id, "object": "response", "created_at": int(time.time()), "model": model,
+            "status": "completed", "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+            "output": [{"type": "message", "id": item_id, "role": "assistant", "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+            "usage": {"input_tokens": usage["prompt_tokens"], "output_tokens": usage["completion_tokens"],
+                      "total_tokens": usage["total_tokens"],
+                      "input_tokens_details": {"cached_tokens": 0},
+                      "output_tokens_details": {"reasoning_tokens": 0}},
+        }
+        if not body.get("stream"):
+            self._send_json(200, response)
+            return
+        self.config.count("streams")
+        self._start_sse()
+        sequence = 0
+        self._sse({"type": "response.created", "sequence_number": sequence,
+                   "response": {**response, "status": "in_progress", "output": []}}, event="response.created")
+        for chunk in self._chunks(text):
+            sequence += 1
+            self._sse({"type": "response.output_text.delta", "sequence_number": sequence, "item_id": item_id,
+                       "output_index": 0, "content_index": 0, "delta": chunk, "logprobs": []},
+                      event="response.output_text.delta")
+        sequence += 1
+        self._sse({"type": "response.completed", "sequence_number": sequence, "response": response},
+                  event="response.completed")
+        self._end_chunked()
+
+    def _gemini(self, path, text):
+        usage = _usage({}, text)
+
+        def payload(part_text, finished):
+            candidate = {"content": {"parts": [{"text": part_text}], "role": "model"}, "index": 0}
+            if finished:
+                candidate["finishReason"] = "STOP"
+            return {"candidates": [candidate],
+                    "usageMetadata": {"promptTokenCount": usage["prompt_tokens"],
+                                      "candidatesTokenCount": usage["completion_tokens"],
+                                      "totalTokenCount": usage["total_tokens"]}}
+
+        if ":streamGenerateContent" not in path:
+            self._send_json(200, payload(text, True))
+            return
+        self.config.count("streams")
+        chunks = list(self._chunks(text)) or [""]
+        if "alt=sse" in self.path:
+            self._start_sse()
+            for i, chunk in enumerate(chunks):
+                self._sse(payload(chunk, i == len(chunks) - 1))
+        else:
+            # The REST transport reads one JSON array, element by element
+            self._start_chunked("application/json")
+            for i, chunk in enumerate(chunks):
+                self._write_chunk(("[" if i == 0 else ",\r\n") + json.dumps(payload(chunk, i == len(chunks) - 1)))
+            self._write_chunk("]")
+        self._end_chunked()
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_sse(self):
+        self._start_chunked("text/event-stream")
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _sse(self, data, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        self._write_chunk(f"{prefix}data: {json.dumps(data)}\n\n")
+
+    def _sse_raw(self, data):
+        self._write_chunk(f"data: {data}\n\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _usage(body, text):
+    """Rough token usage (4 characters per token) in OpenAI's format."""
+    prompt_chars = len(json.dumps(body.get("messages") or body.get("input") or ""))
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = max(1, len(text) // 4)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def start_server(config=None, host="127.0.0.1", port=0):
+    """
+    Start the fake server on a background thread.
+
+    Args:
+        config (FakeLLMConfig): Server behaviour; defaults to instant, error-free answers
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free one
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is
+            f"http://{host}:{server.server_port}". Call shutdown() to stop it.
+    """
+    handler = type("ConfiguredFakeLLMHandler", (FakeLLMHandler,), {"config": config or FakeLLMConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenAI/Groq/Gemini server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="time to first byte, e.g. fixed:0.5")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--chunk-chars", type=int, default=40, help="characters per streamed chunk")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of HTTP 500 answers")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of HTTP 429 answers")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of unparseable answers")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that hang")
+    parser.add_argument("--slow-seconds", type=float, default=30.0, help="how long a hanging request takes")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = FakeLLMConfig(args.latency, args.chunk_delay, args.chunk_chars, args.error_rate, args.rate_429,
+                           args.malformed_rate, args.slow_rate, args.slow_seconds, args.seed)
+    server = start_server(config, args.host, args.port)
+    base = f"http://{args.host}:{server.server_port}"
+    print(f"🤖 Fake LLM server listening on {base}")
+    print(f"   OPENAI_BASE_URL={base}/v1")
+    print(f"   GROQ_BASE_URL={base}/openai/v1")
+    print(f"   GEMINI_BASE_URL={base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Latency histogram for Student AI Travel Planner
+This module records latencies in fixed log-spaced buckets so percentiles need constant memory.
+"""
+
+import math
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations.
+
+    Values are counted in buckets whose width grows geometrically, so every
+    recorded value is known to within `precision` (relative error) whatever
+    its magnitude, and memory does not grow with the number of samples.
+    Values below `lowest` share the first bucket; values above `highest`
+    share the last.
+    """
+
+    def __init__(self, lowest=1e-4, highest=3600.0, precision=0.01):
+        """
+        Args:
+            lowest (float): Smallest value resolved, in seconds
+            highest (float): Largest value resolved, in seconds
+            precision (float): Relative bucket width, e.g. 0.01 for 1%
+        """
+        self.lowest = lowest
+        self.highest = highest
+        self._log_base = math.log1p(precision)
+        self._counts = [0] * (self._bucket(highest) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value, count=1):
+        """
+        Add a value.
+
+        Args:
+            value (float): Duration in seconds
+            count (int): How many times it was observed
+        """
+        self._counts[self._bucket(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add every sample of another histogram with the same settings."""
+        if len(other._counts) != len(self._counts) or other.lowest != self.lowest:
+            raise ValueError("Histograms must use the same settings to be merged")
+        for bucket, count in enumerate(other._counts):
+            self._counts[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile):
+        """
+        Return the value at a percentile.
+
+        Args:
+            percentile (float): 0-100
+
+        Returns:
+            float: Seconds (the upper edge of the bucket, capped at the observed
+                maximum), or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100.0 * self.count))
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_edge(bucket), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles=(50, 90, 95, 99, 99.9)):
+        """
+        Return count, mean, min, max and the requested percentiles.
+
+        Returns:
+            dict: Statistics in seconds; percentile keys look like "p99"
+        """
+        result = {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max}
+        for p in percentiles:
+            result[f"p{p:g}"] = self.percentile(p)
+        return result
+
+    def buckets(self):
+        """
+        Yield (upper edge in seconds, count) for every non-empty bucket.
+        """
+        for bucket, count in enumerate(self._counts):
+            if count:
+                yield self._upper_edge(bucket), count
+
+    def _bucket(self, value):
+        if value <= self.lowest:
+            return 0
+        value = min(value, self.highest)
+        return int(math.ceil(math.log(value / self.lowest) / self._log_base))
+
+    def _upper_edge(self, bucket):
+        return self.lowest * math.exp(bucket * self._log_base)
@@ -0,0 +1,62 @@
+"""
+Itinerary JSON schema for Student AI Travel Planner
+This module defines the response schema once and adapts it to each provider's structured-output API.
+"""
+
+# One day of an itinerary, as validate_itinerary() expects it
+DAY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "day": {"type": "integer"},
+        "activities": {"type": "array", "items": {"type": "string"}},
+        "cost": {"type": "number"},
+        "transport": {"type": "string"},
+        "notes": {"type": "string"},
+    },
+    "required": ["day", "activities", "cost", "transport", "notes"],
+    "additionalProperties": False,
+}
+
+# A whole response: the days and a trip summary
+ITINERARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "itinerary": {"type": "array", "items": DAY_SCHEMA},
+        "summary": {"type": "string"},
+    },
+    "required": ["itinerary", "summary"],
+    "additionalProperties": False,
+}
+
+# JSON Schema keywords Gemini's response_schema rejects
+_GEMINI_UNSUPPORTED = ("additionalProperties",)
+
+
+def schema_name(schema):
+    """
+    Name a schema for APIs that require one (OpenAI and Groq json_schema formats).
+
+    Returns:
+        str: "day" for DAY_SCHEMA, otherwise "itinerary"
+    """
+    return "day" if schema is DAY_SCHEMA else "itinerary"
+
+
+def gemini_schema(schema):
+    """
+    Copy a schema without the keywords Gemini does not accept.
+
+    Gemini only takes an OpenAPI subset of JSON Schema; strict OpenAI
+    schemas need additionalProperties, so it is removed here instead.
+
+    Args:
+        schema (dict): JSON Schema
+
+    Returns:
+        dict: The schema for Gemini's response_schema
+    """
+    if isinstance(schema, dict):
+        return {key: gemini_schema(value) for key, value in schema.items() if key not in _GEMINI_UNSUPPORTED}
+    if isinstance(schema, list):
+        return [gemini_schema(value) for value in schema]
+    return schema
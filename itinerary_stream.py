@@ -0,0 +1,195 @@
+"""
+Incremental itinerary parser for Student AI Travel Planner
+This module reads a streamed AI response and emits each day of the itinerary as soon as it is complete.
+"""
+
+import json
+import re
+
+import compact_format
+
+# Characters that change parser state outside of strings
+_STRUCTURE = re.compile(r'[{}\[\]",:]')
+# Characters that end or escape inside a string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class ItineraryStreamParser:
+    """
+    Incrementally parse an AI response shaped like {"itinerary": [...], "summary": "..."}.
+
+    Feed text chunks as they arrive; each call returns the events completed by
+    that chunk:
+        ("day", dict)     - one finished object from the "itinerary" array
+        ("summary", str)  - the top-level "summary" string
+
+    Compact responses ({"d": [[...], ...], "s": "..."}, see compact_format)
+    produce the same events, with each day expanded to a dict.
+
+    Text before the first "{" (prose, markdown fences) is skipped, and text
+    that is no longer needed is dropped, so memory stays bounded by the
+    largest single day rather than the whole response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._string_start = None
+        self._expect_key = False
+        self._last_key = None
+        self._in_itinerary = False
+        self._compact = False
+        self._day_start = None
+        self._days_closed = 0
+        self._summary_start = None
+        self.days_emitted = 0
+        self.summary_emitted = False
+
+    def feed(self, chunk):
+        """
+        Consume the next chunk of the response.
+
+        Args:
+            chunk (str): Next piece of streamed text
+
+        Returns:
+            list: (kind, value) events completed by this chunk
+        """
+        self._buffer += chunk
+        events = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # Escaped character has not arrived yet
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                self._end_string(buffer, pos, events)
+                continue
+
+            if not self._stack:
+                # Outside the root object only an opening brace matters
+                start = buffer.find("{", pos)
+                if start == -1:
+                    pos = len(buffer)
+                    break
+                pos = start
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            index = match.start()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                self._open(char, index)
+            elif char in "}]":
+                self._close(buffer, index, events)
+            elif char == ":":
+                self._expect_key = False
+            elif char == "," and len(self._stack) == 1:
+                self._expect_key = True
+
+        self._pos = pos
+        self._trim()
+        return events
+
+    def _open(self, char, index):
+        depth = len(self._stack)
+        if depth == 1 and char == "[" and self._last_key in ("itinerary", compact_format.DAYS_KEY):
+            self._in_itinerary = True
+            self._compact = self._last_key == compact_format.DAYS_KEY
+            self._days_closed = 0
+        elif depth == 2 and self._in_itinerary and char == ("[" if self._compact else "{"):
+            self._day_start = index
+        self._stack.append(char)
+        if depth == 0:
+            self._expect_key = True
+
+    def _close(self, buffer, index, events):
+        if not self._stack:
+            return
+        self._stack.pop()
+        depth = len(self._stack)
+        if depth == 2 and self._day_start is not None:
+            # Compact days have no number of their own; use their position in
+            # the array, counting days that fail to parse
+            self._days_closed += 1
+            try:
+                day = json.loads(buffer[self._day_start:index + 1])
+                if self._compact:
+                    day = compact_format.expand_day(day, self._days_closed)
+            except ValueError:
+                day = None
+            if isinstance(day, dict):
+                self.days_emitted += 1
+                events.append(("day", day))
+            self._day_start = None
+        elif depth == 1 and self._in_itinerary:
+            self._in_itinerary = False
+        elif depth == 0:
+            # Root object finished; start over if another one follows
+            self._last_key = None
+            self._expect_key = False
+
+    def _end_string(self, buffer, end, events):
+        start = self._string_start
+        self._string_start = None
+        if len(self._stack) != 1:
+            return
+        if self._expect_key:
+            self._last_key = buffer[start + 1:end - 1]
+        elif self._last_key in ("summary", compact_format.SUMMARY_KEY) and not self.summary_emitted:
+            try:
+                summary = json.loads(buffer[start:end])
+            except ValueError:
+                return
+            self.summary_emitted = True
+            events.append(("summary", summary))
+
+    def _trim(self):
+        """Drop text that no pending day or string can still need."""
+        keep = self._pos
+        for start in (self._day_start, self._string_start):
+            if start is not None and start < keep:
+                keep = start
+        if keep == 0:
+            return
+        self._buffer = self._buffer[keep:]
+        self._pos -= keep
+        if self._day_start is not None:
+            self._day_start -= keep
+        if self._string_start is not None:
+            self._string_start -= keep
+
+
+def iter_itinerary_events(chunks):
+    """
+    Parse an iterable of text chunks, yielding events as they complete.
+
+    Args:
+        chunks (iterable): Streamed pieces of the AI response
+
+    Yields:
+        tuple: ("day", dict) or ("summary", str)
+    """
+    parser = ItineraryStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
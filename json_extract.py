@@ -0,0 +1,151 @@
+"""
+JSON extraction helpers for Student AI Travel Planner
+This module finds the itinerary JSON object inside chatty AI responses in a single linear scan.
+"""
+
+import json
+import re
+
+# Markdown code fence lines such as ```json or ```
+_FENCE_LINE = re.compile(r'^[ \t]*```[\w-]*[ \t]*$', re.MULTILINE)
+# An opening brace followed by a key: the only way a JSON object with keys can start
+_CANDIDATE_START = re.compile(r'\{\s*"')
+# Characters that matter inside an object, outside of strings
+_OBJECT_SPECIAL = re.compile(r'[{}"]')
+# Characters that end or escape inside a string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_DECODER = json.JSONDecoder()
+
+
+def strip_code_fences(text):
+    """
+    Remove markdown code fence lines (```json ... ```) from a response.
+
+    Args:
+        text (str): Raw AI response
+
+    Returns:
+        str: The response without fence lines
+    """
+    if "```" not in text:
+        return text
+    return _FENCE_LINE.sub("", text)
+
+
+def extract_json_object(text, required_keys=("itinerary", "summary")):
+    """
+    Find the first JSON object in text that contains all required keys.
+
+    Candidate objects are found in a single forward scan. A candidate is tried
+    with the C JSON decoder first; if it is not valid JSON, the scan falls back
+    to brace balancing that understands strings and escapes, so braces inside
+    prose or string values do not confuse it, and the objects directly inside
+    the candidate are tried instead. The scan never restarts behind its current
+    position, so the cost stays linear even for multi-megabyte responses full
+    of stray braces.
+
+    Args:
+        text (str): Raw AI response
+        required_keys (tuple): Keys the object must contain
+
+    Returns:
+        dict: The first matching object, or None if there is none
+    """
+    text = strip_code_fences(text)
+    if any(f'"{key}"' not in text for key in required_keys):
+        return None
+    pos = 0
+
+    while True:
+        # Only "{" followed by a key can open an object worth parsing
+        match = _CANDIDATE_START.search(text, pos)
+        if match is None:
+            return None
+        start = match.start()
+
+        try:
+            data, pos = _DECODER.raw_decode(text, start)
+        except (ValueError, RecursionError):
+            pos, inner_spans = _scan_object(text, start)
+            found = _first_match(text, inner_spans, required_keys)
+            if found is not None:
+                return found
+            continue
+
+        found = _matching_dict(data, required_keys)
+        if found is not None:
+            return found
+
+
+def _scan_object(text, start):
+    """
+    Balance braces from the "{" at start without parsing the JSON.
+
+    Returns:
+        tuple: (position after the closing brace or end of text,
+                list of (begin, end) spans of the objects directly inside)
+    """
+    length = len(text)
+    pos = start + 1
+    depth = 1
+    inner_start = None
+    inner_spans = []
+
+    while pos < length:
+        match = _OBJECT_SPECIAL.search(text, pos)
+        if match is None:
+            return length, inner_spans
+        char = match.group()
+        pos = match.end()
+
+        if char == '"':
+            pos = _skip_string(text, pos)
+        elif char == "{":
+            if depth == 1:
+                inner_start = match.start()
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1 and inner_start is not None:
+                inner_spans.append((inner_start, pos))
+                inner_start = None
+            elif depth == 0:
+                break
+    return pos, inner_spans
+
+
+def _skip_string(text, pos):
+    """Return the position just past the string whose opening quote ends at pos."""
+    while True:
+        match = _STRING_SPECIAL.search(text, pos)
+        if match is None:
+            return len(text)
+        if match.group() == '"':
+            return match.end()
+        pos = match.end() + 1
+
+
+def _first_match(text, spans, required_keys):
+    """Parse candidate spans in order and return the first object with the keys."""
+    for begin, end in spans:
+        try:
+            data = json.loads(text[begin:end])
+        except (ValueError, RecursionError):
+            continue
+        found = _matching_dict(data, required_keys)
+        if found is not None:
+            return found
+    return None
+
+
+def _matching_dict(data, required_keys):
+    """Return data, or the first dict directly inside it, that has all required keys."""
+    if not isinstance(data, dict):
+        return None
+    if all(key in data for key in required_keys):
+        return data
+    for value in data.values():
+        if isinstance(value, dict) and all(key in value for key in required_keys):
+            return value
+    return None
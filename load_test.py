@@ -0,0 +1,415 @@
+"""
+Load testing for Student AI Travel Planner
+Drives plan_trip from threads or asyncio at a target arrival rate and reports throughput,
+latency percentiles and, with --sweep, a saturation curve. By default the provider is the
+in-process fake LLM server, so the numbers describe this process rather than a real API.
+
+Usage:
+    python load_test.py --requests 200 --concurrency 16 --rate 20 --latency lognormal:0.8,0.4
+    python load_test.py --mode async --concurrency 64 --rate 50
+    python load_test.py --sweep 5,10,20,40,80 --requests 150 --concurrency 32
+    python load_test.py --external      # use the configured provider (e.g. a separate fake server)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import ai_client
+import config
+import metrics
+import planner
+from fake_llm_server import FakeLLMConfig, start_server
+from histogram import LatencyHistogram
+
+DEFAULT_DESTINATIONS = ("Paris", "Tokyo", "Lisbon", "Mexico City", "Bangkok", "Berlin", "Cape Town", "Lima")
+DEFAULT_CURRENCIES = ("USD", "EUR", "JPY", "GBP", "INR")
+INTERESTS = ("history", "food", "nature", "art", "nightlife", "shopping", "museums")
+# Percentiles of the HDR-style report: halving the remaining tail at each step,
+# plus the usual 90, 95, 99 and 99.9
+REPORT_PERCENTILES = (50, 75, 87.5, 90, 93.75, 95, 96.875, 98.4375, 99, 99.21875, 99.9, 100)
+# A sweep step is saturated when it achieves less than this share of its offered rate
+SATURATION_RATIO = 0.9
+
+
+class RequestMix:
+    """
+    Random trip requests drawn from destinations, durations and currencies.
+
+    A seeded mix yields the same sequence of trips on every run.
+    """
+
+    def __init__(self, destinations=DEFAULT_DESTINATIONS, durations=(1, 30), currencies=DEFAULT_CURRENCIES,
+                 seed=None):
+        """
+        Args:
+            destinations (list): Destination names to choose from
+            durations (tuple): (shortest, longest) trip length in days, inclusive
+            currencies (list): Currency codes to choose from
+            seed (int): Random seed
+        """
+        self.destinations = list(destinations)
+        self.durations = durations
+        self.currencies = list(currencies)
+        self._rng = random.Random(seed)
+
+    def trip(self):
+        """
+        Return the next trip request.
+
+        Returns:
+            dict: plan_trip() keyword arguments
+        """
+        rng = self._rng
+        days = rng.randint(*self.durations)
+        return {
+            "destination": rng.choice(self.destinations),
+            "duration": days,
+            "budget": days * rng.choice((40, 60, 90, 150)),
+            "interests": rng.sample(INTERESTS, rng.randint(1, 3)),
+            "transport": rng.choice(("metro", "bus", "walking", "train")),
+            "stay": rng.choice(("hostel", "budget hotel", "airbnb")),
+            "currency": rng.choice(self.currencies),
+        }
+
+    def trips(self, count):
+        return [self.trip() for _ in range(count)]
+
+
+class LoadReport:
+    """Outcome of one load run: latencies from scheduled arrival to completion, and outcome counts."""
+
+    def __init__(self, mode, requests, concurrency, offered_rate):
+        self.mode = mode
+        self.requests = requests
+        self.concurrency = concurrency
+        self.offered_rate = offered_rate
+        self.latency = LatencyHistogram()
+        self.outcomes = Counter()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, outcome):
+        with self._lock:
+            self.latency.record(seconds)
+            self.outcomes[outcome] += 1
+
+    @property
+    def completed(self):
+        return sum(self.outcomes.values())
+
+    @property
+    def throughput(self):
+        """Completed requests per second over the whole run."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "offered_rate": self.offered_rate,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 3),
+            "outcomes": dict(self.outcomes),
+            "latency": self.latency.summary(percentiles=(50, 90, 95, 99, 99.9)),
+        }
+
+
+def classify(itinerary, summary):
+    """
+    Sort a plan_trip() result into an outcome.
+
+    Returns:
+        str: "ok", "fallback-parse" (the response could not be parsed) or "error"
+    """
+    return planner._plan_outcome((itinerary, summary))
+
+
+def arrival_offsets(count, rate, arrival="poisson", rng=None):
+    """
+    Seconds after the start at which each request arrives.
+
+    Args:
+        count (int): Number of requests
+        rate (float): Requests per second
+        arrival (str): "poisson" (exponential gaps) or "uniform" (fixed gaps)
+
+    Returns:
+        list: Non-decreasing offsets in seconds
+    """
+    rng = rng or random.Random()
+    offsets, now = [], 0.0
+    for _ in range(count):
+        offsets.append(now)
+        now += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    return offsets
+
+
+def run_load(mix, requests=100, concurrency=8, rate=None, mode="sync", arrival="poisson", options=None,
+             seed=None):
+    """
+    Plan `requests` trips and measure how long each takes.
+
+    With a rate the test is open-loop: requests arrive on schedule whether or
+    not earlier ones have finished, and latency is measured from the scheduled
+    arrival, so time spent waiting for a free worker counts (no coordinated
+    omission). Without a rate, `concurrency` workers send requests back to back.
+
+    Args:
+        mix (RequestMix): Where trips come from
+        requests (int): Trips to plan
+        concurrency (int): Worker threads (sync) or in-flight trips (async)
+        rate (float): Arrival rate in requests per second; None for closed-loop
+        mode (str): "sync" (plan_trip on threads) or "async" (plan_trip_async)
+        arrival (str): "poisson" or "uniform" arrivals
+        options (dict): Extra plan_trip() keyword arguments; use_cache defaults to False
+
+    Returns:
+        LoadReport: Latencies and outcomes
+    """
+    options = {"use_cache": False, **(options or {})}
+    trips = mix.trips(requests)
+    offsets = arrival_offsets(requests, rate, arrival, random.Random(seed)) if rate else None
+    report = LoadReport(mode, requests, concurrency, rate)
+    if mode == "async":
+        asyncio.run(_run_async(trips, offsets, concurrency, options, report))
+    elif mode == "sync":
+        _run_sync(trips, offsets, concurrency, options, report)
+    else:
+        raise ValueError(f"Unknown load test mode '{mode}'. Use 'sync' or 'async'.")
+    return report
+
+
+def _run_sync(trips, offsets, concurrency, options, report):
+    def one(trip, scheduled):
+        scheduled = scheduled or time.perf_counter()
+        try:
+            outcome = classify(*planner.plan_trip(**trip, **options))
+        except Exception:
+            outcome = "error"
+        report.record(time.perf_counter() - scheduled, outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-test") as pool:
+        for index, trip in enumerate(trips):
+            scheduled = None
+            if offsets is not None:
+                scheduled = started + offsets[index]
+                _sleep_until(scheduled)
+            pool.submit(one, trip, scheduled)
+    report.elapsed = time.perf_counter() - started
+
+
+async def _run_async(trips, offsets, concurrency, options, report):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(trip, scheduled):
+        async with slots:
+            scheduled = scheduled or time.perf_counter()
+            try:
+                outcome = classify(*await planner.plan_trip_async(**trip, **options))
+            except Exception:
+                outcome = "error"
+        report.record(time.perf_counter() - scheduled, outcome)
+
+    started = time.perf_counter()
+    tasks = []
+    for index, trip in enumerate(trips):
+        scheduled = None
+        if offsets is not None:
+            scheduled = started + offsets[index]
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(one(trip, scheduled)))
+    await asyncio.gather(*tasks)
+    report.elapsed = time.perf_counter() - started
+
+
+def _sleep_until(moment):
+    delay = moment - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def saturation_curve(mix_factory, rates, requests=100, concurrency=8, mode="sync", arrival="poisson",
+                     options=None, seed=None):
+    """
+    Run one load test per arrival rate, from light to heavy load.
+
+    Args:
+        mix_factory (callable): Returns a fresh RequestMix for each step
+        rates (list): Offered arrival rates in requests per second
+        Other arguments are passed to run_load().
+
+    Returns:
+        list: One LoadReport per rate
+    """
+    return [run_load(mix_factory(), requests, concurrency, rate, mode, arrival, options, seed)
+            for rate in rates]
+
+
+@contextlib.contextmanager
+def fake_provider(**fake_config):
+    """
+    Route planning through an in-process fake LLM server for the duration of a with block.
+
+    The OpenAI client talks HTTP to the fake server, so the whole client path
+    (pooled connections, retries, rate limiters) is exercised.
+
+    Args:
+        **fake_config: FakeLLMConfig arguments (latency, error_rate, rate_429, ...)
+    """
+    server = start_server(FakeLLMConfig(**fake_config))
+    overrides = {
+        "AI_PROVIDER": "openai",
+        "AI_ROUTING": "single",
+        "OPENAI_API_KEY": "load-test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+    }
+    saved = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    ai_client.close_clients()
+    try:
+        yield server
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+        ai_client.close_clients()
+        server.shutdown()
+        server.server_close()
+
+
+def format_report(report):
+    """
+    Format one load run with an HDR-style percentile distribution.
+
+    Returns:
+        str: A multi-line report
+    """
+    latency = report.latency
+    offered = f"{report.offered_rate:g}/s" if report.offered_rate else "closed-loop"
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(report.outcomes.items()))
+    lines = [
+        f"📈 {report.mode} load test: {report.requests} trips, concurrency {report.concurrency}, arrivals {offered}",
+        f"   Time: {report.elapsed:.1f} s, throughput {report.throughput:.2f} trips/s ({outcomes})",
+        f"   {'Value (ms)':>12}  {'Percentile':>10}  {'TotalCount':>10}  {'1/(1-Percentile)':>16}",
+    ]
+    for p in REPORT_PERCENTILES:
+        value = latency.percentile(p)
+        if value is None:
+            break
+        count = min(latency.count, max(1, int(round(p / 100.0 * latency.count))))
+        inverse = "inf" if p >= 100 else f"{1 / (1 - p / 100.0):.2f}"
+        lines.append(f"   {value * 1000:>12.1f}  {p / 100.0:>10.6f}  {count:>10}  {inverse:>16}")
+    if latency.count:
+        lines.append(f"   #[Mean = {latency.mean * 1000:.1f} ms, Max = {latency.max * 1000:.1f} ms, "
+                     f"Total count = {latency.count}]")
+    return "\n".join(lines)
+
+
+def format_curve(reports):
+    """
+    Format a saturation curve as a table, marking steps that could not keep up.
+
+    Returns:
+        str: The table
+    """
+    lines = [f"{'offered/s':>10}{'achieved/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}",
+             "-" * 62]
+    for report in reports:
+        summary = report.latency.summary(percentiles=(50, 95, 99))
+        failed = report.outcomes["error"] + report.outcomes["fallback-parse"]
+        saturated = report.offered_rate and report.throughput < SATURATION_RATIO * report.offered_rate
+        lines.append(
+            f"{report.offered_rate or 0:>10g}{report.throughput:>12.2f}"
+            f"{_ms(summary['p50']):>10}{_ms(summary['p95']):>10}{_ms(summary['p99']):>10}{failed:>8}"
+            + ("  ⚠️ saturated" if saturated else "")
+        )
+    return "\n".join(lines)
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def _parse_durations(text):
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def _split(text):
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Returns:
+        int: Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Load test plan_trip")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync", help="threads or asyncio")
+    parser.add_argument("--requests", type=int, default=100, help="trips per run (per sweep step)")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads or in-flight trips")
+    parser.add_argument("--rate", type=float, default=None, help="arrivals per second; omit for closed-loop")
+    parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--sweep", default=None, help="comma-separated arrival rates for a saturation curve")
+    parser.add_argument("--destinations", default=",".join(DEFAULT_DESTINATIONS))
+    parser.add_argument("--durations", default="1-30", help="trip length range in days, e.g. 1-30")
+    parser.add_argument("--currencies", default=",".join(DEFAULT_CURRENCIES))
+    parser.add_argument("--deadline", type=float, default=None, help="seconds allowed per trip")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve per-stage Prometheus metrics on this port while the test runs")
+    parser.add_argument("--external", action="store_true",
+                        help="use the configured provider instead of an in-process fake server")
+    fake = parser.add_argument_group("fake provider")
+    fake.add_argument("--latency", default="lognormal:0.8,0.4", help="fake server time to first byte")
+    fake.add_argument("--error-rate", type=float, default=0.0)
+    fake.add_argument("--rate-429", type=float, default=0.0)
+    fake.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    def mix():
+        return RequestMix(_split(args.destinations), _parse_durations(args.durations), _split(args.currencies),
+                          seed=args.seed)
+
+    options = {} if args.deadline is None else {"deadline": args.deadline}
+    if args.metrics_port is not None:
+        server = metrics.start_metrics_server(port=args.metrics_port)
+        print(f"📡 Metrics at http://{server.server_address[0]}:{server.server_port}/metrics")
+    provider = contextlib.nullcontext() if args.external else fake_provider(
+        latency=args.latency, error_rate=args.error_rate, rate_429=args.rate_429,
+        malformed_rate=args.malformed_rate, seed=args.seed)
+
+    with provider:
+        if args.sweep:
+            rates = [float(rate) for rate in _split(args.sweep)]
+            reports = saturation_curve(mix, rates, args.requests, args.concurrency, args.mode, args.arrival,
+                                       options, args.seed)
+            for report in reports:
+                print(format_report(report))
+            print(format_curve(reports))
+        else:
+            reports = [run_load(mix(), args.requests, args.concurrency, args.rate, args.mode, args.arrival,
+                                options, args.seed)]
+            print(format_report(reports[0]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([report.to_dict() for report in reports], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Per-stage latency metrics for Student AI Travel Planner
+This module times planner stages into histograms and serves them in Prometheus text format.
+
+Metrics are off unless AI_METRICS=true (or enable() is called). While off,
+an instrumented function costs one flag check on top of the call itself.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT
+
+# Provider label used when no provider answered inside a stage or around it
+UNKNOWN_PROVIDER = "unknown"
+
+# Upper bounds (seconds) of the duration buckets, from in-process stages to slow provider calls
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+# (stage, provider, outcome) -> [bucket counts..., +Inf count, sum of seconds]
+_series = {}
+_server = None
+# Providers that answered inside each running timed stage (innermost last)
+_answered = contextvars.ContextVar("metrics_answered", default=())
+
+
+def enable(enabled=True):
+    """Turn metric collection on or off for this process."""
+    global _enabled
+    _enabled = enabled
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    """Forget every recorded observation."""
+    with _lock:
+        _series.clear()
+
+
+def observe(stage, seconds, outcome="ok", provider=None):
+    """
+    Record one timed stage.
+
+    Args:
+        stage (str): Stage name, e.g. "plan_trip" or "parse"
+        seconds (float): How long it took
+        outcome (str): "ok", "fallback-parse" or "error"
+        provider (str): Provider that answered; "unknown" if not given
+    """
+    if not _enabled:
+        return
+    key = (stage, provider or UNKNOWN_PROVIDER, outcome)
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = [0] * (len(DURATION_BUCKETS) + 2)
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(DURATION_BUCKETS)] += 1
+        series[-1] += seconds
+
+
+def record_provider(provider):
+    """
+    Note the provider that answered a call, for the provider label of every
+    running timed stage. ai_client calls this once per answered request, so
+    with failover or hedging the label is the provider that really answered.
+
+    Args:
+        provider (str): Provider name
+    """
+    for answered in _answered.get():
+        answered.append(provider)
+
+
+def _start_stage():
+    answered = []
+    return answered, _answered.set(_answered.get() + (answered,))
+
+
+def _finish_stage(stage, started, outcome, scope):
+    """
+    Observe a stage labelled with the last provider that answered inside it,
+    or, for stages without a provider call (e.g. parse), around it.
+    """
+    answered, token = scope
+    provider = None
+    for providers in reversed(_answered.get()):
+        if providers:
+            provider = providers[-1]
+            break
+    try:
+        _answered.reset(token)
+    except ValueError:
+        # Finished in another context than it started (e.g. a resumed generator)
+        pass
+    observe(stage, time.perf_counter() - started, outcome, provider)
+
+
+def timed(stage, outcome=None):
+    """
+    Decorate a function (sync or async) so each call is timed as a stage.
+
+    Args:
+        stage (str): Stage name
+        outcome (callable): Maps the return value to an outcome label; calls
+            that return are "ok" without it, calls that raise are always "error"
+
+    Returns:
+        callable: The decorator
+    """
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                started, scope = time.perf_counter(), _start_stage()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    _finish_stage(stage, started, "error", scope)
+                    raise
+                _finish_stage(stage, started, outcome(result) if outcome else "ok", scope)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started, scope = time.perf_counter(), _start_stage()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                _finish_stage(stage, started, "error", scope)
+                raise
+            _finish_stage(stage, started, outcome(result) if outcome else "ok", scope)
+            return result
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """
+    Return the recorded observations.
+
+    Returns:
+        dict: (stage, provider, outcome) -> {"count", "sum", "buckets"}, where
+            buckets maps each upper bound to its cumulative count
+    """
+    with _lock:
+        items = [(key, list(series)) for key, series in _series.items()]
+    result = {}
+    for key, series in items:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(DURATION_BUCKETS, series):
+            cumulative += count
+            buckets[bound] = cumulative
+        result[key] = {"count": cumulative + series[len(DURATION_BUCKETS)], "sum": series[-1],
+                       "buckets": buckets}
+    return result
+
+
+def render():
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The /metrics response body
+    """
+    lines = [
+        "# HELP travel_planner_stage_duration_seconds Time spent in each planner stage.",
+        "# TYPE travel_planner_stage_duration_seconds histogram",
+    ]
+    data = sorted(snapshot().items())
+    for (stage, provider, outcome), series in data:
+        labels = f'stage="{_escape(stage)}",provider="{_escape(provider)}",outcome="{_escape(outcome)}"'
+        for bound, count in series["buckets"].items():
+            lines.append(f'travel_planner_stage_duration_seconds_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'travel_planner_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+        lines.append(f"travel_planner_stage_duration_seconds_sum{{{labels}}} {series['sum']:.6f}")
+        lines.append(f"travel_planner_stage_duration_seconds_count{{{labels}}} {series['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host=None, port=None):
+    """
+    Serve GET /metrics on a background thread and turn collection on.
+
+    Calling it again returns the running server, so it is safe from code
+    that reruns (such as a Streamlit script).
+
+    Args:
+        host (str): Interface to listen on; defaults to METRICS_HOST (127.0.0.1)
+        port (int): Port; defaults to METRICS_PORT, 0 picks a free one
+
+    Returns:
+        ThreadingHTTPServer: The server; its port is server.server_port
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or METRICS_HOST, METRICS_PORT if port is None else port),
+                                          _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    enable()
+    return _server
+
+
+def stop_metrics_server():
+    """Stop the /metrics server if it is running."""
+    global _server
+    with _lock:
+        server, _server = _server, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,262 @@
+"""
+Request normalization for Student AI Travel Planner
+This module turns trip requests that mean the same thing into one canonical form and key.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+from cache import make_cache_key
+from config import REQUEST_BUDGET_TOLERANCE
+from currency import get_currency_meta
+
+# A trip request after normalization; interests is a sorted tuple
+TripRequest = namedtuple(
+    "TripRequest",
+    ["destination", "duration", "budget", "interests", "transport", "stay", "currency"],
+)
+
+# Common alternative names -> canonical destination (all casefolded)
+DESTINATION_ALIASES = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "ny": "new york",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "san fran": "san francisco",
+    "dc": "washington",
+    "washington dc": "washington",
+    "washington d.c": "washington",
+    "roma": "rome",
+    "firenze": "florence",
+    "venezia": "venice",
+    "milano": "milan",
+    "napoli": "naples",
+    "münchen": "munich",
+    "muenchen": "munich",
+    "köln": "cologne",
+    "wien": "vienna",
+    "praha": "prague",
+    "lisboa": "lisbon",
+    "bruxelles": "brussels",
+    "kiev": "kyiv",
+    "bombay": "mumbai",
+    "peking": "beijing",
+    "saigon": "ho chi minh city",
+    "hcmc": "ho chi minh city",
+    "cdmx": "mexico city",
+    "ciudad de mexico": "mexico city",
+    "rio": "rio de janeiro",
+    "bkk": "bangkok",
+}
+
+# Country and region suffixes -> one spelling (casefolded). Suffixes are kept
+# in the key, since "London, Canada" and "London, UK" are different cities.
+LOCATION_SUFFIXES = {
+    "uk": "united kingdom",
+    "u.k": "united kingdom",
+    "gb": "united kingdom",
+    "great britain": "united kingdom",
+    "usa": "united states",
+    "us": "united states",
+    "u.s": "united states",
+    "u.s.a": "united states",
+    "united states of america": "united states",
+    "czechia": "czech republic",
+    "korea": "south korea",
+    "uae": "united arab emirates",
+    "holland": "netherlands",
+    "the netherlands": "netherlands",
+}
+
+# Transport synonyms -> the options offered in app.py
+TRANSPORT_SYNONYMS = {
+    "metro": "metro/subway",
+    "subway": "metro/subway",
+    "underground": "metro/subway",
+    "tube": "metro/subway",
+    "u-bahn": "metro/subway",
+    "public transport": "mixed",
+    "public transit": "mixed",
+    "bus": "bus",
+    "buses": "bus",
+    "coach": "bus",
+    "train": "train",
+    "trains": "train",
+    "rail": "train",
+    "railway": "train",
+    "rideshare": "rideshare",
+    "ride share": "rideshare",
+    "uber": "rideshare",
+    "lyft": "rideshare",
+    "taxi": "rideshare",
+    "cab": "rideshare",
+    "walk": "walking",
+    "on foot": "walking",
+    "walking": "walking",
+    "mix": "mixed",
+    "any": "mixed",
+}
+
+# Accommodation synonyms -> the options offered in app.py
+STAY_SYNONYMS = {
+    "hostels": "hostel",
+    "youth hostel": "hostel",
+    "dorm": "hostel",
+    "backpackers": "hostel",
+    "home stay": "homestay",
+    "host family": "homestay",
+    "hotel": "budget hotel",
+    "cheap hotel": "budget hotel",
+    "motel": "budget hotel",
+    "guesthouse": "budget hotel",
+    "guest house": "budget hotel",
+    "air bnb": "airbnb",
+    "apartment": "airbnb",
+    "vacation rental": "airbnb",
+    "couch surfing": "couchsurfing",
+    "couch-surfing": "couchsurfing",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clean(text):
+    """Casefold, trim and collapse internal whitespace."""
+    return _WHITESPACE.sub(" ", str(text).strip().casefold())
+
+
+def normalize_destination(destination):
+    """
+    Canonicalize a destination name for request keys.
+
+    "Paris" and " paris " both become "paris", and known aliases such as
+    "NYC" map to their canonical city. Country and region suffixes are kept,
+    with one spelling each, so "London, UK" and "london, united kingdom"
+    match while "London, Canada" stays a different destination.
+
+    Args:
+        destination (str): Destination as typed by the user
+
+    Returns:
+        str: Canonical destination
+    """
+    parts = [part.strip(" .!") for part in _clean(destination).split(",")]
+    parts = [part for part in parts if part]
+    if not parts:
+        return ""
+    city = DESTINATION_ALIASES.get(parts[0], parts[0])
+    return ", ".join([city] + [LOCATION_SUFFIXES.get(part, part) for part in parts[1:]])
+
+
+def display_destination(destination):
+    """
+    Capitalize a canonical destination for prompts and display.
+
+    Args:
+        destination (str): Canonical destination from normalize_destination()
+
+    Returns:
+        str: e.g. "new york" -> "New York"
+    """
+    return " ".join(word[:1].upper() + word[1:] for word in destination.split(" "))
+
+
+def normalize_interests(interests):
+    """
+    Casefold, dedupe and sort interests.
+
+    Returns:
+        tuple: Sorted unique interests
+    """
+    return tuple(sorted({_clean(interest) for interest in interests if _clean(interest)}))
+
+
+def normalize_transport(transport):
+    """Map a transport preference to its canonical option."""
+    name = _clean(transport)
+    return TRANSPORT_SYNONYMS.get(name, name)
+
+
+def normalize_stay(stay):
+    """Map an accommodation preference to its canonical option."""
+    name = _clean(stay)
+    return STAY_SYNONYMS.get(name, name)
+
+
+def bucket_budget(budget, currency, tolerance):
+    """
+    Snap a budget to a geometric bucket so nearby budgets share one value.
+
+    Buckets are spaced by a factor of (1 + tolerance), so the bucket width
+    scales with the amount instead of being a fixed number of units. The
+    result is rounded to the currency's decimal places (0 for JPY or KRW).
+
+    Args:
+        budget (float): Budget amount
+        currency (str): Currency code
+        tolerance (float): Relative bucket width, e.g. 0.05 for 5%; 0 disables bucketing
+
+    Returns:
+        float: The bucketed budget
+    """
+    decimals = get_currency_meta(currency)["decimals"]
+    if not tolerance or tolerance <= 0 or budget <= 0:
+        return round(float(budget), decimals)
+    step = math.log1p(tolerance)
+    bucket = round(math.log(budget) / step)
+    return round(math.exp(bucket * step), decimals)
+
+
+def normalize_request(destination, duration, budget, interests, transport, stay, currency="USD",
+                      budget_tolerance=None):
+    """
+    Normalize a trip request so equivalent requests compare equal.
+
+    The result is meant for keys only; prompts should keep the text the
+    user typed, since synonyms that share a key can still differ in wording.
+
+    Args:
+        destination (str): Travel destination
+        duration (int): Number of days
+        budget (float): Budget in specified currency
+        interests (list): List of interests
+        transport (str): Preferred transport method
+        stay (str): Preferred accommodation type
+        currency (str): Currency code
+        budget_tolerance (float): Relative budget bucket width; defaults to
+            REQUEST_BUDGET_TOLERANCE from config.py (0 keeps exact budgets)
+
+    Returns:
+        TripRequest: The canonical request
+    """
+    if budget_tolerance is None:
+        budget_tolerance = REQUEST_BUDGET_TOLERANCE
+    currency = str(currency).strip().upper()
+    return TripRequest(
+        destination=normalize_destination(destination),
+        duration=int(duration),
+        budget=bucket_budget(budget, currency, budget_tolerance),
+        interests=normalize_interests(interests),
+        transport=normalize_transport(transport),
+        stay=normalize_stay(stay),
+        currency=currency,
+    )
+
+
+def request_key(request, provider=None, model=None):
+    """
+    Build the canonical key for a normalized request.
+
+    Caching and request de-duplication layers should key on this value.
+
+    Args:
+        request (TripRequest): Result of normalize_request()
+        provider (str): AI provider the result comes from
+        model (str): Model the result comes from
+
+    Returns:
+        str: Hex SHA-256 key
+    """
+    return make_cache_key(request=list(request), provider=provider, model=model)
@@ -3,11 +3,69 @@ Travel Planner Logic for Student AI Travel Planner
 This module handles the core logic for generating travel itineraries.
 """
 
+import asyncio
+import contextvars
 import json
-import re
-from ai_client import generate_itinerary
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-def plan_trip(destination, duration, budget, interests, transport, stay, currency="USD"):
+import compact_format
+import metrics
+import usage
+from ai_client import generate_itinerary, generate_itinerary_async, stream_itinerary, track_providers
+from cache import get_response_cache
+from coalesce import SingleFlight
+from config import (
+    AI_RESPONSE_FORMAT,
+    AI_STRUCTURED_OUTPUT,
+    OUTPUT_TOKENS_MARGIN,
+    OUTPUT_TOKENS_MAX,
+    OUTPUT_TOKENS_MIN,
+    PLAN_CHUNK_DAYS,
+    PLAN_CHUNK_MIN_DURATION,
+    REQUEST_DEADLINE_SECONDS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY_SECONDS,
+    get_model,
+    get_provider,
+)
+from itinerary_schema import DAY_SCHEMA, ITINERARY_SCHEMA
+from itinerary_stream import ItineraryStreamParser
+from json_extract import extract_json_object
+from normalize import display_destination, normalize_destination, normalize_request, request_key
+from ratelimit import RateLimitExceeded
+from retry import Deadline, MalformedResponseError, RetryPolicy
+from token_budget import OutputBudget
+
+# Coalesces concurrent identical requests onto one provider call
+_in_flight = SingleFlight()
+# Retries transient provider errors and unparseable responses
+_retry_policy = RetryPolicy(RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS)
+# Sizes each request's output token limit to the trip, learning from response sizes
+_output_budget = OutputBudget(OUTPUT_TOKENS_MIN, OUTPUT_TOKENS_MAX, OUTPUT_TOKENS_MARGIN)
+
+# One range of days of a long trip, generated by its own provider call
+_Chunk = namedtuple("_Chunk", ["first", "last", "prompt", "output"])
+
+def _plan_outcome(result):
+    """
+    Label a plan_trip() result for metrics.
+    
+    Returns:
+        str: "error" for error results, "fallback-parse" for the placeholder
+            itinerary used when the response could not be parsed, else "ok"
+    """
+    itinerary, summary = result
+    if isinstance(itinerary, dict) and "error" in itinerary:
+        return "error"
+    if summary == _fallback_response()[1]:
+        return "fallback-parse"
+    return "ok"
+
+@metrics.timed("plan_trip", outcome=_plan_outcome)
+def plan_trip(destination, duration, budget, interests, transport, stay, currency="USD", on_chunk=None,
+              use_cache=True, deadline=None, chunk_days=None):
     """
     Generate a personalized travel itinerary for students.
     
@@ -19,14 +77,754 @@ def plan_trip(destination, duration, budget, interests, transport, stay, currenc
         transport (str): Preferred transport method
         stay (str): Preferred accommodation type
         currency (str): Currency code (e.g., 'USD', 'EUR', 'JPY')
+        on_chunk (callable): Optional callback; when given, the AI response is
+            streamed and each text chunk is passed to it as it arrives
+        use_cache (bool): Reuse a cached itinerary for an identical request
+            and cache new successful ones
+        deadline (float): Seconds the whole request may take, retries included;
+            defaults to REQUEST_DEADLINE_SECONDS from config.py
+        chunk_days (int): Split trips of PLAN_CHUNK_MIN_DURATION days or more
+            into ranges of about this many days, generated concurrently;
+            defaults to PLAN_CHUNK_DAYS from config.py (0, never split, unless
+            set). Ignored when on_chunk is given
         
     Returns:
-        tuple: (itinerary_dict, summary_string)
+        tuple: (itinerary_dict, summary_string). Token usage is added to the
+            totals in usage.stats(); wrap the call in usage.track() to get the
+            usage of this trip alone
+        
+    Raises:
+        ValueError: If inputs are invalid
+    """
+    cache_key, prompt, output = _prepare_trip(destination, duration, budget, interests, transport, stay, currency)
+    
+    cache = get_response_cache() if use_cache else None
+    cached = _cached_result(cache, cache_key)
+    if cached is not None:
+        return cached
+    
+    chunks = [] if on_chunk is not None else _prepare_chunks(
+        destination, duration, budget, interests, transport, stay, currency, chunk_days
+    )
+    
+    # Generate itinerary using AI
+    trip_usage = usage.UsageTotals()
+    answered = []
+    try:
+        request_deadline = _make_deadline(deadline)
+        with usage.track(trip_usage), track_providers(answered):
+            if chunks:
+                parsed = _share_call(
+                    ("chunked", cache_key), lambda: _generate_chunked(chunks, request_deadline, interests),
+                    request_deadline, answered
+                )
+            elif on_chunk is not None:
+                parsed = _try_parse_ai_response(
+                    _generate_streaming(prompt, on_chunk, request_deadline, output.max_tokens)
+                )
+            else:
+                # Identical requests already in flight share one provider call
+                parsed = _share_call(
+                    cache_key, lambda: _generate_with_retries(prompt, request_deadline, output.max_tokens),
+                    request_deadline, answered
+                )
+    except Exception as e:
+        return _error_response(e)
+    finally:
+        _record_trip_usage(destination, duration, trip_usage)
+    
+    if parsed is None:
+        return _fallback_response()
+    _observe_output(duration, interests, output, trip_usage)
+    _store_result(cache, cache_key, parsed, answered)
+    return parsed
+
+@metrics.timed("plan_trip", outcome=_plan_outcome)
+async def plan_trip_async(destination, duration, budget, interests, transport, stay, currency="USD",
+                          use_cache=True, deadline=None, chunk_days=None):
+    """
+    Async version of plan_trip().
+    
+    Takes the same arguments and returns the same (itinerary, summary) tuple,
+    but awaits the AI provider instead of blocking, so many trips can be
+    planned concurrently on one event loop.
+    
+    Raises:
+        ValueError: If inputs are invalid
+    """
+    cache_key, prompt, output = _prepare_trip(destination, duration, budget, interests, transport, stay, currency)
+    
+    cache = get_response_cache() if use_cache else None
+    cached = _cached_result(cache, cache_key)
+    if cached is not None:
+        return cached
+    
+    chunks = _prepare_chunks(destination, duration, budget, interests, transport, stay, currency, chunk_days)
+    
+    trip_usage = usage.UsageTotals()
+    answered = []
+    try:
+        request_deadline = _make_deadline(deadline)
+        with usage.track(trip_usage), track_providers(answered):
+            if chunks:
+                parsed = await _share_call_async(
+                    ("chunked", cache_key), lambda: _generate_chunked_async(chunks, request_deadline, interests),
+                    request_deadline, answered
+                )
+            else:
+                parsed = await _share_call_async(
+                    cache_key, lambda: _generate_with_retries_async(prompt, request_deadline, output.max_tokens),
+                    request_deadline, answered
+                )
+    except Exception as e:
+        return _error_response(e)
+    finally:
+        _record_trip_usage(destination, duration, trip_usage)
+    
+    if parsed is None:
+        return _fallback_response()
+    _observe_output(duration, interests, output, trip_usage)
+    _store_result(cache, cache_key, parsed, answered)
+    return parsed
+
+def plan_trip_stream(destination, duration, budget, interests, transport, stay, currency="USD",
+                     use_cache=True, deadline=None, chunk_days=None):
+    """
+    Plan a trip, yielding each day of the itinerary as soon as the AI finishes it.
+    
+    Takes the same arguments as plan_trip(). The provider response is streamed
+    and parsed incrementally, so the first days can be shown while later ones
+    are still being written. Streams are not retried once output has been
+    shown, but they still stop at the deadline. Long trips split into chunks
+    are not streamed; each range of days is yielded once it and the ranges
+    before it are done.
+    
+    Yields:
+        tuple: ("day", day_dict) for each finished day, then ("summary", summary_string).
+            If generation fails, a single ("error", (error_dict, summary_string)) instead.
+        
+    Raises:
+        ValueError: If inputs are invalid
+    """
+    cache_key, prompt, output = _prepare_trip(destination, duration, budget, interests, transport, stay, currency)
+    
+    cache = get_response_cache() if use_cache else None
+    cached = _cached_result(cache, cache_key)
+    if cached is not None:
+        for day in cached[0]:
+            yield "day", day
+        yield "summary", cached[1]
+        return
+    
+    chunks = _prepare_chunks(destination, duration, budget, interests, transport, stay, currency, chunk_days)
+    if chunks:
+        yield from _stream_chunked(chunks, cache, cache_key, destination, duration, interests, deadline)
+        return
+    
+    parser = ItineraryStreamParser()
+    chunks = []
+    days = []
+    summary = None
+    trip_usage = usage.UsageTotals()
+    answered = []
+    
+    try:
+        stream = stream_itinerary(prompt, deadline=_make_deadline(deadline), max_tokens=output.max_tokens,
+                                  schema=_structured(ITINERARY_SCHEMA))
+        for chunk in _tracked(stream, trip_usage, answered):
+            chunks.append(chunk)
+            for kind, value in parser.feed(chunk):
+                if kind == "day":
+                    days.append(value)
+                    yield "day", value
+                else:
+                    summary = value
+    except Exception as e:
+        yield "error", _error_response(e)
+        return
+    finally:
+        _record_trip_usage(destination, duration, trip_usage)
+    
+    if days:
+        if summary is None:
+            summary = "The AI response ended before the trip summary was complete."
+        else:
+            _observe_output(duration, interests, output, trip_usage)
+            _store_result(cache, cache_key, (days, summary), answered)
+        yield "summary", summary
+        return
+    
+    # The response was not shaped for incremental parsing; parse it whole
+    try:
+        parsed = _try_parse_ai_response("".join(chunks))
+    except Exception as e:
+        yield "error", _error_response(e)
+        return
+    if parsed is None:
+        parsed = _fallback_response()
+    else:
+        _store_result(cache, cache_key, parsed, answered)
+    for day in parsed[0]:
+        yield "day", day
+    yield "summary", summary or parsed[1]
+
+@metrics.timed("regenerate_day")
+def regenerate_day(itinerary, day, destination, budget, interests, transport, stay, currency="USD",
+                   constraints=None, deadline=None):
+    """
+    Replace one day of an existing itinerary without regenerating the rest.
+    
+    Only the chosen day is asked for, with the days either side of it as
+    context, so the call costs about one day of output instead of the whole
+    trip. The other days are kept exactly as they are.
+    
+    Args:
+        itinerary (list): Valid itinerary, as returned by plan_trip()
+        day (int): Number of the day to replace (1 for the first day)
+        destination (str): Travel destination
+        budget (float): Budget for the whole trip
+        interests (list): List of interests
+        transport (str): Preferred transport method
+        stay (str): Preferred accommodation type
+        currency (str): Currency code
+        constraints (str): Optional wishes for the new day (e.g. "rainy day, indoors")
+        deadline (float): Seconds the request may take, retries included;
+            defaults to REQUEST_DEADLINE_SECONDS from config.py
+        
+    Returns:
+        tuple: (new_itinerary, total_cost). The itinerary passed in is not changed
+        
+    Raises:
+        ValueError: If inputs are invalid, or no usable day came back after retries
+    """
+    prompt, output = _prepare_day(itinerary, day, destination, budget, interests, transport, stay, currency,
+                                  constraints)
+    
+    def attempt(deadline):
+        return _checked_day(generate_itinerary(prompt, deadline=deadline, max_tokens=output.max_tokens,
+                                               schema=_structured(DAY_SCHEMA)))
+    
+    try:
+        new_day = _retry_policy.call(attempt, _make_deadline(deadline))
+    except MalformedResponseError:
+        raise ValueError(f"The AI response did not contain a usable day {day}; please try again") from None
+    return _splice_day(itinerary, day, new_day)
+
+@metrics.timed("regenerate_day")
+async def regenerate_day_async(itinerary, day, destination, budget, interests, transport, stay, currency="USD",
+                               constraints=None, deadline=None):
+    """
+    Async version of regenerate_day().
+    """
+    prompt, output = _prepare_day(itinerary, day, destination, budget, interests, transport, stay, currency,
+                                  constraints)
+    
+    async def attempt(deadline):
+        return _checked_day(await generate_itinerary_async(prompt, deadline=deadline, max_tokens=output.max_tokens,
+                                                           schema=_structured(DAY_SCHEMA)))
+    
+    try:
+        new_day = await _retry_policy.call_async(attempt, _make_deadline(deadline))
+    except MalformedResponseError:
+        raise ValueError(f"The AI response did not contain a usable day {day}; please try again") from None
+    return _splice_day(itinerary, day, new_day)
+
+def _stream_chunked(chunks, cache, cache_key, destination, duration, interests, deadline):
+    """
+    Yield the plan_trip_stream() events of a trip split into chunks.
+    """
+    trip_usage = usage.UsageTotals()
+    answered = []
+    parts = []
+    try:
+        for part in _tracked(_chunk_parts(chunks, _make_deadline(deadline), interests), trip_usage, answered):
+            parts.append(part)
+            for day in part[0]:
+                yield "day", day
+    except Exception as e:
+        yield "error", _error_response(e)
+        return
+    finally:
+        _record_trip_usage(destination, duration, trip_usage)
+    
+    result = _stitch_chunks(chunks, parts)
+    if result is not None:
+        _store_result(cache, cache_key, result, answered)
+        yield "summary", result[1]
+    elif parts:
+        yield "summary", "The AI response ended before the trip summary was complete."
+    else:
+        days, summary = _fallback_response()
+        for day in days:
+            yield "day", day
+        yield "summary", summary
+
+def _tracked(chunks, totals, answered):
+    """
+    Iterate over a stream, counting its token usage in totals and the
+    providers that answered in answered.
+    
+    Tracking is entered around each step of the stream only, so it never
+    leaks into the code consuming this generator between chunks.
+    """
+    chunks = iter(chunks)
+    while True:
+        with usage.track(totals), track_providers(answered):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+def _observe_output(duration, interests, output, trip_usage):
+    """
+    Teach the output budget the size of a response that parsed.
+    
+    Only single-call trips are used; with retries or hedges it is unclear
+    which response the tokens belong to.
+    """
+    if trip_usage.calls == 1:
+        _output_budget.observe(duration, len(interests), trip_usage.completion_tokens, output.compact)
+
+def _record_trip_usage(destination, duration, trip_usage):
+    """
+    Add a trip's token usage to the per-destination and per-duration totals.
+    """
+    usage.record_trip(display_destination(normalize_destination(destination)), duration, trip_usage)
+
+def _share_call(key, func, deadline, answered):
+    """
+    Run func() through the single-flight group, waiting no longer than the deadline.
+    
+    Callers that join another caller's call are told which providers
+    answered it, so their results are cached and labelled like the
+    leader's. They record no token usage: the tokens were spent, and are
+    counted, for the leader's trip only.
+    
+    Args:
+        key: Canonical request key
+        func (callable): Zero-argument function that performs the call
+        deadline (Deadline): The caller's request deadline
+        answered (list): The caller's answered providers, extended for joined calls
+        
+    Raises:
+        DeadlineExceeded: If the deadline passes while waiting for another caller's call
+    """
+    led = []
+    
+    def lead():
+        led.append(True)
+        providers = []
+        with track_providers(providers):
+            return func(), providers
+    
+    result, providers = _in_flight.do(key, lead, timeout=deadline.remaining())
+    if not led:
+        _join_providers(answered, providers)
+    return result
+
+async def _share_call_async(key, coro_func, deadline, answered):
+    """
+    Async version of _share_call().
+    """
+    led = []
+    
+    async def lead():
+        led.append(True)
+        providers = []
+        with track_providers(providers):
+            return await coro_func(), providers
+    
+    result, providers = await _in_flight.do_async(key, lead, timeout=deadline.remaining())
+    if not led:
+        _join_providers(answered, providers)
+    return result
+
+def _join_providers(answered, providers):
+    """
+    Record the providers that answered a joined call as this caller's own.
+    """
+    answered.extend(providers)
+    if providers:
+        metrics.record_provider(providers[-1])
+
+def coalescing_stats():
+    """
+    Report how many provider calls were saved by coalescing identical requests.
+    
+    Returns:
+        dict: executed, coalesced (calls saved), in_flight and saved_ratio
+    """
+    return _in_flight.stats()
+
+def _prepare_trip(destination, duration, budget, interests, transport, stay, currency):
+    """
+    Validate and normalize a trip request, then build its key and prompt.
+    
+    Equivalent requests ("Paris" vs " paris", reordered interests, transport
+    synonyms) get the same key. Normalization only builds the key: the
+    prompt keeps the destination, transport and stay as the user typed them.
+    The key also covers the provider and model, so switching either never
+    serves another model's itinerary.
+    
+    Returns:
+        tuple: (request_key, prompt, token_budget.Budget for the response)
         
     Raises:
         ValueError: If inputs are invalid
     """
-    # Input validation
+    _validate_trip_inputs(destination, duration, budget, interests)
+    
+    request = normalize_request(destination, duration, budget, interests, transport, stay, currency)
+    provider = get_provider()
+    key = request_key(request, provider, get_model(provider))
+    output = _output_budget.plan(request.duration, len(request.interests))
+    
+    # Budget bucketing only widens the key; the prompt keeps the exact budget
+    prompt = _create_prompt(
+        str(destination).strip(), request.duration, budget,
+        list(request.interests), str(transport).strip(), str(stay).strip(), request.currency,
+        compact=output.compact, response_format=_response_format()
+    )
+    return key, prompt, output
+
+def _prepare_chunks(destination, duration, budget, interests, transport, stay, currency, chunk_days=None):
+    """
+    Split a long trip into ranges of days, each with its own prompt and output limit.
+    
+    Every chunk's prompt carries the whole trip's requirements, so the parts
+    fit together, plus the range of days to write and that range's share of
+    the budget. The part specific to the chunk comes last, so the chunks'
+    prompts share a common prefix.
+    
+    Args:
+        chunk_days (int): Days per chunk; None for PLAN_CHUNK_DAYS, 0 to never split
+        
+    Returns:
+        list: _Chunk for each range in day order, or an empty list if the
+            trip is too short to split
+    """
+    if chunk_days is None:
+        chunk_days = PLAN_CHUNK_DAYS
+    if chunk_days <= 0 or duration < PLAN_CHUNK_MIN_DURATION or duration <= chunk_days:
+        return []
+    
+    request = normalize_request(destination, duration, budget, interests, transport, stay, currency)
+    chunks = []
+    for first, last in _day_ranges(request.duration, chunk_days):
+        output = _output_budget.plan(last - first + 1, len(request.interests))
+        prompt = _create_prompt(
+            str(destination).strip(), request.duration, budget,
+            list(request.interests), str(transport).strip(), str(stay).strip(), request.currency,
+            compact=output.compact, days=(first, last), response_format=_response_format()
+        )
+        chunks.append(_Chunk(first, last, prompt, output))
+    return chunks
+
+def _day_ranges(duration, chunk_days):
+    """
+    Split days 1..duration into ranges of at most chunk_days, as even as possible.
+    
+    Returns:
+        list: (first_day, last_day) tuples
+    """
+    count = -(-duration // chunk_days)
+    size, extra = divmod(duration, count)
+    ranges = []
+    first = 1
+    for index in range(count):
+        last = first + size - 1 + (1 if index < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+def _generate_chunked(chunks, deadline, interests):
+    """
+    Generate every chunk of a trip concurrently and stitch them together.
+    
+    Returns:
+        tuple: (itinerary, summary), or None if a chunk could not be parsed
+    """
+    return _stitch_chunks(chunks, list(_chunk_parts(chunks, deadline, interests)))
+
+async def _generate_chunked_async(chunks, deadline, interests):
+    """
+    Async version of _generate_chunked().
+    """
+    parts = await asyncio.gather(*(_generate_chunk_async(chunk, deadline, interests) for chunk in chunks))
+    return _stitch_chunks(chunks, [part for part in parts if part is not None])
+
+def _chunk_parts(chunks, deadline, interests):
+    """
+    Start every chunk on its own thread, then yield their results in day order.
+    
+    Stops at the first chunk whose response could not be parsed. Provider
+    errors are raised once reached in order.
+    
+    Yields:
+        tuple: (days, summary) for each chunk, with days numbered for the whole trip
+    """
+    with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="plan-chunks") as pool:
+        # Each thread gets a copy of the caller's context, so usage.track() sees its calls
+        futures = [
+            pool.submit(contextvars.copy_context().run, _generate_chunk, chunk, deadline, interests)
+            for chunk in chunks
+        ]
+        for future in futures:
+            part = future.result()
+            if part is None:
+                return
+            yield part
+
+def _generate_chunk(chunk, deadline, interests):
+    """
+    Generate one chunk of a trip, retrying responses without enough days.
+    
+    Returns:
+        tuple: (days, summary), or None if the response could not be parsed
+    """
+    with usage.track() as chunk_usage:
+        parsed = _generate_with_retries(chunk.prompt, deadline, chunk.output.max_tokens, _chunk_length(chunk))
+    return _chunk_result(chunk, parsed, interests, chunk_usage)
+
+async def _generate_chunk_async(chunk, deadline, interests):
+    """
+    Async version of _generate_chunk().
+    """
+    with usage.track() as chunk_usage:
+        parsed = await _generate_with_retries_async(
+            chunk.prompt, deadline, chunk.output.max_tokens, _chunk_length(chunk)
+        )
+    return _chunk_result(chunk, parsed, interests, chunk_usage)
+
+def _chunk_length(chunk):
+    return chunk.last - chunk.first + 1
+
+def _chunk_result(chunk, parsed, interests, chunk_usage):
+    """
+    Number a chunk's parsed days for the whole trip.
+    
+    The model is asked to number the days itself, but only their order is
+    trusted. Extra days are dropped.
+    
+    Args:
+        parsed (tuple): (itinerary, summary) from _generate_with_retries(), or None
+        
+    Returns:
+        tuple: (days, summary), or None if the response lacks the chunk's days
+    """
+    if parsed is None:
+        return None
+    itinerary, summary = parsed
+    if not isinstance(itinerary, list) or len(itinerary) < _chunk_length(chunk):
+        return None
+    _observe_output(_chunk_length(chunk), interests, chunk.output, chunk_usage)
+    days = [
+        dict(day, day=number) if isinstance(day, dict) else day
+        for number, day in zip(range(chunk.first, chunk.last + 1), itinerary)
+    ]
+    return days, summary
+
+def _stitch_chunks(chunks, parts):
+    """
+    Join the chunks' days into one itinerary with a merged summary.
+    
+    Args:
+        chunks (list): The trip's chunks
+        parts (list): (days, summary) for a leading run of the chunks
+        
+    Returns:
+        tuple: (itinerary, summary), or None unless every chunk is present and
+            the joined itinerary is valid
+    """
+    if len(parts) != len(chunks):
+        return None
+    itinerary = [day for days, _ in parts for day in days]
+    if not validate_itinerary(itinerary):
+        return None
+    summary = " ".join(
+        f"Days {chunk.first}-{chunk.last}: {str(part_summary).strip()}"
+        for chunk, (_, part_summary) in zip(chunks, parts)
+    )
+    return itinerary, summary
+
+def _response_format():
+    """
+    Choose the response format to ask for.
+    
+    Structured output always uses the full format, since provider schemas
+    cannot describe compact_format's positional arrays.
+    """
+    return "full" if AI_STRUCTURED_OUTPUT else AI_RESPONSE_FORMAT
+
+def _structured(schema):
+    """
+    Return the schema to send with a request, or None when structured output is off.
+    """
+    return schema if AI_STRUCTURED_OUTPUT else None
+
+def _cached_result(cache, cache_key):
+    """
+    Look up a cached (itinerary, summary) pair.
+    
+    Returns:
+        tuple: (itinerary, summary), or None on a miss or when caching is off
+    """
+    if cache is None:
+        return None
+    cached = cache.get(cache_key)
+    if cached is None:
+        return None
+    return cached["itinerary"], cached["summary"]
+
+def _store_result(cache, cache_key, result, answered=()):
+    """
+    Cache a successfully parsed (itinerary, summary) pair.
+    
+    Only call this with results parsed from a real AI response; error and
+    fallback results must never be cached. Itineraries that fail
+    validate_itinerary() are not stored.
+    
+    Args:
+        answered (list): Providers that answered, from track_providers(). The
+            key names the configured provider and model, so a result that a
+            fallback provider wrote is not stored under it
+    """
+    if cache is None:
+        return
+    if any(provider != get_provider() for provider in answered):
+        return
+    # A partial itinerary that got past parsing would be served until it expires
+    if not result[0] or not validate_itinerary(result[0]):
+        return
+    itinerary, summary = result
+    cache.set(cache_key, {"itinerary": itinerary, "summary": summary})
+
+def _make_deadline(seconds):
+    """
+    Start the end-to-end deadline for one request.
+    
+    Args:
+        seconds (float): Time budget, None for REQUEST_DEADLINE_SECONDS, 0 or less for none
+    """
+    if seconds is None:
+        seconds = REQUEST_DEADLINE_SECONDS
+    return Deadline(seconds if seconds > 0 else None)
+
+def _generate_with_retries(prompt, deadline, max_tokens=None, days=None):
+    """
+    Call the AI, retrying transient errors and unparseable responses.
+    
+    An unparseable response is usually one cut off at the output limit, so
+    each retry after one gets a larger limit. With days set, a response with
+    fewer days than that also counts as unparseable.
+    
+    Each response is parsed once, here; callers use the parsed result.
+    
+    Returns:
+        tuple: (itinerary, summary), or None if every attempt was unparseable
+        
+    Raises:
+        ValueError: If the last response was JSON without an itinerary
+    """
+    limit = [max_tokens]
+    
+    def attempt(deadline):
+        try:
+            response = generate_itinerary(prompt, deadline=deadline, max_tokens=limit[0],
+                                          schema=_structured(ITINERARY_SCHEMA))
+            return _checked_response(response, days)
+        except MalformedResponseError:
+            if limit[0]:
+                limit[0] = _output_budget.escalate(limit[0])
+            raise
+    
+    try:
+        return _retry_policy.call(attempt, deadline)
+    except MalformedResponseError as e:
+        return _unparsed(e)
+
+async def _generate_with_retries_async(prompt, deadline, max_tokens=None, days=None):
+    """
+    Async version of _generate_with_retries().
+    """
+    limit = [max_tokens]
+    
+    async def attempt(deadline):
+        try:
+            response = await generate_itinerary_async(prompt, deadline=deadline, max_tokens=limit[0],
+                                                      schema=_structured(ITINERARY_SCHEMA))
+            return _checked_response(response, days)
+        except MalformedResponseError:
+            if limit[0]:
+                limit[0] = _output_budget.escalate(limit[0])
+            raise
+    
+    try:
+        return await _retry_policy.call_async(attempt, deadline)
+    except MalformedResponseError as e:
+        return _unparsed(e)
+
+def _checked_response(ai_response, days=None):
+    """
+    Parse a response as an itinerary, so a bad one can be retried.
+    
+    Args:
+        ai_response (str): Raw response from AI
+        days (int): Smallest number of days the itinerary must have, if any
+        
+    Returns:
+        tuple: (itinerary, summary)
+        
+    Raises:
+        MalformedResponseError: If the response cannot be parsed; for JSON
+            without an itinerary it is raised from the ValueError
+    """
+    try:
+        parsed = _try_parse_ai_response(ai_response)
+    except ValueError as e:
+        raise MalformedResponseError(ai_response) from e
+    if parsed is not None and days and (not isinstance(parsed[0], list) or len(parsed[0]) < days):
+        parsed = None
+    if parsed is None:
+        raise MalformedResponseError(ai_response)
+    return parsed
+
+def _unparsed(error):
+    """
+    Result of retries whose last response was malformed: None for a
+    fallback, or the ValueError of a JSON response without an itinerary.
+    """
+    if isinstance(error.__cause__, ValueError):
+        raise error.__cause__
+    return None
+
+def _generate_streaming(prompt, on_chunk, deadline=None, max_tokens=None):
+    """
+    Stream the AI response, reporting each chunk, and return the full text.
+    
+    Args:
+        prompt (str): Prompt to send to the AI
+        on_chunk (callable): Called with each text chunk as it arrives
+        deadline (Deadline): Overall time budget
+        max_tokens (int): Output token limit
+        
+    Returns:
+        str: The complete AI response
+    """
+    chunks = []
+    for chunk in stream_itinerary(prompt, deadline=deadline, max_tokens=max_tokens,
+                                  schema=_structured(ITINERARY_SCHEMA)):
+        chunks.append(chunk)
+        on_chunk(chunk)
+    return "".join(chunks)
+
+def _validate_trip_inputs(destination, duration, budget, interests):
+    """
+    Check the trip request before any AI call is made.
+    
+    Raises:
+        ValueError: If inputs are invalid
+    """
     if not destination or not destination.strip():
         raise ValueError("Destination cannot be empty")
     
@@ -38,25 +836,35 @@ def plan_trip(destination, duration, budget, interests, transport, stay, currenc
     
     if not interests or len(interests) == 0:
         raise ValueError("At least one interest must be selected")
+
+def _error_response(error):
+    """
+    Build the error-friendly (itinerary, summary) pair returned when generation fails.
     
-    # Create the prompt for the AI
-    prompt = _create_prompt(destination, duration, budget, interests, transport, stay, currency)
-    
-    # Generate itinerary using AI
-    try:
-        ai_response = generate_itinerary(prompt)
-        itinerary_dict, summary = _parse_ai_response(ai_response)
-        return itinerary_dict, summary
-    except Exception as e:
-        # Return error-friendly response
+    Args:
+        error (Exception): The error raised while generating the itinerary
+        
+    Returns:
+        tuple: (error_dict, summary_string)
+    """
+    if isinstance(error, RateLimitExceeded):
+        # The request never reached the provider: the local queue for its quota was full
         error_itinerary = {
-            "error": str(e),
-            "suggestion": "Please check your API keys in config.py or try again later."
+            "error": str(error),
+            "reason": error.reason,
+            "retry_after": round(error.retry_after or 0, 1),
+            "suggestion": "The planner is busy right now. Please try again in a minute."
         }
-        error_summary = f"Unable to generate itinerary: {e}. Please check your configuration and try again."
-        return error_itinerary, error_summary
+        return error_itinerary, f"Too many trips are being planned right now: {error}"
+    error_itinerary = {
+        "error": str(error),
+        "suggestion": "Please check your API keys in config.py or try again later."
+    }
+    error_summary = f"Unable to generate itinerary: {error}. Please check your configuration and try again."
+    return error_itinerary, error_summary
 
-def _create_prompt(destination, duration, budget, interests, transport, stay, currency):
+def _create_prompt(destination, duration, budget, interests, transport, stay, currency, compact=False,
+                   days=None, response_format="full"):
     """
     Create a detailed prompt for the AI to generate a student-focused itinerary.
     
@@ -68,11 +876,34 @@ def _create_prompt(destination, duration, budget, interests, transport, stay, cu
         transport (str): Preferred transport method
         stay (str): Preferred accommodation type
         currency (str): Currency code
+        compact (bool): Ask for shorter days, so long trips fit the output limit
+        days (tuple): (first_day, last_day) to ask for only that part of the trip
+        response_format (str): "full" for the itinerary JSON, "compact" for
+            compact_format's short-key arrays
         
     Returns:
         str: Formatted prompt for AI
     """
     interests_str = ", ".join(interests)
+    if response_format == "compact":
+        output_format = compact_format.PROMPT_FORMAT
+    else:
+        output_format = """OUTPUT FORMAT:
+Please provide your response as valid JSON with this exact structure:
+
+{
+    "itinerary": [
+        {
+            "day": 1,
+            "activities": ["Activity 1", "Activity 2", "Activity 3"],
+            "cost": 50,
+            "transport": "metro/bus/walking",
+            "notes": "Important tips and safety notes"
+        }
+    ],
+    "summary": "A concise 2-3 sentence summary of the trip, highlighting key experiences and budget considerations for students."
+}
+"""
     
     prompt = f"""
 You are an expert travel planner specializing in budget-friendly student travel. Create a detailed itinerary for a student trip with the following requirements:
@@ -91,22 +922,7 @@ REQUIREMENTS FOR STUDENT TRAVEL:
 4. Recommend affordable local restaurants and street food
 5. Include practical tips for first-time travelers
 
-OUTPUT FORMAT:
-Please provide your response as valid JSON with this exact structure:
-
-{{
-    "itinerary": [
-        {{
-            "day": 1,
-            "activities": ["Activity 1", "Activity 2", "Activity 3"],
-            "cost": 50,
-            "transport": "metro/bus/walking",
-            "notes": "Important tips and safety notes"
-        }}
-    ],
-    "summary": "A concise 2-3 sentence summary of the trip, highlighting key experiences and budget considerations for students."
-}}
-
+{output_format}
 IMPORTANT:
 - Ensure the JSON is valid and properly formatted
 - Keep total daily costs reasonable for student budgets
@@ -114,9 +930,149 @@ IMPORTANT:
 - Suggest free activities and student discounts where possible
 - Make it engaging and exciting for young travelers
 - Include cultural experiences and local insights
+"""
+    if compact:
+        prompt += f"""- Keep it brief so all {duration} days fit: at most 3 short activities per day and one short sentence of notes
+"""
+    if days is not None:
+        first, last = days
+        share = round(budget * (last - first + 1) / duration, 2)
+        prompt += f"""
+PART OF THE TRIP:
+DAYS: {first}-{last}
+- Plan only days {first} to {last} of the {duration}-day trip, numbered {first} to {last}; the other days are planned separately
+- Spend about {share:g} {currency} of the budget on these days
+- Write the summary about these days only
+"""
+        if first == 1:
+            prompt += "- Day 1 is the arrival day\n"
+        if last == duration:
+            prompt += f"- Day {duration} is the departure day\n"
+    return prompt
+
+def _prepare_day(itinerary, day, destination, budget, interests, transport, stay, currency, constraints):
+    """
+    Validate a day regeneration request and build its prompt.
+    
+    Returns:
+        tuple: (prompt, token_budget.Budget for the response)
+        
+    Raises:
+        ValueError: If inputs are invalid
+    """
+    if not validate_itinerary(itinerary) or not itinerary:
+        raise ValueError("Itinerary must be a valid, non-empty itinerary")
+    if not isinstance(day, int) or not 1 <= day <= len(itinerary):
+        raise ValueError(f"Day must be between 1 and {len(itinerary)}")
+    _validate_trip_inputs(destination, len(itinerary), budget, interests)
+    
+    request = normalize_request(destination, len(itinerary), budget, interests, transport, stay, currency)
+    prompt = _create_day_prompt(
+        str(destination).strip(), itinerary, day, budget,
+        list(request.interests), str(transport).strip(), str(stay).strip(), request.currency, constraints
+    )
+    return prompt, _output_budget.plan(1, len(request.interests))
+
+def _create_day_prompt(destination, itinerary, day, budget, interests, transport, stay, currency, constraints=None):
+    """
+    Create a prompt asking for a replacement for one day of an itinerary.
+    
+    Args:
+        destination (str): Travel destination
+        itinerary (list): The current itinerary
+        day (int): Number of the day to replace
+        budget (float): Budget for the whole trip
+        interests (list): List of interests
+        transport (str): Preferred transport method
+        stay (str): Preferred accommodation type
+        currency (str): Currency code
+        constraints (str): Optional wishes for the new day
+        
+    Returns:
+        str: Formatted prompt for AI
+    """
+    duration = len(itinerary)
+    index = day - 1
+    remaining = round(budget - sum(other["cost"] for n, other in enumerate(itinerary) if n != index), 2)
+    
+    context = []
+    if index > 0:
+        context.append(f"DAY {day - 1} (before, stays as it is):\n{json.dumps(itinerary[index - 1])}")
+    context.append(f"DAY {day} (to be replaced):\n{json.dumps(itinerary[index])}")
+    if index + 1 < duration:
+        context.append(f"DAY {day + 1} (after, stays as it is):\n{json.dumps(itinerary[index + 1])}")
+    context = "\n".join(context)
+    
+    prompt = f"""
+You are an expert travel planner specializing in budget-friendly student travel. A student has a {duration}-day itinerary and wants a new plan for day {day} only.
+
+DESTINATION: {destination}
+DURATION: {duration} days
+BUDGET: {budget} {currency} total
+INTERESTS: {", ".join(interests)}
+TRANSPORT: {transport}
+ACCOMMODATION: {stay}
+
+{context}
+"""
+    if constraints:
+        prompt += f"""
+WISHES FOR THE NEW DAY: {constraints}
+"""
+    prompt += f"""
+Write a new day {day} that fits between the days around it, is different from the current day {day}, and does not repeat the activities of its neighbours. Keep it budget-friendly: about {max(remaining, 0):g} {currency} of the budget is left for this day.
+
+OUTPUT FORMAT:
+Respond with only this JSON object:
+
+{{
+    "day": {day},
+    "activities": ["Activity 1", "Activity 2", "Activity 3"],
+    "cost": 50,
+    "transport": "metro/bus/walking",
+    "notes": "Important tips and safety notes"
+}}
 """
     return prompt
 
+def _parse_day(ai_response):
+    """
+    Parse a single day from an AI response.
+    
+    Returns:
+        dict: The day, or None if no valid day was found
+    """
+    try:
+        data = json.loads(ai_response)
+    except (json.JSONDecodeError, TypeError):
+        data = extract_json_object(ai_response or "", ("activities", "cost"))
+    if not isinstance(data, dict) or not validate_itinerary([data]):
+        return None
+    return data
+
+def _checked_day(ai_response):
+    """
+    Parse a regenerated day, so a bad response can be retried.
+    
+    Raises:
+        MalformedResponseError: If the response has no valid day
+    """
+    new_day = _parse_day(ai_response)
+    if new_day is None:
+        raise MalformedResponseError(ai_response)
+    return new_day
+
+def _splice_day(itinerary, day, new_day):
+    """
+    Put a regenerated day into a copy of the itinerary and total its cost.
+    
+    Returns:
+        tuple: (new_itinerary, total_cost)
+    """
+    updated = list(itinerary)
+    updated[day - 1] = dict(new_day, day=day)
+    return updated, calculate_total_cost(updated)
+
 def _parse_ai_response(ai_response):
     """
     Parse the AI response to extract itinerary and summary.
@@ -127,54 +1083,69 @@ def _parse_ai_response(ai_response):
     Returns:
         tuple: (itinerary_dict, summary_string)
     """
+    parsed = _try_parse_ai_response(ai_response)
+    if parsed is not None:
+        return parsed
+    return _fallback_response()
+
+@metrics.timed("parse", outcome=lambda parsed: "ok" if parsed is not None else "fallback-parse")
+def _try_parse_ai_response(ai_response):
+    """
+    Parse the AI response without falling back to a placeholder itinerary.
+    
+    Responses in the compact format are expanded to the full format. With
+    structured output the provider returns bare JSON, so anything json.loads
+    rejects (a response cut off at the output limit) is not searched.
+    
+    Args:
+        ai_response (str): Raw response from AI
+        
+    Returns:
+        tuple: (itinerary_dict, summary_string), or None if no itinerary JSON was found
+        
+    Raises:
+        ValueError: If the response is JSON but lacks 'itinerary' or 'summary',
+            or is a malformed compact response
+    """
     try:
         # Try to parse as JSON directly
         data = json.loads(ai_response)
-        
-        if "itinerary" in data and "summary" in data:
-            return data["itinerary"], data["summary"]
-        else:
+    except (json.JSONDecodeError, RecursionError):
+        if AI_STRUCTURED_OUTPUT:
+            return None
+        # Look for the JSON object among any surrounding prose or code fences
+        data = (extract_json_object(ai_response, ("itinerary", "summary"))
+                or extract_json_object(ai_response, compact_format.KEYS))
+        if data is None:
+            return None
+    else:
+        if not ("itinerary" in data and "summary" in data) and not compact_format.is_compact(data):
             raise ValueError("Response missing required 'itinerary' or 'summary' fields")
-            
-    except json.JSONDecodeError:
-        # If direct JSON parsing fails, try to extract JSON from the response
-        try:
-            # Look for JSON block in the response
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                data = json.loads(json_str)
-                
-                if "itinerary" in data and "summary" in data:
-                    return data["itinerary"], data["summary"]
-            
-            # If no JSON found, create a fallback response
-            fallback_itinerary = [
-                {
-                    "day": 1,
-                    "activities": ["AI response parsing failed - please try again"],
-                    "cost": 0,
-                    "transport": "N/A",
-                    "notes": "There was an issue processing the AI response. Please check your configuration."
-                }
-            ]
-            fallback_summary = "Unable to parse AI response. Please check your API configuration and try again."
-            return fallback_itinerary, fallback_summary
-            
-        except Exception as e:
-            # Ultimate fallback
-            error_itinerary = [
-                {
-                    "day": 1,
-                    "activities": [f"Error: {str(e)}"],
-                    "cost": 0,
-                    "transport": "N/A",
-                    "notes": "Please check your API keys and configuration."
-                }
-            ]
-            error_summary = f"Error processing response: {str(e)}"
-            return error_itinerary, error_summary
+    
+    if compact_format.is_compact(data):
+        return compact_format.expand(data)
+    return data["itinerary"], data["summary"]
+
+def _fallback_response():
+    """
+    Build the placeholder (itinerary, summary) pair used when the AI response cannot be parsed.
+    
+    Returns:
+        tuple: (fallback_itinerary, fallback_summary)
+    """
+    fallback_itinerary = [
+        {
+            "day": 1,
+            "activities": ["AI response parsing failed - please try again"],
+            "cost": 0,
+            "transport": "N/A",
+            "notes": "There was an issue processing the AI response. Please check your configuration."
+        }
+    ]
+    fallback_summary = "Unable to parse AI response. Please check your API configuration and try again."
+    return fallback_itinerary, fallback_summary
 
+@metrics.timed("validate", outcome=lambda valid: "ok" if valid else "error")
 def validate_itinerary(itinerary):
     """
     Validate that an itinerary has the required structure.
@@ -0,0 +1,213 @@
+"""
+Client-side rate limiting for Student AI Travel Planner
+This module keeps requests within each provider's per-minute request and token quotas.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request cannot be sent within the provider's quota in time.
+
+    Attributes:
+        provider (str): Provider whose quota is exhausted
+        reason (str): "queue_full" or "wait_too_long"
+        retry_after (float): Seconds until the quota would admit the request
+    """
+
+    def __init__(self, message, provider=None, reason="queue_full", retry_after=None):
+        super().__init__(message)
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A bucket of `capacity` units refilled continuously at `rate` units per second.
+
+    Reservations may drive the level negative: the caller then waits until the
+    bucket has refilled past zero. Because each reservation is taken in
+    arrival order, waiting callers are served first come, first served.
+    """
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self._clock = clock
+        self._level = float(capacity)
+        self._updated = clock()
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units could be taken. Call with the owner's lock held."""
+        self._refill()
+        deficit = min(float(amount), self.capacity) - self._level
+        return max(0.0, deficit / self.rate)
+
+    def take(self, amount):
+        """Reserve `amount` units, possibly going into debt. Call with the owner's lock held."""
+        self._refill()
+        self._level -= min(float(amount), self.capacity)
+
+    def give_back(self, amount):
+        """Return unused units, e.g. when a reservation is abandoned."""
+        self._refill()
+        self._level = min(self.capacity, self._level + min(float(amount), self.capacity))
+
+    def _refill(self):
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class ProviderRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one provider.
+
+    acquire() reserves one request and the estimated tokens, then sleeps until
+    both buckets cover the reservation. Instead of bursting into 429 errors,
+    excess requests queue up. Once `max_queue` requests are already waiting,
+    or the wait would exceed `max_wait` seconds, the request is rejected
+    straight away with RateLimitExceeded.
+    """
+
+    def __init__(self, provider, rpm=0, tpm=0, max_queue=32, max_wait=30.0, clock=time.monotonic,
+                 sleep=time.sleep):
+        """
+        Args:
+            provider (str): Provider name, used in messages
+            rpm (int): Requests per minute; 0 means unlimited
+            tpm (int): Tokens per minute; 0 means unlimited
+            max_queue (int): Requests allowed to wait at the same time
+            max_wait (float): Longest a request may wait, in seconds
+        """
+        self.provider = provider
+        self.limits = (rpm, tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm, rpm / 60.0, clock) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm, tpm / 60.0, clock) if tpm > 0 else None
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    @property
+    def enabled(self):
+        return self._requests is not None or self._tokens is not None
+
+    def acquire(self, tokens=0, max_wait=None):
+        """
+        Wait until the provider's quota allows one more request.
+
+        Args:
+            tokens (int): Estimated tokens the request will use (prompt and output)
+            max_wait (float): Tighter wait bound for this request, e.g. its remaining deadline
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the queue is full or the wait would be too long
+        """
+        delay = self._reserve(tokens, max_wait)
+        if delay > 0:
+            try:
+                self._sleep(delay)
+            finally:
+                self._leave_queue()
+        return delay
+
+    async def acquire_async(self, tokens=0, max_wait=None):
+        """
+        Async version of acquire(); waits without blocking the event loop.
+
+        A cancelled waiter hands its reservation back.
+        """
+        delay = self._reserve(tokens, max_wait)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._release(tokens)
+                raise
+            finally:
+                self._leave_queue()
+        return delay
+
+    def stats(self):
+        """
+        Return queue and wait statistics.
+
+        Returns:
+            dict: Current queue depth and counters for admitted, rejected and delayed requests
+        """
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "waited": self.waited,
+                "avg_wait_seconds": self.total_wait / self.waited if self.waited else 0.0,
+                "max_wait_seconds": self.max_observed_wait,
+            }
+
+    def _reserve(self, tokens, max_wait=None):
+        """Take a reservation and return how long the caller must sleep."""
+        if not self.enabled:
+            with self._lock:
+                self.admitted += 1
+            return 0.0
+        with self._lock:
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.wait_time(1))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.wait_time(tokens))
+
+            if delay > 0 and self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise RateLimitExceeded(
+                    f"{self.provider} request queue is full ({self.max_queue} waiting). "
+                    f"Please try again in {delay:.0f} seconds.",
+                    provider=self.provider, reason="queue_full", retry_after=delay,
+                )
+            if max_wait is None or max_wait > self.max_wait:
+                max_wait = self.max_wait
+            if delay > max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(
+                    f"{self.provider} rate limit reached; the next slot is {delay:.0f} seconds away.",
+                    provider=self.provider, reason="wait_too_long", retry_after=delay,
+                )
+
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            self.admitted += 1
+            if delay > 0:
+                self.queue_depth += 1
+                self.waited += 1
+                self.total_wait += delay
+                self.max_observed_wait = max(self.max_observed_wait, delay)
+            return delay
+
+    def _leave_queue(self):
+        with self._lock:
+            self.queue_depth -= 1
+
+    def _release(self, tokens):
+        with self._lock:
+            if self._requests is not None:
+                self._requests.give_back(1)
+            if self._tokens is not None:
+                self._tokens.give_back(tokens)
@@ -0,0 +1,216 @@
+"""
+Retry policy for Student AI Travel Planner
+This module retries transient AI provider errors with jittered exponential backoff inside a deadline.
+"""
+
+import asyncio
+import random
+import time
+
+# HTTP status codes worth retrying: rate limited, or a server-side failure
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's overall deadline has passed."""
+
+
+class MalformedResponseError(Exception):
+    """
+    Raised when the AI answered with text that cannot be parsed as an itinerary.
+
+    Attributes:
+        text (str): The raw response, kept so the caller can still fall back on it
+    """
+
+    def __init__(self, text):
+        super().__init__("The AI response could not be parsed as an itinerary")
+        self.text = text
+
+
+class Deadline:
+    """
+    An end-to-end time budget for one request.
+
+    Every attempt, backoff sleep and provider timeout is cut to what is left,
+    so the request as a whole never runs past its budget.
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        """
+        Args:
+            seconds (float): Time budget from now, or None for no deadline
+        """
+        self._clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+
+    def remaining(self):
+        """
+        Seconds left.
+
+        Returns:
+            float: Seconds (never negative), or None if there is no deadline
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self):
+        """Whether the deadline has passed."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        """
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self.expired():
+            raise DeadlineExceeded("The request ran out of time before the AI provider answered.")
+
+
+def status_code(error):
+    """Return the HTTP status code carried by a provider SDK error, if any."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error):
+    """
+    Decide whether an error is transient and worth another attempt.
+
+    Timeouts, dropped connections, 429 and 5xx responses and malformed
+    responses are retryable. Configuration errors, client-side rate limit
+    rejections and an expired deadline are not.
+
+    Args:
+        error (Exception): The error raised by an attempt
+
+    Returns:
+        bool: True if the call should be retried
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (MalformedResponseError, TimeoutError, ConnectionError)):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    # SDK exceptions without a status code (openai.APITimeoutError,
+    # openai.APIConnectionError, httpx.ReadTimeout, api_core.DeadlineExceeded)
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name or name == "DeadlineExceeded"
+
+
+def retry_after(error):
+    """
+    Return the server's Retry-After hint in seconds, if the error carries one.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between 0 and
+    min(max_delay, base_delay * 2 ** n) seconds, or the server's Retry-After
+    hint if that is longer. Spreading retries out this way keeps many clients
+    from hammering a recovering provider at the same moment.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, sleep=time.sleep, rng=random.random):
+        """
+        Args:
+            max_attempts (int): Total attempts, including the first one
+            base_delay (float): Backoff before the first retry, in seconds
+            max_delay (float): Upper bound for a single backoff, in seconds
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._rng = rng
+        self.retries = 0
+
+    def backoff(self, retry, error=None):
+        """
+        Seconds to wait before a retry.
+
+        Args:
+            retry (int): 0 for the first retry, 1 for the second, ...
+            error (Exception): The error that caused the retry
+
+        Returns:
+            float: Seconds
+        """
+        delay = self._rng() * min(self.max_delay, self.base_delay * (2 ** retry))
+        hint = retry_after(error) if error is not None else None
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        return delay
+
+    def call(self, func, deadline=None, retryable=is_retryable):
+        """
+        Call func(deadline) until it succeeds, retrying transient errors.
+
+        Args:
+            func (callable): Called with the Deadline; performs one attempt
+            deadline (Deadline): Overall time budget; None means no deadline
+            retryable (callable): Classifies errors; defaults to is_retryable
+
+        Returns:
+            object: The first successful result
+
+        Raises:
+            Exception: The last error, once it is not retryable, the attempts
+                are used up, or the backoff would run past the deadline
+        """
+        deadline = deadline or Deadline()
+        for attempt in range(self.max_attempts):
+            deadline.check()
+            try:
+                return func(deadline)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline, retryable)
+                if delay is None:
+                    raise
+            self._sleep(delay)
+
+    async def call_async(self, coro_func, deadline=None, retryable=is_retryable):
+        """
+        Async version of call(); coro_func(deadline) returns a coroutine.
+        """
+        deadline = deadline or Deadline()
+        for attempt in range(self.max_attempts):
+            deadline.check()
+            try:
+                return await coro_func(deadline)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline, retryable)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def _next_delay(self, attempt, error, deadline, retryable):
+        """Return the backoff before the next attempt, or None to give up."""
+        if attempt + 1 >= self.max_attempts or not retryable(error):
+            return None
+        delay = self.backoff(attempt, error)
+        remaining = deadline.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        self.retries += 1
+        return delay
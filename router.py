@@ -0,0 +1,621 @@
+"""
+Provider routing for Student AI Travel Planner
+This module tracks the health of each AI provider and decides which one serves a request.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# Seconds the current provider call spent waiting inside this process
+_local_waits = contextvars.ContextVar("provider_local_waits", default=None)
+
+
+class NoProviderAvailableError(Exception):
+    """Raised when every provider's circuit breaker is open."""
+
+
+def exclude_from_latency(seconds):
+    """
+    Leave time spent waiting locally out of the running provider call's latency.
+
+    Provider functions call this after waiting in this process, e.g. on a
+    client-side rate limiter, so queueing does not look like a slow provider
+    and push up hedge delays or latency-based routing.
+
+    Args:
+        seconds (float): Time spent waiting
+    """
+    waits = _local_waits.get()
+    if waits is not None and seconds:
+        waits.append(seconds)
+
+
+class _CallTimer:
+    """Time one provider call, minus the waits it reported with exclude_from_latency()."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._waits = []
+        self._token = _local_waits.set(self._waits)
+
+    def elapsed(self):
+        """Seconds the provider itself took so far."""
+        return max(0.0, time.monotonic() - self.started - sum(self._waits))
+
+    def stop(self):
+        """Stop collecting waits; later calls to exclude_from_latency() are ignored."""
+        if self._token is not None:
+            try:
+                _local_waits.reset(self._token)
+            except ValueError:
+                # Stopped from another context (e.g. a stream resumed elsewhere)
+                pass
+            self._token = None
+
+
+class CircuitBreaker:
+    """
+    Stop sending traffic to a provider after repeated failures.
+
+    closed    -> requests flow; consecutive failures are counted
+    open      -> requests are rejected until `reset_timeout` has passed
+    half_open -> one trial request is let through; success closes the
+                 breaker, failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        """Current state, moving from open to half_open once the cooldown has passed."""
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self):
+        """
+        Decide whether a request may go to this provider now.
+
+        Returns:
+            bool: True if the request may proceed
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker and reset the failure count."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial slot without recording an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+
+class ProviderHealth:
+    """Rolling latency and error statistics for one provider."""
+
+    def __init__(self, name, window=50, breaker=None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, latency, ok):
+        """
+        Record the outcome of one call.
+
+        Args:
+            latency (float): Seconds the call took
+            ok (bool): Whether it succeeded
+        """
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.failures += 1
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def latency_percentile(self, percentile):
+        """
+        Return a latency percentile over the rolling window of successful calls.
+
+        Args:
+            percentile (float): 0-100
+
+        Returns:
+            float: Seconds, or None if there are no samples yet
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def sample_count(self):
+        """Number of successful calls in the rolling latency window."""
+        with self._lock:
+            return len(self._latencies)
+
+    def error_rate(self):
+        """Share of failed calls in the rolling window."""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def score(self):
+        """
+        Routing cost: median latency inflated by the recent error rate.
+
+        Providers that have not been called yet score 0 so they are tried and
+        measured; providers with only failures sort last.
+        """
+        median = self.latency_percentile(50)
+        if median is None:
+            return float("inf") if self.failures else 0.0
+        return median * (1.0 + 4.0 * self.error_rate())
+
+    def snapshot(self):
+        """Return the provider's statistics as a dict."""
+        return {
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 3),
+            "p50_seconds": self.latency_percentile(50),
+            "p95_seconds": self.latency_percentile(95),
+        }
+
+
+class ProviderRouter:
+    """
+    Send each request to the best available provider, falling back on failure.
+
+    Modes:
+        single   - only the primary provider
+        failover - the primary provider first, then the others in order
+        latency  - healthy providers ordered by rolling latency and error rate
+
+    Providers whose circuit breaker is open are skipped. A request is tried
+    on each remaining provider in order until one succeeds.
+    """
+
+    def __init__(self, providers, mode="failover", failure_threshold=3, reset_timeout=30.0, window=50,
+                 local_errors=()):
+        """
+        Args:
+            providers (list): Provider names; the first one is the primary
+            mode (str): "single", "failover" or "latency"
+            failure_threshold (int): Consecutive failures that open a breaker
+            reset_timeout (float): Seconds before an open breaker allows a trial
+            window (int): Number of recent calls kept per provider
+            local_errors (tuple): Exception types raised before a request leaves
+                this process (e.g. a missing API key or a full client-side rate
+                limit queue); they fall through to the next provider without
+                counting against the provider's health
+        """
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        if mode not in ("single", "failover", "latency"):
+            raise ValueError(f"Unknown routing mode '{mode}'. Use 'single', 'failover' or 'latency'.")
+        self.mode = mode
+        self.local_errors = tuple(local_errors)
+        self.providers = list(providers[:1]) if mode == "single" else list(providers)
+        self.health = {
+            name: ProviderHealth(name, window, CircuitBreaker(failure_threshold, reset_timeout))
+            for name in self.providers
+        }
+        self._hedge_lock = threading.Lock()
+        self.hedges_launched = 0
+        self.hedges_won = 0
+
+    def ordered_providers(self):
+        """
+        Return providers in the order they should be tried, ignoring breakers.
+
+        Returns:
+            list: Provider names
+        """
+        if self.mode == "latency":
+            return sorted(self.providers, key=lambda name: self.health[name].score())
+        return list(self.providers)
+
+    def _admitted(self):
+        """Yield providers in routing order whose breakers let a request through."""
+        for name in self.ordered_providers():
+            if self.health[name].breaker.allow_request():
+                yield name
+
+    def call(self, func):
+        """
+        Run func(provider) on the best provider, falling back on failure.
+
+        Args:
+            func (callable): Called with a provider name; returns the result
+
+        Returns:
+            object: The first successful result
+
+        Raises:
+            Exception: The last provider error, or NoProviderAvailableError
+                if every breaker is open
+        """
+        last_error = None
+        for name in self._admitted():
+            timer = _CallTimer()
+            try:
+                result = func(name)
+            except Exception as e:
+                self._record_failure(name, timer.elapsed(), e)
+                last_error = e
+                continue
+            except BaseException:
+                self.health[name].breaker.release_trial()
+                raise
+            finally:
+                timer.stop()
+            self.health[name].record(timer.elapsed(), True)
+            return result
+        raise last_error or self._unavailable()
+
+    async def call_async(self, coro_func):
+        """
+        Async version of call(); coro_func(provider) returns a coroutine.
+        """
+        last_error = None
+        for name in self._admitted():
+            timer = _CallTimer()
+            try:
+                result = await coro_func(name)
+            except Exception as e:
+                self._record_failure(name, timer.elapsed(), e)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled: no outcome to record, but the trial slot must be freed
+                self.health[name].breaker.release_trial()
+                raise
+            finally:
+                timer.stop()
+            self.health[name].record(timer.elapsed(), True)
+            return result
+        raise last_error or self._unavailable()
+
+    def stream(self, stream_func):
+        """
+        Stream from the best provider, falling back only before the first chunk.
+
+        Once a provider has produced output the stream is committed to it;
+        a later failure is raised to the caller.
+
+        Args:
+            stream_func (callable): Called with a provider name; returns an iterator of chunks
+
+        Yields:
+            str: Chunks from the provider that answered
+        """
+        last_error = None
+        for name in self._admitted():
+            # Local waits happen before the first chunk, so the timer only
+            # collects them until then
+            timer = _CallTimer()
+            try:
+                chunks = iter(stream_func(name))
+                first = next(chunks, None)
+            except Exception as e:
+                self._record_failure(name, timer.elapsed(), e)
+                last_error = e
+                continue
+            except BaseException:
+                self.health[name].breaker.release_trial()
+                raise
+            finally:
+                timer.stop()
+            try:
+                if first is not None:
+                    yield first
+                    yield from chunks
+            except Exception:
+                self.health[name].record(timer.elapsed(), False)
+                raise
+            except BaseException:
+                # Closed early by the consumer (GeneratorExit): free the trial slot
+                self.health[name].breaker.release_trial()
+                raise
+            self.health[name].record(timer.elapsed(), True)
+            return
+        raise last_error or self._unavailable()
+
+    def hedge_delay(self, provider, percentile=95, default=5.0, minimum=0.5, min_samples=10):
+        """
+        How long to wait on a provider before hedging it.
+
+        Args:
+            provider (str): Provider whose latency is measured
+            percentile (float): Latency percentile to wait for, 0-100
+            default (float): Delay used until there are min_samples measurements
+            minimum (float): Lower bound, so fast providers are not hedged on every jitter
+            min_samples (int): Measurements needed before the percentile is trusted
+
+        Returns:
+            float: Seconds
+        """
+        health = self.health[provider]
+        if health.sample_count() < min_samples:
+            return max(default, minimum)
+        return max(health.latency_percentile(percentile), minimum)
+
+    def call_hedged(self, func, delay, max_hedges=1, accept=None):
+        """
+        Run func(provider) on the best provider, racing the next one if it is slow.
+
+        If no valid answer has arrived after `delay` seconds, the same call is
+        started on the next admitted provider, up to `max_hedges` extra calls.
+        A provider that fails is replaced immediately, as in call(), without
+        using the hedge budget. The first valid result wins; calls that have
+        not started yet are cancelled and calls already running are abandoned
+        (a blocking HTTP request cannot be interrupted from another thread),
+        their outcome still feeding the provider's health.
+
+        Args:
+            func (callable): Called with a provider name; returns the result
+            delay (float or callable): Seconds to wait before hedging, or a
+                function of the provider name returning it
+            max_hedges (int): Extra calls allowed for this request; 0 behaves like call()
+            accept (callable): Optional check of a result; rejected results do
+                not win the race, but the first one is returned if nothing better arrives
+
+        Returns:
+            object: The first valid result
+
+        Raises:
+            Exception: The last provider error, or NoProviderAvailableError
+                if every breaker is open
+        """
+        candidates = self._admitted()
+        hedges_left = max(0, int(max_hedges))
+        # A pool per call, sized to the calls that can run at once, so
+        # concurrent requests never queue behind each other's hedges
+        executor = ThreadPoolExecutor(max_workers=hedges_left + 1, thread_name_prefix="provider-hedge")
+        pending = {}
+        launched = []
+        last_error = None
+        rejected = None
+
+        def launch():
+            name = next(candidates, None)
+            if name is not None:
+                launched.append(name)
+                # Run in a copy of the caller's context so context-scoped state
+                # (such as token usage tracking) follows the call
+                context = contextvars.copy_context()
+                pending[executor.submit(context.run, self._timed_call, name, func)] = name
+            return name
+
+        primary = launch()
+        try:
+            while pending:
+                timeout = None
+                if hedges_left:
+                    # Wait as long as the newest call usually takes; the
+                    # primary may already have failed and been replaced
+                    timeout = delay(launched[-1]) if callable(delay) else delay
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if launch() is None:
+                        hedges_left = 0
+                    else:
+                        hedges_left -= 1
+                        self._count_hedge()
+                    continue
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if accept is None or accept(result):
+                        if name != primary:
+                            self._count_hedge(won=True)
+                        return result
+                    if rejected is None:
+                        rejected = (result,)
+                if not pending:
+                    launch()
+        finally:
+            for future, name in pending.items():
+                if future.cancel():
+                    # Never started, so its half-open trial (if any) is unused
+                    self.health[name].breaker.release_trial()
+            # Calls already running finish on their own threads
+            executor.shutdown(wait=False)
+
+        if rejected is not None:
+            return rejected[0]
+        raise last_error or self._unavailable()
+
+    async def call_hedged_async(self, coro_func, delay, max_hedges=1, accept=None):
+        """
+        Async version of call_hedged(); coro_func(provider) returns a coroutine.
+
+        Losing calls are cancelled, which also closes their HTTP requests.
+        """
+        candidates = self._admitted()
+        pending = {}
+        launched = []
+        last_error = None
+        rejected = None
+        hedges_left = max(0, int(max_hedges))
+
+        def launch():
+            name = next(candidates, None)
+            if name is not None:
+                launched.append(name)
+                pending[asyncio.ensure_future(self._timed_call_async(name, coro_func))] = name
+            return name
+
+        primary = launch()
+        try:
+            while pending:
+                timeout = None
+                if hedges_left:
+                    # Wait as long as the newest call usually takes; the
+                    # primary may already have failed and been replaced
+                    timeout = delay(launched[-1]) if callable(delay) else delay
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch() is None:
+                        hedges_left = 0
+                    else:
+                        hedges_left -= 1
+                        self._count_hedge()
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if accept is None or accept(result):
+                        if name != primary:
+                            self._count_hedge(won=True)
+                        return result
+                    if rejected is None:
+                        rejected = (result,)
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if rejected is not None:
+            return rejected[0]
+        raise last_error or self._unavailable()
+
+    def _timed_call(self, name, func):
+        """Run func(name), recording its latency and outcome."""
+        timer = _CallTimer()
+        try:
+            result = func(name)
+        except Exception as e:
+            self._record_failure(name, timer.elapsed(), e)
+            raise
+        except BaseException:
+            self.health[name].breaker.release_trial()
+            raise
+        finally:
+            timer.stop()
+        self.health[name].record(timer.elapsed(), True)
+        return result
+
+    async def _timed_call_async(self, name, coro_func):
+        """Await coro_func(name), recording its latency and outcome; cancellation is not recorded."""
+        timer = _CallTimer()
+        try:
+            result = await coro_func(name)
+        except Exception as e:
+            self._record_failure(name, timer.elapsed(), e)
+            raise
+        except BaseException:
+            self.health[name].breaker.release_trial()
+            raise
+        finally:
+            timer.stop()
+        self.health[name].record(timer.elapsed(), True)
+        return result
+
+    def _count_hedge(self, won=False):
+        with self._hedge_lock:
+            if won:
+                self.hedges_won += 1
+            else:
+                self.hedges_launched += 1
+
+    def hedge_stats(self):
+        """
+        Return hedging counters.
+
+        Returns:
+            dict: hedges launched, hedges that returned first, and the win rate
+        """
+        with self._hedge_lock:
+            launched, won = self.hedges_launched, self.hedges_won
+        return {
+            "launched": launched,
+            "won": won,
+            "win_rate": won / launched if launched else 0.0,
+        }
+
+    def _record_failure(self, name, elapsed, error):
+        """Count a provider failure, unless the error never reached the provider."""
+        if isinstance(error, self.local_errors):
+            self.health[name].breaker.release_trial()
+            return
+        self.health[name].record(elapsed, False)
+
+    def snapshot(self):
+        """
+        Return per-provider health for debugging and monitoring.
+
+        Returns:
+            dict: provider name -> statistics dict
+        """
+        return {name: self.health[name].snapshot() for name in self.providers}
+
+    def _unavailable(self):
+        return NoProviderAvailableError(
+            "All AI providers are temporarily unavailable after repeated failures. Please try again shortly."
+        )
@@ -0,0 +1,229 @@
+"""
+Unit Tests for the AI client wrapper
+These tests replace the provider SDKs with fakes, so no API keys or network are needed.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import ai_client
+
+STREAM_CHUNKS = ['{"itinerary": ', '[], ', '"summary": "ok"}']
+
+
+class FakeOpenAIClient:
+    """Stand-in for openai.OpenAI that records how often it is constructed."""
+
+    instances = []
+
+    def __init__(self, api_key=None, base_url=None, **kwargs):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat))
+        self.responses = SimpleNamespace(create=self._create_response)
+        FakeOpenAIClient.instances.append(self)
+
+    def _create_chat(self, stream=False, **kwargs):
+        if stream:
+            return iter(
+                [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+                 for text in STREAM_CHUNKS]
+                + [SimpleNamespace(choices=[])]
+            )
+        message = SimpleNamespace(content='{"itinerary": [], "summary": "ok"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _create_response(self, stream=False, **kwargs):
+        events = [SimpleNamespace(type="response.created")]
+        events += [SimpleNamespace(type="response.output_text.delta", delta=text) for text in STREAM_CHUNKS]
+        events.append(SimpleNamespace(type="response.completed"))
+        return iter(events)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncOpenAIClient(FakeOpenAIClient):
+    """Stand-in for openai.AsyncOpenAI with awaitable calls."""
+
+    async def _create_chat(self, **kwargs):
+        await asyncio.sleep(0.01)
+        return FakeOpenAIClient._create_chat(self, **kwargs)
+
+
+def _fake_openai_module():
+    FakeOpenAIClient.instances = []
+    return SimpleNamespace(OpenAI=FakeOpenAIClient, AsyncOpenAI=FakeAsyncOpenAIClient)
+
+
+def test_client_is_reused_across_calls():
+    """Repeated calls with the same key share a single pooled client."""
+    print("\n🔍 Testing client pooling...")
+    ai_client.close_clients()
+    with mock.patch.object(ai_client, "openai", _fake_openai_module(), create=True):
+        for _ in range(5):
+            ai_client._call_openai("prompt", "key-1")
+        assert len(FakeOpenAIClient.instances) == 1, "Client should be built once"
+
+        ai_client._call_openai("prompt", "key-2")
+        assert len(FakeOpenAIClient.instances) == 2, "A different API key needs its own client"
+
+        groq = ai_client._get_client("groq", "key-1", ai_client.GROQ_BASE_URL)
+        assert groq.base_url == ai_client.GROQ_BASE_URL
+        assert len(FakeOpenAIClient.instances) == 3, "Base URL is part of the pool key"
+    ai_client.close_clients()
+    print("✅ Client pooling tests passed!")
+
+
+def test_client_pool_is_thread_safe():
+    """Concurrent first calls still create exactly one client."""
+    print("\n🔍 Testing concurrent client creation...")
+    ai_client.close_clients()
+    with mock.patch.object(ai_client, "openai", _fake_openai_module(), create=True):
+        barrier = threading.Barrier(16)
+
+        def worker():
+            barrier.wait()
+            ai_client._get_client("openai", "shared-key")
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(FakeOpenAIClient.instances) == 1, "Only one client should be created"
+    ai_client.close_clients()
+    print("✅ Concurrent client creation tests passed!")
+
+
+def test_close_clients():
+    """close_clients() closes pooled clients and empties the pool."""
+    print("\n🔍 Testing client shutdown...")
+    ai_client.close_clients()
+    with mock.patch.object(ai_client, "openai", _fake_openai_module(), create=True):
+        client = ai_client._get_client("openai", "key")
+        ai_client.close_clients()
+        assert client.closed, "Pooled client should be closed"
+        assert ai_client._get_client("openai", "key") is not client, "Pool should rebuild after close"
+    ai_client.close_clients()
+    print("✅ Client shutdown tests passed!")
+
+
+def test_async_calls_share_one_client_per_loop():
+    """Concurrent async calls on one event loop reuse a single async client."""
+    print("\n🔍 Testing async provider calls...")
+    ai_client.close_clients()
+
+    async def run_batch():
+        results = await asyncio.gather(
+            *(ai_client._call_openai_async("prompt", "key") for _ in range(20))
+        )
+        return results
+
+    with mock.patch.object(ai_client, "openai", _fake_openai_module(), create=True):
+        results = asyncio.run(run_batch())
+        assert len(results) == 20
+        assert all(result.startswith("{") for result in results)
+        assert len(FakeOpenAIClient.instances) == 1, "One async client per event loop"
+
+        asyncio.run(run_batch())
+        assert len(FakeOpenAIClient.instances) == 2, "A new event loop gets its own client"
+    ai_client.close_clients()
+    print("✅ Async provider call tests passed!")
+
+
+class FakeGeminiModel:
+    """Stand-in for genai.GenerativeModel that reports which async client served a call."""
+
+    def __init__(self, model_name):
+        self._async_client = None
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return SimpleNamespace(text=str(id(self._async_client)), usage_metadata=None)
+
+
+def test_gemini_async_client_per_loop():
+    """Each event loop gets its own Gemini async client; calls on one loop share it."""
+    print("\n🔍 Testing Gemini async clients...")
+    ai_client.close_clients()
+    made = []
+
+    def make_client(name):
+        made.append(object())
+        return made[-1]
+
+    genai = SimpleNamespace(configure=lambda **kwargs: None, GenerativeModel=FakeGeminiModel)
+    genai_client = SimpleNamespace(_client_manager=SimpleNamespace(make_client=make_client))
+
+    async def run_batch():
+        return set(await asyncio.gather(*(ai_client._call_gemini_async("prompt", "key") for _ in range(5))))
+
+    with mock.patch.object(ai_client, "genai", genai, create=True), \
+         mock.patch.object(ai_client, "genai_client", genai_client, create=True), \
+         mock.patch.object(ai_client, "get_base_url", return_value=None):
+        first = asyncio.run(run_batch())
+        second = asyncio.run(run_batch())
+    assert len(first) == 1 and len(second) == 1, "Calls on one loop share a client"
+    assert first != second, "A new event loop must not reuse the first loop's grpc.aio client"
+    assert len(made) == 2
+    ai_client.close_clients()
+    print("✅ Gemini async client tests passed!")
+
+
+def test_gemini_async_client_factory():
+    """The SDK still has the private factory per-loop clients rely on; without it each call gets a new model."""
+    print("\n🔍 Testing the Gemini async client factory...")
+    if ai_client.GEMINI_AVAILABLE:
+        assert callable(ai_client._gemini_async_client_factory()), \
+            "google-generativeai no longer has _client_manager.make_client; update _create_async_client"
+
+    ai_client.close_clients()
+    models = []
+
+    def make_model(model_name):
+        models.append(FakeGeminiModel(model_name))
+        return models[-1]
+
+    genai = SimpleNamespace(configure=lambda **kwargs: None, GenerativeModel=make_model)
+
+    async def run_batch():
+        return await asyncio.gather(*(ai_client._call_gemini_async("prompt", "key") for _ in range(3)))
+
+    with mock.patch.object(ai_client, "genai", genai, create=True), \
+         mock.patch.object(ai_client, "genai_client", SimpleNamespace(), create=True), \
+         mock.patch.object(ai_client, "get_base_url", return_value=None):
+        asyncio.run(run_batch())
+    assert len(models) == 4, "One shared sync model plus a new model per async call"
+    ai_client.close_clients()
+    print("✅ Gemini async client factory tests passed!")
+
+
+def test_stream_itinerary():
+    """Streaming yields provider chunks in order for OpenAI and Groq."""
+    print("\n🔍 Testing streamed responses...")
+    ai_client.close_clients()
+    with mock.patch.object(ai_client, "openai", _fake_openai_module(), create=True), \
+            mock.patch.object(ai_client, "get_api_key", return_value="key"), \
+            mock.patch.object(ai_client, "get_groq_model", return_value="openai/gpt-oss-20b"):
+        for provider in ("openai", "groq"):
+            with mock.patch.object(ai_client, "get_provider", return_value=provider):
+                chunks = list(ai_client.stream_itinerary("prompt"))
+            assert chunks == STREAM_CHUNKS, f"{provider} should stream every text chunk"
+    ai_client.close_clients()
+    print("✅ Streamed response tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting AI Client Tests")
+    print("=" * 60)
+    test_client_is_reused_across_calls()
+    test_client_pool_is_thread_safe()
+    test_close_clients()
+    test_async_calls_share_one_client_per_loop()
+    test_gemini_async_client_per_loop()
+    test_gemini_async_client_factory()
+    test_stream_itinerary()
+    print("\n🎉 All AI client tests completed successfully!")
@@ -0,0 +1,151 @@
+"""
+Unit Tests for batch trip planning
+These tests run plan_trips against a fake provider and check concurrency, ordering and errors.
+"""
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import planner
+from ai_client import _get_dummy_response
+from batch import plan_trips, plan_trips_async
+
+
+def _requests(count, **overrides):
+    for i in range(count):
+        request = {"id": i, "destination": "Paris", "duration": 1 + i % 5, "budget": 100 + i,
+                   "interests": ["food"], "transport": "metro", "stay": "hostel"}
+        request.update(overrides)
+        yield request
+
+
+class ConcurrencyProbe:
+    """A fake generate_itinerary that records how many calls overlap."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def __call__(self, prompt, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return _get_dummy_response()
+
+
+def test_bounded_concurrency_and_all_results():
+    """Every request yields one result and no more than N run at once."""
+    print("\n🔍 Testing bounded concurrency...")
+    probe = ConcurrencyProbe()
+    with mock.patch.object(planner, "generate_itinerary", probe):
+        results = list(plan_trips(_requests(20), concurrency=4, use_cache=False))
+    assert sorted(result.index for result in results) == list(range(20))
+    assert all(result.error is None and isinstance(result.itinerary, list) for result in results)
+    assert results[0].request["id"] == results[0].index, "The original request is kept"
+    assert probe.peak <= 4 and probe.calls == 20
+    print("✅ Bounded concurrency tests passed!")
+
+
+def test_completion_order_and_per_item_errors():
+    """Fast items come back first, and bad items fail alone."""
+    print("\n🔍 Testing completion order and errors...")
+
+    def generate(prompt, **kwargs):
+        time.sleep(0.2 if "5 days" in prompt else 0.01)
+        if "Atlantis" in prompt:
+            raise RuntimeError("401 Unauthorized")
+        return _get_dummy_response()
+
+    requests = [
+        {"destination": "Rome", "duration": 5, "budget": 500, "interests": ["art"], "transport": "bus", "stay": "hostel"},
+        {"destination": "Rome", "duration": 2, "budget": 200, "interests": ["art"], "transport": "bus", "stay": "hostel"},
+        {"destination": "", "duration": 2, "budget": 200, "interests": ["art"], "transport": "bus", "stay": "hostel"},
+        {"destination": "Atlantis", "duration": 2, "budget": 200, "interests": ["art"], "transport": "bus", "stay": "hostel"},
+        {"destination": "Rome"},
+        "not a trip",
+    ]
+    with mock.patch.object(planner, "generate_itinerary", side_effect=generate):
+        results = list(plan_trips(requests, concurrency=6, use_cache=False))
+    by_index = {result.index: result for result in results}
+    assert results[-1].index == 0, "The slow 5-day trip finishes last"
+    assert by_index[1].error is None
+    assert "Destination cannot be empty" in by_index[2].error
+    assert "401" in by_index[3].error and by_index[3].summary.startswith("Unable")
+    assert "missing" in by_index[4].error
+    assert "JSON object" in by_index[5].error
+    print("✅ Completion order and error tests passed!")
+
+
+def test_input_is_read_lazily():
+    """Only about `concurrency` requests are pulled from the input ahead of the consumer."""
+    print("\n🔍 Testing lazy input...")
+    pulled = []
+
+    def source():
+        for request in _requests(10_000):
+            pulled.append(request["id"])
+            yield request
+
+    with mock.patch.object(planner, "generate_itinerary", ConcurrencyProbe(delay=0)):
+        results = plan_trips(source(), concurrency=3, use_cache=False)
+        first = [next(results) for _ in range(5)]
+        results.close()
+    assert len(first) == 5
+    assert len(pulled) <= 5 + 3, "The batch must not read the whole input up front"
+    print("✅ Lazy input tests passed!")
+
+
+def test_queue_full_items_wait_and_retry():
+    """A trip rejected by a full rate limit queue is retried after retry_after."""
+    print("\n🔍 Testing queue-full backpressure...")
+    outcomes = [({"error": "queue full", "reason": "queue_full", "retry_after": 0.01}, "busy"),
+                (["day 1"], "ok")]
+    with mock.patch.object(planner, "plan_trip", side_effect=lambda **kw: outcomes.pop(0)):
+        [result] = list(plan_trips(_requests(1), concurrency=1))
+    assert result.itinerary == ["day 1"] and result.error is None
+    print("✅ Queue-full backpressure tests passed!")
+
+
+def test_plan_trips_async():
+    """The async batch bounds concurrency on the event loop."""
+    print("\n🔍 Testing async batch...")
+    active = 0
+    peak = 0
+
+    async def generate(prompt, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return _get_dummy_response()
+
+    async def run():
+        return [result async for result in plan_trips_async(_requests(12), concurrency=5, use_cache=False)]
+
+    with mock.patch.object(planner, "generate_itinerary_async", generate):
+        results = asyncio.run(run())
+    assert sorted(result.index for result in results) == list(range(12))
+    assert all(result.error is None for result in results)
+    assert peak <= 5
+    print("✅ Async batch tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Batch Planning Tests")
+    print("=" * 50)
+    test_bounded_concurrency_and_all_results()
+    test_completion_order_and_per_item_errors()
+    test_input_is_read_lazily()
+    test_queue_full_items_wait_and_retry()
+    test_plan_trips_async()
+    print("\n🎉 All batch tests completed!")
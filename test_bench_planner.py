@@ -0,0 +1,85 @@
+"""
+Unit Tests for the planner benchmark suite
+These tests run the benchmark cases briefly and check the baseline comparison.
+"""
+
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+
+import bench_planner
+import planner
+
+
+def test_cases_cover_hot_path():
+    """Every hot-path function is benchmarked at every size, and the cases really work."""
+    print("\n🔍 Testing benchmark cases...")
+    cases = bench_planner.build_cases(sizes=(1, 30))
+    for name in ("create_prompt/30d", "parse/clean/1d", "parse/fenced/30d", "parse/noisy/30d",
+                 "parse/truncated/30d", "validate/30d", "total_cost/30d", "format_currency/JPY"):
+        assert name in cases, name
+
+    itinerary, _ = cases["parse/fenced/30d"]()
+    assert len(itinerary) == 30, "Fenced responses parse to the full itinerary"
+    itinerary, summary = cases["parse/truncated/30d"]()
+    assert "Unable to parse" in summary, "Truncated responses take the fallback path"
+    assert cases["validate/30d"]() is True
+
+    with bench_planner.offline_provider(sizes=(3,)):
+        itinerary, summary = bench_planner.build_plan_trip_cases(sizes=(3,))["plan_trip/3d"]()
+    assert len(itinerary) == 3 and "Lisbon" in summary, "plan_trip is served by the replay provider"
+    assert planner.get_provider() != "replay", "The configured provider is restored"
+    print("✅ Benchmark case tests passed!")
+
+
+def test_measure():
+    """measure() calibrates loops and reports per-call times."""
+    print("\n🔍 Testing measure...")
+    result = bench_planner.measure(lambda: sum(range(100)), repeat=3, min_time=0.005)
+    assert result["loops"] > 1
+    assert 0 < result["best"] <= result["median"] < 0.005
+    print("✅ Measure tests passed!")
+
+
+def test_compare_flags_regressions():
+    """Cases slower than the baseline by more than the threshold regress."""
+    print("\n🔍 Testing baseline comparison...")
+    baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}, "c": {"best": 1.0}}
+    results = {"a": {"best": 1.2}, "b": {"best": 1.3}, "c": {"best": 0.5}, "d": {"best": 1.0}}
+    status = {row[0]: row[4] for row in bench_planner.compare(results, baseline, threshold=0.25)}
+    assert status == {"a": "ok", "b": "regressed", "c": "improved", "d": "new"}
+    print("✅ Comparison tests passed!")
+
+
+def test_save_and_check_baseline():
+    """--save writes a baseline; a run against a much faster baseline fails."""
+    print("\n🔍 Testing baseline files...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline.json")
+        args = ["--baseline", path, "--filter", "format_currency/USD", "--repeat", "2", "--min-time", "0.002"]
+        with redirect_stdout(io.StringIO()):
+            assert bench_planner.main(args + ["--save"]) == 0
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert "format_currency/USD" in data["results"]
+
+        data["results"]["format_currency/USD"]["best"] /= 100
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert bench_planner.main(args) == 1
+        assert "slower than baseline" in output.getvalue()
+    print("✅ Baseline file tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Planner Benchmark Tests")
+    print("=" * 50)
+    test_cases_cover_hot_path()
+    test_measure()
+    test_compare_flags_regressions()
+    test_save_and_check_baseline()
+    print("\n🎉 All benchmark tests completed!")
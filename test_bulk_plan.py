@@ -0,0 +1,129 @@
+"""
+Unit Tests for the bulk planning command line
+These tests run bulk_plan.py on temporary JSONL files with a fake AI provider.
+"""
+
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+import bulk_plan
+import planner
+from ai_client import _get_dummy_response
+from histogram import LatencyHistogram
+
+
+def _write_requests(path, count, extra_lines=()):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"trip-{i}", "destination": "Lisbon", "duration": 1 + i % 4,
+                                "budget": 150 + i, "interests": ["food"], "transport": "walking",
+                                "stay": "hostel", "currency": "EUR"}) + "\n")
+        for line in extra_lines:
+            f.write(line + "\n")
+
+
+def _read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_bulk_run_writes_one_record_per_line():
+    """Every input line produces one output record with totals and stats are printed."""
+    print("\n🔍 Testing bulk run...")
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "trips.jsonl"), os.path.join(tmp, "plans.jsonl")
+        _write_requests(source, 12, extra_lines=["", "{not json", '{"destination": "Oslo"}'])
+        log = io.StringIO()
+        with mock.patch.object(planner, "generate_itinerary", return_value=_get_dummy_response()), \
+             mock.patch("sys.stderr", log):
+            assert bulk_plan.main([source, "-o", target, "-c", "3", "--no-cache"]) == 0
+
+        records = _read_records(target)
+        assert len(records) == 14, "12 trips, one bad JSON line and one incomplete request"
+        assert sorted(record["line"] for record in records) == list(range(12)) + [13, 14]
+        good = [record for record in records if record["error"] is None]
+        assert len(good) == 12
+        assert all(record["valid"] and record["total_cost"] == 125 for record in good)
+        assert {record["id"] for record in good} == {f"trip-{i}" for i in range(12)}
+        errors = {record["line"]: record["error"] for record in records if record["error"]}
+        assert errors[13].startswith("Invalid JSON")
+        assert "missing" in errors[14]
+        report = log.getvalue()
+        assert "Planned: 14" in report and "trips/s" in report and "p99" in report
+    print("✅ Bulk run tests passed!")
+
+
+def test_resume_after_crash_writes_each_trip_once():
+    """A run interrupted midway resumes without repeating or losing trips."""
+    print("\n🔍 Testing checkpoint and resume...")
+    real_plan_trips = bulk_plan.plan_trips
+
+    def crash_after(count):
+        def plan_trips(*args, **kwargs):
+            for n, result in enumerate(real_plan_trips(*args, **kwargs)):
+                if n == count:
+                    raise KeyboardInterrupt
+                yield result
+        return plan_trips
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "trips.jsonl"), os.path.join(tmp, "plans.jsonl")
+        _write_requests(source, 30)
+        with mock.patch.object(planner, "generate_itinerary", return_value=_get_dummy_response()), \
+             mock.patch("sys.stderr", io.StringIO()):
+            with mock.patch.object(bulk_plan, "plan_trips", crash_after(17)):
+                assert bulk_plan.main([source, "-o", target, "-c", "4", "--checkpoint-every", "5",
+                                       "--no-cache"]) == 130
+            first = len(_read_records(target))
+            assert first == 17
+            checkpoint = bulk_plan.Checkpoint.load(target + ".checkpoint")
+            assert checkpoint.watermark + len(checkpoint.done) == 17
+
+            # Simulate a half-written line from a hard crash after the checkpoint
+            with open(target, "a", encoding="utf-8") as f:
+                f.write('{"line": 99, "partial')
+            assert bulk_plan.main([source, "-o", target, "-c", "4", "--resume", "--no-cache"]) == 0
+
+        records = _read_records(target)
+        assert sorted(record["line"] for record in records) == list(range(30))
+    print("✅ Checkpoint and resume tests passed!")
+
+
+def test_checkpoint_stays_compact():
+    """The checkpoint only keeps lines finished out of order above the watermark."""
+    checkpoint = bulk_plan.Checkpoint("unused")
+    for line in [1, 2, 0, 5, 3]:
+        checkpoint.mark_done(line)
+    assert checkpoint.watermark == 4 and checkpoint.done == {5}
+    assert checkpoint.is_done(2) and checkpoint.is_done(5) and not checkpoint.is_done(4)
+
+
+def test_latency_histogram_percentiles():
+    """The histogram reports percentiles within its precision."""
+    print("\n🔍 Testing latency histogram...")
+    histogram = LatencyHistogram(precision=0.01)
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+    assert histogram.count == 1000
+    assert abs(histogram.percentile(50) - 0.5) <= 0.5 * 0.011
+    assert abs(histogram.percentile(99) - 0.99) <= 0.99 * 0.011
+    assert histogram.percentile(100) == 1.0
+    other = LatencyHistogram(precision=0.01)
+    other.record(5.0)
+    histogram.merge(other)
+    assert histogram.max == 5.0 and histogram.count == 1001
+    assert LatencyHistogram().percentile(50) is None
+    print("✅ Latency histogram tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Bulk Planning CLI Tests")
+    print("=" * 50)
+    test_bulk_run_writes_one_record_per_line()
+    test_resume_after_crash_writes_each_trip_once()
+    test_checkpoint_stays_compact()
+    test_latency_histogram_percentiles()
+    print("\n🎉 All bulk planning tests completed!")
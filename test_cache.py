@@ -0,0 +1,123 @@
+"""
+Unit Tests for the itinerary response cache
+These tests use temporary SQLite files and never call an AI provider.
+"""
+
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+import config
+import planner
+from ai_client import _get_dummy_response
+from cache import ResponseCache, make_cache_key, set_response_cache
+from retry import RetryPolicy
+
+
+def test_cache_key_is_canonical():
+    """Keyword order does not change the key; values do."""
+    print("\n🔍 Testing cache keys...")
+    assert make_cache_key(a=1, b=[1, 2]) == make_cache_key(b=[1, 2], a=1)
+    assert make_cache_key(a=1) != make_cache_key(a=2)
+    print("✅ Cache key tests passed!")
+
+
+def test_memory_lru_and_ttl():
+    """The memory tier evicts least recently used entries and expires old ones."""
+    print("\n🔍 Testing LRU eviction and TTL...")
+    cache = ResponseCache(path=None, ttl=60, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}, "Reading 'a' makes 'b' the oldest entry"
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None, "'b' should have been evicted"
+    assert cache.get("a") == {"v": 1}
+
+    value = cache.get("c")
+    value["v"] = 99
+    assert cache.get("c") == {"v": 3}, "Callers cannot mutate cached entries"
+
+    with mock.patch("cache.time.time", return_value=time.time() + 120):
+        assert cache.get("a") is None, "Entries expire after the TTL"
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 4 and stats["misses"] == 2
+    print("✅ LRU eviction and TTL tests passed!")
+
+
+def test_sqlite_tier_survives_restart():
+    """Entries written to SQLite are served by a new cache instance."""
+    print("\n🔍 Testing persistent cache tier...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        first = ResponseCache(path=path, ttl=60, max_disk_entries=3)
+        for i in range(5):
+            first.set(f"key-{i}", {"i": i})
+        first.close()
+
+        second = ResponseCache(path=path, ttl=60)
+        assert second.get("key-4") == {"i": 4}
+        assert second.get("key-0") is None, "Disk tier keeps only the newest entries"
+        assert second.stats()["disk_hits"] == 1
+        second.close()
+    print("✅ Persistent cache tier tests passed!")
+
+
+def test_plan_trip_caches_only_successes():
+    """Successful plans are cached; errors and unparseable responses are not."""
+    print("\n🔍 Testing plan_trip caching...")
+    cache = ResponseCache(path=None)
+    set_response_cache(cache)
+    args = ("Paris", 3, 200, ["history", "food"], "metro", "hostel", "USD")
+    try:
+        with mock.patch.object(planner, "generate_itinerary", side_effect=RuntimeError("429 rate limited")) as call:
+            itinerary, _ = planner.plan_trip(*args)
+            planner.plan_trip(*args)
+        assert "error" in itinerary and call.call_count == 2, "Errors must not be cached"
+
+        with mock.patch.object(planner, "generate_itinerary", return_value="no json") as call, \
+             mock.patch.object(planner, "_retry_policy", RetryPolicy(max_attempts=2, base_delay=0)):
+            planner.plan_trip(*args)
+            planner.plan_trip(*args)
+        assert call.call_count == 4, "Fallback parses are retried but must not be cached"
+
+        partial = json.dumps({"itinerary": [{"day": 1, "activities": []}], "summary": "Half a plan"})
+        with mock.patch.object(planner, "generate_itinerary", return_value=partial) as call:
+            planner.plan_trip(*args)
+            planner.plan_trip(*args)
+        assert call.call_count == 2, "Itineraries that fail validation must not be cached"
+
+        with mock.patch.object(planner, "generate_itinerary", return_value=_get_dummy_response()) as call:
+            first = planner.plan_trip(*args)
+            second = planner.plan_trip(*args)
+            events = list(planner.plan_trip_stream(*args))
+        assert call.call_count == 1, "Identical requests should hit the cache"
+        assert first == second
+        assert events[-1] == ("summary", first[1])
+        assert first[0] == json.loads(_get_dummy_response())["itinerary"]
+    finally:
+        set_response_cache(None)
+    print("✅ plan_trip caching tests passed!")
+
+
+def test_default_path_is_outside_the_project():
+    """The persistent tier defaults to the user's cache directory."""
+    print("\n🔍 Testing the default cache path...")
+    if "CACHE_PATH" not in os.environ:
+        assert not config.CACHE_PATH.startswith(str(config.PROJECT_ROOT)), config.CACHE_PATH
+        assert config.CACHE_PATH.startswith(str(config.USER_CACHE_DIR))
+    print("✅ Default cache path tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Response Cache Tests")
+    print("=" * 60)
+    test_cache_key_is_canonical()
+    test_memory_lru_and_ttl()
+    test_sqlite_tier_survives_restart()
+    test_plan_trip_caches_only_successes()
+    test_default_path_is_outside_the_project()
+    print("\n🎉 All response cache tests completed successfully!")
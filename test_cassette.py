@@ -0,0 +1,148 @@
+"""
+Unit Tests for record/replay cassettes
+These tests record mocked provider responses and replay them offline through ai_client.
+"""
+
+import asyncio
+import gzip
+import os
+import tempfile
+import time
+from unittest import mock
+
+import ai_client
+import planner
+from cassette import Cassette, CassetteMissError
+
+PROMPT = planner._create_prompt("Kyoto", 2, 300, ["temples"], "train", "hostel", "JPY")
+
+
+def _use_provider(provider):
+    """Patch ai_client to route every call to a single provider."""
+    return [
+        mock.patch.object(ai_client, "get_provider", return_value=provider),
+        mock.patch.object(ai_client, "get_routing_mode", return_value="single"),
+    ]
+
+
+def _start(patches):
+    for patch in patches:
+        patch.start()
+
+
+def _stop(patches):
+    for patch in reversed(patches):
+        patch.stop()
+
+
+def test_record_then_replay():
+    """A recorded response is replayed verbatim without calling the provider."""
+    print("\n🔍 Testing record then replay...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cassette.jsonl.gz")
+        ai_client.set_cassette(Cassette(path))
+        patches = _use_provider("openai") + [
+            mock.patch.object(ai_client, "AI_RECORD", True),
+            mock.patch.object(ai_client, "get_api_key", return_value="test-key"),
+            mock.patch.object(ai_client, "_call_openai", return_value='{"itinerary": []}'),
+        ]
+        _start(patches)
+        try:
+            assert ai_client.generate_itinerary(PROMPT) == '{"itinerary": []}'
+        finally:
+            _stop(patches)
+        ai_client.set_cassette(None)
+
+        # A fresh cassette reads what was recorded; no provider or key is needed
+        ai_client.set_cassette(Cassette(path))
+        patches = _use_provider("replay") + [
+            mock.patch.object(ai_client, "_call_openai", side_effect=AssertionError("no live calls")),
+        ]
+        _start(patches)
+        try:
+            assert ai_client.generate_itinerary(PROMPT) == '{"itinerary": []}'
+            assert asyncio.run(ai_client.generate_itinerary_async(PROMPT)) == '{"itinerary": []}'
+            assert "".join(ai_client.stream_itinerary(PROMPT)) == '{"itinerary": []}'
+        finally:
+            _stop(patches)
+            ai_client.set_cassette(None)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            text = f.read()
+        assert "Kyoto" not in text, "Prompts are stored as hashes"
+        assert '"provider":"openai"' in text
+    print("✅ Record and replay tests passed!")
+
+
+def test_replay_latency():
+    """Recorded latency is replayed scaled by CASSETTE_REPLAY_SPEED."""
+    print("\n🔍 Testing replayed latency...")
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(os.path.join(tmp, "cassette.jsonl.gz"))
+        cassette.record(PROMPT, "slow answer", latency=0.4)
+        ai_client.set_cassette(cassette)
+        patches = _use_provider("replay")
+        _start(patches)
+        try:
+            with mock.patch.object(ai_client, "CASSETTE_REPLAY_SPEED", 0):
+                started = time.perf_counter()
+                ai_client.generate_itinerary(PROMPT)
+                assert time.perf_counter() - started < 0.1, "Speed 0 replays instantly"
+            with mock.patch.object(ai_client, "CASSETTE_REPLAY_SPEED", 2):
+                started = time.perf_counter()
+                assert ai_client.generate_itinerary(PROMPT) == "slow answer"
+                assert 0.18 < time.perf_counter() - started < 0.35, "Speed 2 halves the latency"
+        finally:
+            _stop(patches)
+            ai_client.set_cassette(None)
+    print("✅ Replay latency tests passed!")
+
+
+def test_append_and_round_robin():
+    """Sessions append to one file and repeated prompts cycle through their recordings."""
+    print("\n🔍 Testing appending sessions...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cassette.jsonl.gz")
+        first = Cassette(path)
+        first.record(PROMPT, "one", 0.1, "groq", "llama")
+        first.close()
+        second = Cassette(path)
+        second.record(PROMPT, "two", 0.2, "groq", "llama")
+        second.record("other prompt", "three", 0.3)
+        second.close()
+
+        cassette = Cassette(path)
+        assert len(cassette) == 3
+        assert [cassette.lookup(PROMPT)["response"] for _ in range(3)] == ["one", "two", "one"]
+        assert cassette.lookup("other prompt")["latency"] == 0.3
+    print("✅ Append and round-robin tests passed!")
+
+
+def test_missing_prompt():
+    """Unrecorded prompts fail clearly, and a cut-off file keeps its complete lines."""
+    print("\n🔍 Testing missing recordings...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cassette.jsonl.gz")
+        cassette = Cassette(path)
+        try:
+            cassette.lookup(PROMPT)
+            assert False, "A missing prompt raises"
+        except CassetteMissError as e:
+            assert "No recording" in str(e)
+
+        cassette.record(PROMPT, "kept", 0.1)
+        cassette.close()
+        with open(path, "ab") as f:
+            f.write(gzip.compress(b'{"key": "trunc')[:-8])
+        assert Cassette(path).lookup(PROMPT)["response"] == "kept"
+    print("✅ Missing recording tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Cassette Tests")
+    print("=" * 50)
+    test_record_then_replay()
+    test_replay_latency()
+    test_append_and_round_robin()
+    test_missing_prompt()
+    print("\n🎉 All cassette tests completed!")
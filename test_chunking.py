@@ -0,0 +1,106 @@
+"""
+Unit Tests for chunked planning of long trips
+These tests check how long trips are split into day ranges, generated concurrently and stitched back together.
+"""
+
+import asyncio
+import json
+import os
+import time
+from unittest import mock
+
+import planner
+import usage
+from fake_llm_server import fake_itinerary_text
+from load_test import fake_provider
+
+TRIP = ("Lisbon", 30, 1500, ["food", "history"], "walking", "hostel", "EUR")
+
+
+def test_day_ranges_and_prompts():
+    """Days are split as evenly as possible; every prompt keeps the whole trip's context."""
+    print("\n🔍 Testing day ranges...")
+    assert planner._day_ranges(30, 7) == [(1, 6), (7, 12), (13, 18), (19, 24), (25, 30)]
+    assert planner._day_ranges(16, 5) == [(1, 4), (5, 8), (9, 12), (13, 16)]
+    assert planner._prepare_chunks(*TRIP[:1], 10, *TRIP[2:], chunk_days=5) == [], "Short trips are not split"
+    assert planner._prepare_chunks(*TRIP, chunk_days=0) == []
+    if "PLAN_CHUNK_DAYS" not in os.environ:
+        assert planner._prepare_chunks(*TRIP) == [], "Chunking is off unless PLAN_CHUNK_DAYS is set"
+    assert planner._prepare_chunks(*TRIP, chunk_days=30) == []
+
+    chunks = planner._prepare_chunks(*TRIP, chunk_days=10)
+    assert [(chunk.first, chunk.last) for chunk in chunks] == [(1, 10), (11, 20), (21, 30)]
+    shared = chunks[0].prompt.split("PART OF THE TRIP")[0]
+    for chunk in chunks:
+        assert chunk.prompt.startswith(shared), "Chunk prompts share the trip prefix"
+        assert "DURATION: 30 days" in chunk.prompt and "BUDGET: 1500 EUR total" in chunk.prompt
+        assert f"DAYS: {chunk.first}-{chunk.last}" in chunk.prompt
+        assert "Spend about 500 EUR" in chunk.prompt
+        assert chunk.output.max_tokens < planner._output_budget.plan(30, 2).max_tokens
+    assert "arrival day" in chunks[0].prompt and "departure day" in chunks[-1].prompt
+    print("✅ Day range tests passed!")
+
+
+def test_chunked_plan_through_fake_server():
+    """A month-long trip takes about one chunk call, and comes back as one valid itinerary."""
+    print("\n🔍 Testing chunked planning...")
+    with fake_provider(latency="fixed:0.3", seed=1):
+        with usage.track() as totals:
+            started = time.perf_counter()
+            itinerary, summary = planner.plan_trip(*TRIP, use_cache=False, chunk_days=6)
+            elapsed = time.perf_counter() - started
+        events = list(planner.plan_trip_stream(*TRIP, use_cache=False, chunk_days=10))
+        async_itinerary, _ = asyncio.run(planner.plan_trip_async(*TRIP, use_cache=False, chunk_days=10))
+
+    assert [day["day"] for day in itinerary] == list(range(1, 31))
+    assert planner.validate_itinerary(itinerary)
+    assert summary.startswith("Days 1-6: ") and "Days 25-30: " in summary
+    assert totals.calls == 5
+    assert elapsed < 1.0, f"Chunks run concurrently ({elapsed:.2f}s for 5 calls of 0.3s)"
+
+    assert [value["day"] for kind, value in events if kind == "day"] == list(range(1, 31))
+    assert events[-1][0] == "summary" and events[-1][1].startswith("Days 1-10: ")
+    assert [day["day"] for day in async_itinerary] == list(range(1, 31))
+    print("✅ Chunked planning tests passed!")
+
+
+def test_chunks_are_renumbered_and_retried():
+    """Days are numbered by position; a chunk with too few days is retried."""
+    print("\n🔍 Testing stitching...")
+    calls = []
+
+    def generate(prompt, **kwargs):
+        calls.append(prompt)
+        data = json.loads(fake_itinerary_text(prompt))
+        for day in data["itinerary"]:
+            day["day"] -= 100  # numbered wrongly
+        if "DAYS: 11-20" in prompt and sum("DAYS: 11-20" in p for p in calls) == 1:
+            data["itinerary"] = data["itinerary"][:4]  # cut short the first time
+        return json.dumps(data)
+
+    with mock.patch.object(planner, "generate_itinerary", side_effect=generate), \
+            mock.patch.object(planner, "_retry_policy", planner.RetryPolicy(max_attempts=2, base_delay=0)):
+        itinerary, _ = planner.plan_trip(*TRIP, use_cache=False, chunk_days=10)
+    assert [day["day"] for day in itinerary] == list(range(1, 31))
+    assert len(calls) == 4, "Only the short chunk was retried"
+
+    def broken(prompt, **kwargs):
+        return "Sorry, no JSON" if "DAYS: 21-30" in prompt else fake_itinerary_text(prompt)
+
+    with mock.patch.object(planner, "generate_itinerary", side_effect=broken), \
+            mock.patch.object(planner, "_retry_policy", planner.RetryPolicy(max_attempts=1, base_delay=0)):
+        result = planner.plan_trip(*TRIP, use_cache=False, chunk_days=10)
+        events = list(planner.plan_trip_stream(*TRIP, use_cache=False, chunk_days=10))
+    assert result == planner._fallback_response(), "A missing chunk fails the whole trip"
+    assert len([kind for kind, _ in events if kind == "day"]) == 20
+    assert events[-1] == ("summary", "The AI response ended before the trip summary was complete.")
+    print("✅ Stitching tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Chunked Planning Tests")
+    print("=" * 50)
+    test_day_ranges_and_prompts()
+    test_chunked_plan_through_fake_server()
+    test_chunks_are_renumbered_and_retried()
+    print("\n🎉 All chunked planning tests completed!")
@@ -0,0 +1,221 @@
+"""
+Unit Tests for single-flight request coalescing
+These tests start many identical requests at once and count the provider calls.
+"""
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import ai_client
+import planner
+from ai_client import _get_dummy_response
+from cache import ResponseCache, set_response_cache
+from coalesce import SingleFlight
+from retry import DeadlineExceeded
+
+
+def test_threads_share_one_call():
+    """Concurrent threaded callers with one key run the function once."""
+    print("\n🔍 Testing threaded coalescing...")
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def slow_call():
+        calls.append(1)
+        time.sleep(0.1)
+        return "itinerary"
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("paris", slow_call))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1, "Only the leader should call the provider"
+    assert results == ["itinerary"] * 8
+    stats = flight.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+
+    assert flight.do("paris", lambda: "fresh") == "fresh", "Finished keys start a new call"
+    print("✅ Threaded coalescing tests passed!")
+
+
+def test_errors_reach_every_waiter():
+    """If the shared call fails, every waiter sees the error."""
+    print("\n🔍 Testing shared errors...")
+    flight = SingleFlight()
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def failing_call():
+        time.sleep(0.05)
+        raise RuntimeError("429 Too Many Requests")
+
+    def worker():
+        barrier.wait()
+        try:
+            flight.do("tokyo", failing_call)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["429 Too Many Requests"] * 4
+    print("✅ Shared error tests passed!")
+
+
+def test_async_callers_share_one_call():
+    """Concurrent coroutines with one key await a single call."""
+    print("\n🔍 Testing async coalescing...")
+    flight = SingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "itinerary"
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do_async("rome", slow_call) for _ in range(20)),
+            flight.do_async("lisbon", slow_call),
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 2, "One call per distinct key"
+    assert results == ["itinerary"] * 21
+    assert flight.stats()["coalesced"] == 19
+    print("✅ Async coalescing tests passed!")
+
+
+def test_plan_trip_coalesces_identical_requests():
+    """Identical plan_trip calls in flight together make one provider call."""
+    print("\n🔍 Testing coalescing in plan_trip...")
+    calls = []
+
+    def slow_generate(prompt, **kwargs):
+        calls.append(prompt)
+        time.sleep(0.1)
+        return _get_dummy_response()
+
+    barrier = threading.Barrier(6)
+    results = []
+
+    def worker(destination):
+        barrier.wait()
+        results.append(planner.plan_trip(destination, 3, 200, ["food"], "metro", "hostel", use_cache=False))
+
+    with mock.patch.object(planner, "generate_itinerary", slow_generate):
+        threads = [threading.Thread(target=worker, args=(name,))
+                   for name in ["Paris", "paris", " Paris", "PARIS", "paris ", "Paris"]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(calls) == 1, "Equivalent requests should share one provider call"
+    assert len(results) == 6 and all(result == results[0] for result in results)
+    assert planner.coalescing_stats()["coalesced"] >= 5
+    print("✅ plan_trip coalescing tests passed!")
+
+
+def test_waiters_give_up_at_their_deadline():
+    """A waiting caller stops at its own timeout while the shared call keeps running."""
+    print("\n🔍 Testing waiter deadlines...")
+    flight = SingleFlight()
+    started = threading.Event()
+    results = []
+
+    def slow_call():
+        started.set()
+        time.sleep(0.3)
+        return "itinerary"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("oslo", slow_call)))
+    leader.start()
+    started.wait()
+    begin = time.monotonic()
+    try:
+        flight.do("oslo", slow_call, timeout=0.05)
+        assert False, "The waiter should give up at its timeout"
+    except DeadlineExceeded:
+        pass
+    assert time.monotonic() - begin < 0.2
+    leader.join()
+    assert results == ["itinerary"], "The leader is not interrupted"
+
+    async def run():
+        async def slow_coro():
+            await asyncio.sleep(0.3)
+            return "itinerary"
+
+        shared = asyncio.ensure_future(flight.do_async("oslo", slow_coro))
+        await asyncio.sleep(0)
+        try:
+            await flight.do_async("oslo", slow_coro, timeout=0.05)
+            assert False, "The async waiter should give up at its timeout"
+        except DeadlineExceeded:
+            pass
+        return await shared
+
+    assert asyncio.run(run()) == "itinerary"
+    print("✅ Waiter deadline tests passed!")
+
+
+def test_joined_calls_share_answered_providers():
+    """Callers that join a fallback provider's call do not cache it under the primary's key."""
+    print("\n🔍 Testing answered providers for joined calls...")
+    calls = []
+
+    def fallback_generate(prompt, **kwargs):
+        calls.append(prompt)
+        time.sleep(0.1)
+        ai_client._note_provider("gemini")
+        return _get_dummy_response()
+
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(planner.plan_trip("Bergen", 2, 150, ["hiking"], "bus", "hostel"))
+
+    set_response_cache(ResponseCache(path=None))
+    try:
+        with mock.patch.object(planner, "generate_itinerary", fallback_generate), \
+             mock.patch.object(planner, "get_provider", return_value="groq"):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(calls) == 1, "The requests should share one provider call"
+            planner.plan_trip("Bergen", 2, 150, ["hiking"], "bus", "hostel")
+    finally:
+        set_response_cache(None)
+    assert all("error" not in itinerary for itinerary, _ in results)
+    assert len(calls) == 2, "No caller may cache the fallback's itinerary under the groq key"
+    print("✅ Joined call provider tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Request Coalescing Tests")
+    print("=" * 60)
+    test_threads_share_one_call()
+    test_errors_reach_every_waiter()
+    test_async_callers_share_one_call()
+    test_plan_trip_coalesces_identical_requests()
+    test_waiters_give_up_at_their_deadline()
+    test_joined_calls_share_answered_providers()
+    print("\n🎉 All request coalescing tests completed successfully!")
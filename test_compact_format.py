@@ -0,0 +1,105 @@
+"""
+Unit Tests for the compact response format
+These tests check expanding compact responses, the compact prompt, incremental parsing and the format benchmark.
+"""
+
+import json
+from unittest import mock
+
+import ai_client
+import bench_wire_format
+import compact_format
+import planner
+import usage
+from ai_client import _get_dummy_response
+from itinerary_stream import iter_itinerary_events
+from load_test import fake_provider
+
+TRIP = ("Lisbon", 4, 400, ["food"], "walking", "hostel", "EUR")
+
+
+def test_expand_matches_full_format():
+    """A compact response parses to exactly the itinerary of the full one."""
+    print("\n🔍 Testing compact expansion...")
+    full = json.loads(_get_dummy_response())
+    compact = compact_format.dumps(full["itinerary"], full["summary"])
+    assert compact == json.dumps(json.loads(compact), separators=(",", ":"), ensure_ascii=False), "Minified"
+    assert planner._try_parse_ai_response(compact) == (full["itinerary"], full["summary"])
+    fenced = "Here you go:\n```json\n" + compact + "\n```"
+    assert planner._try_parse_ai_response(fenced) == (full["itinerary"], full["summary"])
+
+    assert ai_client._looks_like_itinerary(compact), "Compact responses can win a hedged race"
+    assert ai_client._looks_like_itinerary('{"day": 2, "activities": ["Museum"]}')
+    assert not ai_client._looks_like_itinerary("Sorry, I cannot help with that.")
+
+    for bad in ('{"d": {"day": 1}, "s": "x"}', '{"d": [["only", 2]], "s": "x"}'):
+        try:
+            planner._try_parse_ai_response(bad)
+            assert False, "Malformed compact responses are rejected"
+        except ValueError:
+            pass
+    print("✅ Compact expansion tests passed!")
+
+
+def test_stream_parser_expands_compact_days():
+    """Days of a streamed compact response are emitted as full-format dicts."""
+    print("\n🔍 Testing compact streaming...")
+    full = json.loads(_get_dummy_response())
+    compact = compact_format.dumps(full["itinerary"], full["summary"])
+    events = list(iter_itinerary_events(compact[i:i + 5] for i in range(0, len(compact), 5)))
+    assert events == [("day", day) for day in full["itinerary"]] + [("summary", full["summary"])]
+    print("✅ Compact streaming tests passed!")
+
+
+def test_stream_parser_numbers_days_after_a_bad_one():
+    """A compact day that fails to expand does not shift the numbers of the days after it."""
+    print("\n🔍 Testing compact day numbers...")
+    full = json.loads(_get_dummy_response())
+    data = json.loads(compact_format.dumps(full["itinerary"], full["summary"]))
+    data[compact_format.DAYS_KEY][1] = ["missing fields"]
+    events = list(iter_itinerary_events([json.dumps(data)]))
+    days = [value for kind, value in events if kind == "day"]
+    assert [day["day"] for day in days] == [1, 3]
+    assert days[1] == full["itinerary"][2]
+    print("✅ Compact day number tests passed!")
+
+
+def test_compact_planning_through_fake_server():
+    """AI_RESPONSE_FORMAT=compact asks for the compact schema and uses fewer output tokens."""
+    print("\n🔍 Testing compact planning...")
+    with fake_provider(latency="fixed:0", seed=1):
+        with usage.track() as full_usage:
+            full_itinerary, _ = planner.plan_trip(*TRIP, use_cache=False)
+        with mock.patch.object(planner, "AI_RESPONSE_FORMAT", "compact"):
+            _, prompt, _ = planner._prepare_trip(*TRIP)
+            with usage.track() as compact_usage:
+                itinerary, summary = planner.plan_trip(*TRIP, use_cache=False)
+            events = list(planner.plan_trip_stream(*TRIP, use_cache=False))
+
+    assert compact_format.PROMPT_FORMAT in prompt and '"itinerary": [' not in prompt
+    assert planner.validate_itinerary(itinerary) and [day["day"] for day in itinerary] == [1, 2, 3, 4]
+    assert len(itinerary) == len(full_itinerary) and summary
+    assert compact_usage.completion_tokens < full_usage.completion_tokens * 0.8
+    assert [kind for kind, _ in events] == ["day"] * 4 + ["summary"]
+    print("✅ Compact planning tests passed!")
+
+
+def test_format_benchmark():
+    """The benchmark reports token savings for every size."""
+    print("\n🔍 Testing format benchmark...")
+    rows = bench_wire_format.run_benchmark(sizes=(1, 7), repeat=2)
+    assert [row["days"] for row in rows] == [1, 7]
+    assert all(row["compact_tokens"] < row["full_tokens"] for row in rows)
+    assert "saved" in bench_wire_format.format_report(rows)
+    print("✅ Format benchmark tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Compact Format Tests")
+    print("=" * 50)
+    test_expand_matches_full_format()
+    test_stream_parser_expands_compact_days()
+    test_stream_parser_numbers_days_after_a_bad_one()
+    test_compact_planning_through_fake_server()
+    test_format_benchmark()
+    print("\n🎉 All compact format tests completed!")
@@ -0,0 +1,145 @@
+"""
+Unit Tests for the local fake LLM server
+These tests point the real provider SDKs at fake_llm_server.py and check each protocol.
+"""
+
+import json
+import random
+import urllib.request
+from unittest import mock
+
+import ai_client
+import planner
+from fake_llm_server import FakeLLMConfig, LatencyModel, fake_itinerary_text, start_server
+from load_test import fake_provider
+from retry import is_retryable
+
+PROMPT = planner._create_prompt("Lisbon", 4, 400, ["food"], "walking", "hostel", "EUR")
+
+
+class FakeServer:
+    """Start a fake server and point ai_client at it for the duration of a with block."""
+
+    def __init__(self, **config):
+        self.config = FakeLLMConfig(**config)
+
+    def __enter__(self):
+        self.server = start_server(self.config)
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        self.base = base
+        urls = {"openai": f"{base}/v1", "groq": f"{base}/openai/v1", "gemini": base}
+        self.patch = mock.patch.object(ai_client, "get_base_url", side_effect=lambda provider: urls[provider])
+        self.patch.start()
+        ai_client.close_clients()
+        return self
+
+    def __exit__(self, *exc):
+        self.patch.stop()
+        ai_client.close_clients()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.base}/stats") as response:
+            return json.load(response)
+
+
+def test_latency_models():
+    """Latency specs parse and sample within their ranges."""
+    print("\n🔍 Testing latency models...")
+    rng = random.Random(1)
+    assert LatencyModel("fixed:0.25").sample() == 0.25
+    samples = [LatencyModel("uniform:0.1,0.2", rng).sample() for _ in range(200)]
+    assert all(0.1 <= s <= 0.2 for s in samples)
+    samples = sorted(LatencyModel("lognormal:0.5,0.5", rng).sample() for _ in range(2001))
+    assert 0.4 < samples[1000] < 0.6, "The median of lognormal:0.5,x is about 0.5"
+    try:
+        LatencyModel("gamma:1")
+        assert False, "Unknown distributions are rejected"
+    except ValueError:
+        pass
+    print("✅ Latency model tests passed!")
+
+
+def test_fake_itinerary_matches_prompt():
+    """The fake answer has one day per requested day and a valid structure."""
+    data = json.loads(fake_itinerary_text(PROMPT))
+    assert len(data["itinerary"]) == 4
+    assert planner.validate_itinerary(data["itinerary"])
+    assert "Lisbon" in data["summary"] and "EUR" in data["summary"]
+
+
+def test_regenerate_day_through_fake_server():
+    """Day prompts get a single day back, so regenerate_day works against the fake server."""
+    print("\n🔍 Testing day regeneration...")
+    itinerary = json.loads(fake_itinerary_text(PROMPT))["itinerary"]
+    day_prompt = planner._create_day_prompt("Lisbon", itinerary, 2, 400, ["food"], "walking", "hostel", "EUR")
+    assert json.loads(fake_itinerary_text(day_prompt))["day"] == 2
+
+    with fake_provider(latency="fixed:0", seed=1):
+        new_itinerary, _ = planner.regenerate_day(itinerary, 2, "Lisbon", 400, ["food"], "walking", "hostel", "EUR")
+    assert [day["day"] for day in new_itinerary] == [1, 2, 3, 4]
+    assert new_itinerary[0] == itinerary[0] and new_itinerary[2:] == itinerary[2:]
+    print("✅ Day regeneration tests passed!")
+
+
+def test_all_providers_talk_to_fake_server():
+    """The unchanged OpenAI, Groq and Gemini clients work against the fake server."""
+    print("\n🔍 Testing provider protocols...")
+    with FakeServer(chunk_chars=64) as server:
+        for call in (ai_client._call_openai, ai_client._call_groq, ai_client._call_gemini):
+            itinerary, _ = planner._parse_ai_response(call(PROMPT, "fake-key", 5))
+            assert len(itinerary) == 4, call.__name__
+        for stream in (ai_client._stream_openai, ai_client._stream_groq, ai_client._stream_gemini):
+            chunks = list(stream(PROMPT, "fake-key", 5))
+            assert len(chunks) > 5, f"{stream.__name__} should stream in pieces"
+            assert len(json.loads("".join(chunks))["itinerary"]) == 4
+        stats = server.stats()
+    assert stats["requests"] == 6 and stats["streams"] == 3
+    print("✅ Provider protocol tests passed!")
+
+
+def test_error_injection():
+    """Injected 429s, 500s and malformed answers surface the way real ones do."""
+    print("\n🔍 Testing error injection...")
+    with FakeServer(rate_429=1.0):
+        try:
+            ai_client._call_openai(PROMPT, "fake-key", 5)
+            assert False, "Expected a 429"
+        except Exception as e:
+            assert getattr(e, "status_code", None) == 429 and is_retryable(e)
+
+    with FakeServer(error_rate=1.0):
+        try:
+            ai_client._call_groq(PROMPT, "fake-key", 5)
+            assert False, "Expected a 500"
+        except Exception as e:
+            assert getattr(e, "status_code", None) == 500 and is_retryable(e)
+
+    with FakeServer(malformed_rate=1.0, seed=3) as server:
+        text = ai_client._call_openai(PROMPT, "fake-key", 5)
+        assert planner._try_parse_ai_response(text) is None
+        assert server.stats()["malformed"] == 1
+    print("✅ Error injection tests passed!")
+
+
+def test_slow_requests_hit_client_timeout():
+    """Injected hangs trip the deadline-derived client timeout."""
+    with FakeServer(slow_rate=1.0, slow_seconds=2.0):
+        try:
+            ai_client._call_openai(PROMPT, "fake-key", 0.2)
+            assert False, "Expected a timeout"
+        except Exception as e:
+            assert is_retryable(e), type(e).__name__
+
+
+if __name__ == "__main__":
+    print("🧪 Running Fake LLM Server Tests")
+    print("=" * 50)
+    test_latency_models()
+    test_fake_itinerary_matches_prompt()
+    test_regenerate_day_through_fake_server()
+    test_all_providers_talk_to_fake_server()
+    test_error_injection()
+    test_slow_requests_hit_client_timeout()
+    print("\n🎉 All fake server tests completed!")
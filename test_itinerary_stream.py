@@ -0,0 +1,101 @@
+"""
+Unit Tests for the incremental itinerary parser
+These tests feed responses in small pieces, the way providers stream them.
+"""
+
+import json
+from unittest import mock
+
+import planner
+from ai_client import _get_dummy_response
+from itinerary_stream import ItineraryStreamParser, iter_itinerary_events
+
+
+def _split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_days_emitted_as_they_complete():
+    """Each day is emitted by the chunk that closes it, before the summary."""
+    print("\n🔍 Testing incremental day parsing...")
+    data = json.loads(_get_dummy_response())
+    text = json.dumps(data)
+    parser = ItineraryStreamParser()
+
+    first_day_end = text.index("}") + 1
+    assert parser.feed(text[:first_day_end - 1]) == [], "Day 1 is not finished yet"
+    events = parser.feed(text[first_day_end - 1:first_day_end])
+    assert events == [("day", data["itinerary"][0])], "Day 1 should be emitted right away"
+
+    events = parser.feed(text[first_day_end:])
+    assert [kind for kind, _ in events] == ["day", "day", "summary"]
+    assert events[-1][1] == data["summary"]
+    print("✅ Incremental day parsing tests passed!")
+
+
+def test_chatty_response_in_tiny_chunks():
+    """Prose, code fences, escaped quotes and braces in strings are handled."""
+    print("\n🔍 Testing noisy streamed responses...")
+    data = json.loads(_get_dummy_response())
+    data["itinerary"][1]["notes"] = 'Say "bonjour" {politely} \\ smile'
+    text = "Here is your plan {as requested}:\n```json\n" + json.dumps(data, indent=2) + "\n```\nHave fun!"
+
+    for size in (1, 2, 7, 64):
+        events = list(iter_itinerary_events(_split(text, size)))
+        days = [value for kind, value in events if kind == "day"]
+        assert days == data["itinerary"], f"All days should parse with chunk size {size}"
+        assert events[-1] == ("summary", data["summary"])
+    print("✅ Noisy streamed response tests passed!")
+
+
+def test_buffer_stays_small():
+    """Consumed text is dropped instead of accumulating."""
+    print("\n🔍 Testing parser memory use...")
+    day = {"day": 1, "activities": ["Walk"], "cost": 5, "transport": "walking", "notes": "x" * 200}
+    days = [dict(day, day=i) for i in range(1, 201)]
+    text = json.dumps({"itinerary": days, "summary": "Long trip"})
+    parser = ItineraryStreamParser()
+    largest = 0
+    for chunk in _split(text, 50):
+        parser.feed(chunk)
+        largest = max(largest, len(parser._buffer))
+    assert parser.days_emitted == 200
+    assert largest < 1000, "Buffer should hold at most about one day"
+    print("✅ Parser memory tests passed!")
+
+
+def test_plan_trip_stream():
+    """plan_trip_stream yields days then the summary, and falls back to a full parse."""
+    print("\n🔍 Testing streamed trip planning...")
+    data = json.loads(_get_dummy_response())
+    text = json.dumps(data)
+
+    with mock.patch.object(planner, "stream_itinerary", return_value=iter(_split(text, 20))):
+        events = list(planner.plan_trip_stream("Paris", 3, 200, ["food"], "metro", "hostel", use_cache=False))
+    assert [kind for kind, _ in events] == ["day", "day", "day", "summary"]
+
+    # Nothing streams from a non-JSON reply, so the whole-text parse takes over
+    with mock.patch.object(planner, "stream_itinerary", return_value=iter(["not json at all"])):
+        events = list(planner.plan_trip_stream("Paris", 3, 200, ["food"], "metro", "hostel", use_cache=False))
+    assert events[-1][0] == "summary"
+    assert len(events) == 2, "Fallback itinerary has one placeholder day"
+
+    def failing_stream(prompt, **kwargs):
+        raise RuntimeError("provider down")
+        yield
+
+    with mock.patch.object(planner, "stream_itinerary", failing_stream):
+        events = list(planner.plan_trip_stream("Paris", 3, 200, ["food"], "metro", "hostel", use_cache=False))
+    assert len(events) == 1 and events[0][0] == "error"
+    assert "provider down" in events[0][1][0]["error"]
+    print("✅ Streamed trip planning tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Itinerary Stream Tests")
+    print("=" * 60)
+    test_days_emitted_as_they_complete()
+    test_chatty_response_in_tiny_chunks()
+    test_buffer_stays_small()
+    test_plan_trip_stream()
+    print("\n🎉 All itinerary stream tests completed successfully!")
@@ -0,0 +1,82 @@
+"""
+Unit Tests for JSON extraction from AI responses
+These tests cover the chatty, fenced and broken responses real providers return.
+"""
+
+import json
+
+from ai_client import _get_dummy_response
+from json_extract import extract_json_object, strip_code_fences
+from planner import _parse_ai_response
+
+
+PAYLOAD = json.loads(_get_dummy_response())
+
+
+def test_fenced_and_chatty_responses():
+    """The itinerary object is found behind prose, fences and decoy objects."""
+    print("\n🔍 Testing JSON extraction...")
+    text = json.dumps(PAYLOAD, indent=2)
+    cases = [
+        "```json\n" + text + "\n```",
+        "Sure! Keep {your passport} safe.\n" + text + "\nEnjoy {Paris}!",
+        '{"note": "first draft"}\nFinal answer:\n' + text,
+        text + "\nP.S. {this brace block is not JSON}",
+        '{"response": ' + text + ', "truncated": "yes and then the stream ended',
+    ]
+    for case in cases:
+        assert extract_json_object(case) == PAYLOAD, f"Should extract itinerary from: {case[:40]!r}"
+    print("✅ JSON extraction tests passed!")
+
+
+def test_strings_and_escapes():
+    """Braces and escaped quotes inside strings do not break brace balancing."""
+    print("\n🔍 Testing strings with braces and escapes...")
+    data = dict(PAYLOAD, summary='Use "{curly}" braces \\ and } stray ones {')
+    text = 'Broken start {"a": "unterminated } text"\n' + json.dumps(data)
+    assert extract_json_object(text) == data
+    print("✅ String and escape tests passed!")
+
+
+def test_no_match():
+    """Responses without a complete itinerary object return None."""
+    print("\n🔍 Testing responses without an itinerary...")
+    assert extract_json_object("no json here") is None
+    assert extract_json_object('{"itinerary": []}') is None, "Summary is required"
+    assert extract_json_object("{" * 10000) is None
+    assert extract_json_object(json.dumps(PAYLOAD)[:-5]) is None, "Truncated objects do not parse"
+    assert strip_code_fences("```json\n{}\n```") == "\n{}\n"
+    print("✅ No-match tests passed!")
+
+
+def test_parse_ai_response_uses_extractor():
+    """_parse_ai_response recovers fenced JSON instead of returning the fallback."""
+    print("\n🔍 Testing response parsing...")
+    itinerary, summary = _parse_ai_response("Here you go:\n```json\n" + json.dumps(PAYLOAD) + "\n```")
+    assert itinerary == PAYLOAD["itinerary"]
+    assert summary == PAYLOAD["summary"]
+
+    itinerary, summary = _parse_ai_response("The model rambled {without} JSON")
+    assert "failed" in itinerary[0]["activities"][0], "Unparseable text gets the fallback itinerary"
+    print("✅ Response parsing tests passed!")
+
+
+def test_deeply_nested_input():
+    """Nesting deeper than the recursion limit is treated as unparseable."""
+    print("\n🔍 Testing deeply nested input...")
+    text = '{"itinerary": [' * 20000
+    assert extract_json_object(text) is None
+    itinerary, summary = _parse_ai_response(text)
+    assert "failed" in itinerary[0]["activities"][0], "Nested input gets the fallback itinerary"
+    print("✅ Deep nesting tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting JSON Extraction Tests")
+    print("=" * 60)
+    test_fenced_and_chatty_responses()
+    test_strings_and_escapes()
+    test_no_match()
+    test_parse_ai_response_uses_extractor()
+    test_deeply_nested_input()
+    print("\n🎉 All JSON extraction tests completed successfully!")
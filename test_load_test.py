@@ -0,0 +1,91 @@
+"""
+Unit Tests for the load-test harness
+These tests run small sync and async load tests against the in-process fake LLM server.
+"""
+
+import random
+import time
+from unittest import mock
+
+import load_test
+import planner
+from ai_client import _get_dummy_response
+
+
+def test_request_mix():
+    """Seeded mixes are reproducible and stay inside the configured ranges."""
+    print("\n🔍 Testing request mix...")
+    first = load_test.RequestMix(["Oslo", "Rome"], (2, 5), ["EUR"], seed=7).trips(50)
+    second = load_test.RequestMix(["Oslo", "Rome"], (2, 5), ["EUR"], seed=7).trips(50)
+    assert first == second
+    assert {trip["destination"] for trip in first} == {"Oslo", "Rome"}
+    assert all(2 <= trip["duration"] <= 5 and trip["currency"] == "EUR" for trip in first)
+    print("✅ Request mix tests passed!")
+
+
+def test_arrival_offsets():
+    """Poisson arrivals average the requested rate; uniform arrivals are evenly spaced."""
+    print("\n🔍 Testing arrival schedules...")
+    offsets = load_test.arrival_offsets(2000, 50, "poisson", random.Random(3))
+    assert offsets == sorted(offsets) and offsets[0] == 0
+    assert 35 < 2000 / offsets[-1] < 65
+    assert load_test.arrival_offsets(3, 4, "uniform") == [0.0, 0.25, 0.5]
+    print("✅ Arrival schedule tests passed!")
+
+
+def test_classify():
+    """Results are sorted into ok, fallback and error."""
+    print("\n🔍 Testing outcome classification...")
+    assert load_test.classify(*planner._parse_ai_response(_get_dummy_response())) == "ok"
+    assert load_test.classify(*planner._fallback_response()) == "fallback-parse"
+    assert load_test.classify(*planner._error_response(RuntimeError("down"))) == "error"
+    print("✅ Classification tests passed!")
+
+
+def test_open_loop_counts_queueing():
+    """Open-loop latency includes time spent waiting for a worker."""
+    print("\n🔍 Testing open-loop latency...")
+
+    def slow_plan(**kwargs):
+        time.sleep(0.05)
+        return planner._parse_ai_response(_get_dummy_response())
+
+    mix = load_test.RequestMix(seed=1)
+    with mock.patch.object(planner, "plan_trip", side_effect=slow_plan):
+        report = load_test.run_load(mix, requests=6, concurrency=1, rate=1000, arrival="uniform")
+    assert report.outcomes == {"ok": 6}
+    assert report.latency.max >= 0.25, "The last request waited behind five others"
+    assert report.latency.min < 0.1
+    print("✅ Open-loop latency tests passed!")
+
+
+def test_sync_and_async_against_fake_server():
+    """Both modes plan real trips through the fake server and report outcomes."""
+    print("\n🔍 Testing load runs against the fake server...")
+    mix = load_test.RequestMix(durations=(1, 30), seed=2)
+    previous = (load_test.config.AI_PROVIDER, load_test.config.OPENAI_BASE_URL)
+    with load_test.fake_provider(latency="fixed:0.01", seed=2):
+        sync_report = load_test.run_load(mix, requests=12, concurrency=4)
+        async_report = load_test.run_load(mix, requests=12, concurrency=4, rate=200, mode="async")
+        curve = load_test.saturation_curve(lambda: load_test.RequestMix(seed=3), [50, 100], requests=8,
+                                           concurrency=4)
+    for report in (sync_report, async_report):
+        assert report.outcomes == {"ok": 12}, report.outcomes
+        assert report.throughput > 0
+        assert "Percentile" in load_test.format_report(report)
+    assert [report.offered_rate for report in curve] == [50, 100]
+    assert "achieved/s" in load_test.format_curve(curve)
+    assert (load_test.config.AI_PROVIDER, load_test.config.OPENAI_BASE_URL) == previous, \
+        "The configured provider is restored"
+    print("✅ Fake server load tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Load Test Harness Tests")
+    print("=" * 50)
+    test_request_mix()
+    test_arrival_offsets()
+    test_classify()
+    test_open_loop_counts_queueing()
+    test_sync_and_async_against_fake_server()
+    print("\n🎉 All load test harness tests completed!")
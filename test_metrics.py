@@ -0,0 +1,149 @@
+"""
+Unit Tests for per-stage latency metrics
+These tests check stage timing, outcome labels, the Prometheus text output and the /metrics endpoint.
+"""
+
+import asyncio
+import urllib.request
+from unittest import mock
+
+import ai_client
+import metrics
+import planner
+from ai_client import _get_dummy_response
+from cache import ResponseCache, set_response_cache
+from router import ProviderRouter
+
+
+def _counts():
+    """(stage, outcome) -> observation count, ignoring the provider label."""
+    counts = {}
+    for (stage, _, outcome), series in metrics.snapshot().items():
+        counts[stage, outcome] = counts.get((stage, outcome), 0) + series["count"]
+    return counts
+
+
+def _plan(response):
+    fake = mock.Mock(return_value=response) if isinstance(response, str) else mock.Mock(side_effect=response)
+    with mock.patch.object(planner, "generate_itinerary", fake):
+        return planner.plan_trip("Rome", 2, 200, ["food"], "bus", "hostel", use_cache=False)
+
+
+def test_disabled_records_nothing():
+    """With metrics off, instrumented functions run normally and nothing is recorded."""
+    print("\n🔍 Testing disabled metrics...")
+    metrics.enable(False)
+    metrics.reset()
+    itinerary, _ = _plan(_get_dummy_response())
+    assert planner.validate_itinerary(itinerary)
+    assert metrics.snapshot() == {}
+    print("✅ Disabled metrics tests passed!")
+
+
+def test_stages_and_outcomes():
+    """plan_trip, parse and validate are timed with ok, fallback-parse and error outcomes."""
+    print("\n🔍 Testing stage outcomes...")
+    set_response_cache(ResponseCache(path=None))
+    metrics.reset()
+    metrics.enable()
+    try:
+        with mock.patch.object(planner, "_retry_policy", planner.RetryPolicy(max_attempts=1, base_delay=0)):
+            itinerary, _ = _plan(_get_dummy_response())
+            _plan("Sorry, I cannot help with that.")
+            _plan(RuntimeError("provider down"))
+        planner.validate_itinerary(itinerary)
+        planner.validate_itinerary("not a list")
+        asyncio.run(metrics.timed("async_stage")(asyncio.sleep)(0))
+    finally:
+        metrics.enable(False)
+
+    counts = _counts()
+    assert counts["plan_trip", "ok"] == 1
+    assert counts["plan_trip", "fallback-parse"] == 1
+    assert counts["plan_trip", "error"] == 1
+    assert counts["parse", "ok"] == 1, "A response is parsed once, not again after its check"
+    assert counts["parse", "fallback-parse"] == 1
+    assert counts["validate", "ok"] >= 1 and counts["validate", "error"] == 1
+    assert counts["async_stage", "ok"] == 1
+    print("✅ Stage outcome tests passed!")
+
+
+def test_prometheus_text():
+    """Histograms are cumulative and end with +Inf, _sum and _count."""
+    print("\n🔍 Testing Prometheus output...")
+    metrics.reset()
+    metrics.enable()
+    try:
+        metrics.observe("parse", 0.0002, provider="groq")
+        metrics.observe("parse", 0.3, provider="groq")
+        metrics.observe("parse", 120, provider="groq")
+    finally:
+        metrics.enable(False)
+    text = metrics.render()
+    labels = 'stage="parse",provider="groq",outcome="ok"'
+    assert "# TYPE travel_planner_stage_duration_seconds histogram" in text
+    assert f'travel_planner_stage_duration_seconds_bucket{{{labels},le="0.0001"}} 0' in text
+    assert f'travel_planner_stage_duration_seconds_bucket{{{labels},le="0.0005"}} 1' in text
+    assert f'travel_planner_stage_duration_seconds_bucket{{{labels},le="0.5"}} 2' in text
+    assert f'travel_planner_stage_duration_seconds_bucket{{{labels},le="60"}} 2' in text
+    assert f'travel_planner_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"travel_planner_stage_duration_seconds_count{{{labels}}} 3" in text
+    assert "stage_calls_total" not in text, "Call counts are the histogram's _count"
+    print("✅ Prometheus output tests passed!")
+
+
+def test_provider_label_is_the_answering_provider():
+    """After a failover, stages are labelled with the provider that answered, not the configured one."""
+    print("\n🔍 Testing provider labels...")
+    router = ProviderRouter(["groq", "gemini"])
+
+    def fake_generate(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        if provider == "groq":
+            raise RuntimeError("503 Service Unavailable")
+        return _get_dummy_response()
+
+    metrics.reset()
+    metrics.enable()
+    try:
+        with mock.patch.object(ai_client, "get_router", return_value=router), \
+             mock.patch.object(ai_client, "_generate_with_provider", side_effect=fake_generate):
+            planner.plan_trip("Rome", 2, 200, ["food"], "bus", "hostel", use_cache=False)
+        planner.validate_itinerary([])
+    finally:
+        metrics.enable(False)
+    labels = {(stage, provider) for stage, provider, _ in metrics.snapshot()}
+    assert ("generate_itinerary", "gemini") in labels
+    assert ("plan_trip", "gemini") in labels and ("parse", "gemini") in labels, labels
+    assert ("validate", "unknown") in labels, "Stages outside any provider call are unknown"
+    assert not any(provider == "groq" for _, provider in labels)
+    print("✅ Provider label tests passed!")
+
+
+def test_metrics_endpoint():
+    """The local server serves /metrics and turns collection on."""
+    print("\n🔍 Testing /metrics endpoint...")
+    metrics.reset()
+    server = metrics.start_metrics_server(port=0)
+    try:
+        assert metrics.start_metrics_server() is server, "Starting twice reuses the server"
+        planner.validate_itinerary([])
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            body = response.read().decode("utf-8")
+        assert 'stage="validate"' in body
+    finally:
+        metrics.stop_metrics_server()
+        metrics.enable(False)
+    print("✅ Metrics endpoint tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Metrics Tests")
+    print("=" * 50)
+    test_disabled_records_nothing()
+    test_stages_and_outcomes()
+    test_prometheus_text()
+    test_provider_label_is_the_answering_provider()
+    test_metrics_endpoint()
+    print("\n🎉 All metrics tests completed!")
@@ -0,0 +1,90 @@
+"""
+Unit Tests for trip request normalization
+These tests check that requests meaning the same thing share one canonical key.
+"""
+
+from unittest import mock
+
+import planner
+from ai_client import _get_dummy_response
+from cache import ResponseCache, set_response_cache
+from normalize import bucket_budget, display_destination, normalize_request, request_key
+
+
+def test_equivalent_requests_share_a_key():
+    """Case, aliases, interest order, duplicates and synonyms do not change the key."""
+    print("\n🔍 Testing request normalization...")
+    first = normalize_request("Paris", 3, 200, ["food", "History"], "metro", "hostels", "usd")
+    second = normalize_request("  paris ", 3, 200, ["history", "food", "food"], "Subway", "hostel", "USD")
+    assert first == second, f"{first} != {second}"
+    assert first.destination == "paris"
+    assert first.interests == ("food", "history")
+    assert first.transport == "metro/subway"
+    assert request_key(first, "gemini", "m") == request_key(second, "gemini", "m")
+    assert request_key(first, "gemini", "m") != request_key(first, "openai", "m"), "Provider is part of the key"
+
+    assert normalize_request("NYC", 2, 100, ["art"], "walk", "hotel").destination == "new york"
+    assert normalize_request("Portland, Maine", 2, 100, ["art"], "bus", "hostel").destination == "portland, maine"
+    assert display_destination("new york") == "New York"
+    print("✅ Request normalization tests passed!")
+
+
+def test_different_places_keep_different_keys():
+    """Country suffixes stay in the key; only their spelling is unified."""
+    print("\n🔍 Testing that suffixes keep places apart...")
+
+    def key(destination, transport="bus"):
+        return request_key(normalize_request(destination, 3, 200, ["art"], transport, "hostel"), "gemini", "m")
+
+    assert key("London, UK") == key("london, United Kingdom") == key("London, U.K.")
+    assert key("London, UK") != key("London, Canada")
+    assert key("London, Canada") != key("London")
+    assert key("Cambridge, England") != key("Cambridge, MA")
+    assert key("Paris, France") != key("Paris, Texas")
+    assert key("Lyon", "tram") != key("Lyon", "bus"), "Tram is not a synonym for bus"
+    print("✅ Suffix tests passed!")
+
+
+def test_budget_buckets():
+    """Budgets within the tolerance share a bucket; currencies round to their decimals."""
+    print("\n🔍 Testing budget buckets...")
+    assert bucket_budget(200, "USD", 0.05) == bucket_budget(205, "USD", 0.05)
+    assert bucket_budget(200, "USD", 0.05) != bucket_budget(300, "USD", 0.05)
+    assert bucket_budget(200, "USD", 0) == 200
+    jpy = bucket_budget(30123, "JPY", 0.05)
+    assert jpy == int(jpy), "JPY has no decimal places"
+    a = normalize_request("Tokyo", 4, 30000, ["food"], "train", "hostel", "JPY", budget_tolerance=0.05)
+    b = normalize_request("Tokyo", 4, 29800, ["food"], "train", "hostel", "JPY", budget_tolerance=0.05)
+    assert a == b
+    print("✅ Budget bucket tests passed!")
+
+
+def test_plan_trip_reuses_equivalent_requests():
+    """plan_trip answers an equivalent request from the cache."""
+    print("\n🔍 Testing normalized caching in plan_trip...")
+    set_response_cache(ResponseCache(path=None))
+    try:
+        with mock.patch.object(planner, "generate_itinerary", return_value=_get_dummy_response()) as call:
+            planner.plan_trip("Paris", 3, 200, ["food", "history"], "metro", "hostel", "USD")
+            planner.plan_trip(" paris", 3, 200, ["history", "food"], "subway", "Hostel", "usd")
+            planner.plan_trip("London, Canada", 3, 200, ["food"], "tram", "Host family", "CAD")
+        assert call.call_count == 2, "The second request should be a cache hit"
+        prompt = call.call_args_list[0][0][0]
+        assert "DESTINATION: Paris" in prompt
+        assert "INTERESTS: food, history" in prompt
+        prompt = call.call_args_list[1][0][0]
+        assert "DESTINATION: London, Canada" in prompt, "The prompt keeps the destination as typed"
+        assert "TRANSPORT: tram" in prompt and "Host family" in prompt
+    finally:
+        set_response_cache(None)
+    print("✅ Normalized caching tests passed!")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting Request Normalization Tests")
+    print("=" * 60)
+    test_equivalent_requests_share_a_key()
+    test_different_places_keep_different_keys()
+    test_budget_buckets()
+    test_plan_trip_reuses_equivalent_requests()
+    print("\n🎉 All request normalization tests completed successfully!")
@@ -3,7 +3,12 @@ Basic Unit Tests for Student AI Travel Planner
 This file tests the planner logic without running the full Streamlit app.
 """
 
-from planner import plan_trip, validate_itinerary, calculate_total_cost
+import asyncio
+import json
+from unittest import mock
+
+import planner
+from planner import plan_trip, plan_trip_async, validate_itinerary, calculate_total_cost
 
 def test_planner_basic():
     """Test basic planner functionality with sample data."""
@@ -143,6 +148,43 @@ def test_itinerary_validation():
     
     print("✅ Itinerary validation tests passed!")
 
+def test_plan_trip_async():
+    """Test that async planning runs many trips concurrently."""
+    print("\n🔍 Testing Async Planning...")
+    print("-" * 30)
+    
+    response = json.dumps({
+        "itinerary": [
+            {"day": 1, "activities": ["Walk"], "cost": 10, "transport": "walking", "notes": "Free"}
+        ],
+        "summary": "Short trip."
+    })
+    in_flight = 0
+    peak = 0
+    
+    async def fake_generate(prompt, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return response
+    
+    async def run_batch():
+        return await asyncio.gather(*(
+            plan_trip_async("Paris", 1, 50 + i, ["food"], "metro", "hostel", "EUR", use_cache=False)
+            for i in range(10)
+        ))
+    
+    with mock.patch.object(planner, "generate_itinerary_async", fake_generate):
+        results = asyncio.run(run_batch())
+    
+    assert len(results) == 10, "Every trip should return a result"
+    assert all(summary == "Short trip." for _, summary in results)
+    assert peak == 10, "All requests should be in flight at once"
+    
+    print("✅ Async planning tests passed!")
+
 if __name__ == "__main__":
     print("🚀 Starting Student AI Travel Planner Tests")
     print("=" * 60)
@@ -152,6 +194,7 @@ if __name__ == "__main__":
         test_planner_basic()
         test_input_validation()
         test_itinerary_validation()
+        test_plan_trip_async()
         
         print("\n" + "=" * 60)
         print("🎉 All tests completed successfully!")
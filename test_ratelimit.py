@@ -0,0 +1,160 @@
+"""
+Unit Tests for the client-side rate limiter
+These tests use a fake clock so queueing can be checked without real waiting.
+"""
+
+import asyncio
+from unittest import mock
+
+import ai_client
+import planner
+from cache import ResponseCache, set_response_cache
+from ratelimit import ProviderRateLimiter, RateLimitExceeded, TokenBucket
+
+
+class FakeTime:
+    """A clock whose sleep() just moves time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 3))
+        self.now += seconds
+
+
+def test_token_bucket_refills():
+    """Reservations go into debt and are repaid at the refill rate."""
+    print("\n🔍 Testing token bucket...")
+    fake = FakeTime()
+    bucket = TokenBucket(capacity=2, rate=1.0, clock=fake.clock)
+    assert bucket.wait_time(1) == 0
+    bucket.take(1)
+    bucket.take(1)
+    assert bucket.wait_time(1) == 1.0
+    bucket.take(1)
+    assert bucket.wait_time(1) == 2.0, "The next caller queues behind the previous one"
+    fake.now = 3.0
+    assert bucket.wait_time(1) == 0
+    print("✅ Token bucket tests passed!")
+
+
+def test_rpm_queues_instead_of_failing():
+    """Requests over the RPM limit wait their turn."""
+    print("\n🔍 Testing RPM queueing...")
+    fake = FakeTime()
+    limiter = ProviderRateLimiter("groq", rpm=60, clock=fake.clock, sleep=fake.sleep)
+    for _ in range(60):
+        assert limiter.acquire() == 0
+    assert limiter.acquire() == 1.0
+    assert limiter.acquire() == 1.0, "Time advanced by the previous sleep"
+    stats = limiter.stats()
+    assert stats["admitted"] == 62 and stats["waited"] == 2 and stats["queue_depth"] == 0
+    assert stats["max_wait_seconds"] == 1.0
+    print("✅ RPM queueing tests passed!")
+
+
+def test_tpm_limits_large_requests():
+    """The token bucket holds back requests that would exceed TPM."""
+    print("\n🔍 Testing TPM limit...")
+    fake = FakeTime()
+    limiter = ProviderRateLimiter("openai", tpm=6000, clock=fake.clock, sleep=fake.sleep)
+    assert limiter.acquire(tokens=5000) == 0
+    assert limiter.acquire(tokens=3000) == 20.0, "2000 missing tokens at 100 tokens/second"
+    print("✅ TPM limit tests passed!")
+
+
+def test_queue_full_and_wait_bound():
+    """Requests are rejected when the queue is full or the wait is too long."""
+    print("\n🔍 Testing queue limits...")
+    fake = FakeTime()
+    limiter = ProviderRateLimiter("gemini", rpm=60, max_queue=1, max_wait=1.5, clock=fake.clock)
+    for _ in range(60):
+        limiter.acquire()
+    assert limiter._reserve(0) == 1.0, "One request is now waiting"
+    try:
+        limiter.acquire()
+        assert False, "Queue should be full"
+    except RateLimitExceeded as e:
+        assert e.reason == "queue_full" and e.provider == "gemini" and e.retry_after > 0
+
+    limiter._leave_queue()
+    try:
+        limiter.acquire()
+        assert False, "A 2 second wait is over the 1.5 second bound"
+    except RateLimitExceeded as e:
+        assert e.reason == "wait_too_long"
+    assert limiter.stats()["rejected"] == 2
+    print("✅ Queue limit tests passed!")
+
+
+def test_unlimited_by_default():
+    """A limiter without limits never waits."""
+    limiter = ProviderRateLimiter("groq")
+    assert not limiter.enabled
+    assert all(limiter.acquire(tokens=10**6) == 0 for _ in range(1000))
+
+
+def test_async_acquire_waits_without_blocking():
+    """Async waiters sleep on the event loop; cancelled waiters return their slot."""
+    print("\n🔍 Testing async acquire...")
+    limiter = ProviderRateLimiter("openai", rpm=600)
+
+    async def run():
+        for _ in range(600):
+            await limiter.acquire_async()
+        waited = await limiter.acquire_async()
+        assert 0 < waited <= 0.11
+        task = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0)
+        assert limiter.stats()["queue_depth"] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert limiter.stats()["queue_depth"] == 0
+
+    asyncio.run(run())
+    print("✅ Async acquire tests passed!")
+
+
+def test_plan_trip_reports_queue_full():
+    """plan_trip turns a full queue into a clear, retryable error."""
+    print("\n🔍 Testing queue-full outcome in plan_trip...")
+    set_response_cache(ResponseCache(path=None))
+    error = RateLimitExceeded("groq request queue is full (32 waiting).", provider="groq",
+                              reason="queue_full", retry_after=4.2)
+    with mock.patch.object(planner, "generate_itinerary", side_effect=error):
+        itinerary, summary = planner.plan_trip("Lisbon", 2, 300, ["food"], "walking", "hostel")
+    assert itinerary["reason"] == "queue_full"
+    assert itinerary["retry_after"] == 4.2
+    assert summary.startswith("Too many trips")
+    set_response_cache(None)
+    print("✅ Queue-full outcome tests passed!")
+
+
+def test_provider_limiter_from_config():
+    """ai_client builds one limiter per provider and reports its stats."""
+    with mock.patch.object(ai_client, "get_rate_limits", return_value=(30, 0)):
+        limiter = ai_client.get_rate_limiter("groq")
+        assert limiter is ai_client.get_rate_limiter("groq")
+        assert limiter.limits == (30, 0)
+    assert "groq" in ai_client.rate_limit_stats()
+    with mock.patch.object(ai_client, "get_rate_limits", return_value=(0, 0)):
+        assert not ai_client.get_rate_limiter("groq").enabled, "Changed limits rebuild the limiter"
+
+
+if __name__ == "__main__":
+    print("🧪 Running Rate Limiter Tests")
+    print("=" * 50)
+    test_token_bucket_refills()
+    test_rpm_queues_instead_of_failing()
+    test_tpm_limits_large_requests()
+    test_queue_full_and_wait_bound()
+    test_unlimited_by_default()
+    test_async_acquire_waits_without_blocking()
+    test_plan_trip_reports_queue_full()
+    test_provider_limiter_from_config()
+    print("\n🎉 All rate limiter tests completed!")
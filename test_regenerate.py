@@ -0,0 +1,117 @@
+"""
+Unit Tests for regenerating a single day
+These tests check the day prompt, splicing the new day into the itinerary and the recomputed total.
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+import ai_client
+import planner
+from planner import calculate_total_cost, regenerate_day, regenerate_day_async
+from router import ProviderRouter
+
+
+def _itinerary(days=5):
+    return [
+        {"day": n, "activities": [f"Sight {n}a", f"Sight {n}b"], "cost": 40, "transport": "metro",
+         "notes": f"Notes for day {n}"}
+        for n in range(1, days + 1)
+    ]
+
+
+def _raises_value_error(itinerary, day):
+    try:
+        regenerate_day(itinerary, day, *ARGS)
+    except ValueError:
+        return True
+    return False
+
+
+NEW_DAY = {"day": 9, "activities": ["Tile museum", "Sunset at a viewpoint"], "cost": 25,
+           "transport": "walking", "notes": "The museum is free on Sundays."}
+ARGS = ("Lisbon", 300, ["art"], "walking", "hostel", "EUR")
+
+
+def test_regenerate_day_splices_and_totals():
+    """Only the chosen day changes, its number is kept and the total is recomputed."""
+    print("\n🔍 Testing day regeneration...")
+    itinerary = _itinerary()
+    fake = mock.Mock(return_value="Here you go:\n```json\n" + json.dumps(NEW_DAY) + "\n```")
+    with mock.patch.object(planner, "generate_itinerary", fake):
+        updated, total = regenerate_day(itinerary, 3, *ARGS, constraints="rainy day, indoors")
+
+    assert updated[2] == dict(NEW_DAY, day=3)
+    assert updated[:2] == itinerary[:2] and updated[3:] == itinerary[3:]
+    assert itinerary[2]["cost"] == 40, "The itinerary passed in is not changed"
+    assert total == calculate_total_cost(updated) == 4 * 40 + 25
+
+    prompt = fake.call_args.args[0]
+    assert "Sight 2a" in prompt and "Sight 3a" in prompt and "Sight 4a" in prompt
+    assert "Sight 1a" not in prompt and "Sight 5a" not in prompt, "Only the neighbouring days are sent"
+    assert "rainy day, indoors" in prompt
+    assert "about 140 EUR" in prompt, "The budget left after the other days"
+    assert fake.call_args.kwargs["max_tokens"] < planner._output_budget.plan(5, 1).max_tokens
+    print("✅ Day regeneration tests passed!")
+
+
+def test_regenerate_day_edges_and_errors():
+    """The first and last days work; bad input and unusable responses raise ValueError."""
+    print("\n🔍 Testing regeneration edge cases...")
+    itinerary = _itinerary(2)
+    fake = mock.Mock(side_effect=["Sorry, I cannot help.", json.dumps(NEW_DAY)])
+    with mock.patch.object(planner, "generate_itinerary", fake), \
+            mock.patch.object(planner, "_retry_policy", planner.RetryPolicy(max_attempts=2, base_delay=0)):
+        updated, _ = regenerate_day(itinerary, 1, *ARGS)
+    assert fake.call_count == 2, "An unusable response is retried"
+    assert updated[0]["day"] == 1 and updated[0]["cost"] == 25
+
+    async def regenerate_last():
+        with mock.patch.object(planner, "generate_itinerary_async", mock.AsyncMock(return_value=json.dumps(NEW_DAY))):
+            return await regenerate_day_async(itinerary, 2, *ARGS)
+    updated, total = asyncio.run(regenerate_last())
+    assert updated[1]["day"] == 2 and total == 65
+
+    for bad_day in (0, 3, "2"):
+        assert _raises_value_error(itinerary, bad_day), f"Day {bad_day!r} is rejected"
+    assert _raises_value_error([{"day": 1}], 1), "Invalid itineraries are rejected"
+    with mock.patch.object(planner, "generate_itinerary", mock.Mock(return_value='{"day": 1, "activities": []}')), \
+            mock.patch.object(planner, "_retry_policy", planner.RetryPolicy(max_attempts=1, base_delay=0)):
+        assert _raises_value_error(itinerary, 1), "A response without a valid day is an error"
+    print("✅ Regeneration edge case tests passed!")
+
+
+def test_hedged_regenerate_day_accepts_a_single_day():
+    """With hedging on, a single-day answer wins the race instead of starting another call."""
+    print("\n🔍 Testing hedged day regeneration...")
+    router = ProviderRouter(["gemini", "openai"])
+    calls = []
+
+    def fake_generate(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        calls.append(provider)
+        return json.dumps(NEW_DAY)
+
+    async def fake_generate_async(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        return fake_generate(provider, prompt)
+
+    with mock.patch.object(ai_client, "get_router", return_value=router), \
+         mock.patch.object(ai_client, "AI_HEDGE_BUDGET", 1), \
+         mock.patch.object(ai_client, "_generate_with_provider", side_effect=fake_generate), \
+         mock.patch.object(ai_client, "_generate_with_provider_async", side_effect=fake_generate_async):
+        updated, _ = regenerate_day(_itinerary(3), 2, *ARGS)
+        async_updated, _ = asyncio.run(regenerate_day_async(_itinerary(3), 2, *ARGS))
+
+    assert updated[1] == async_updated[1] == dict(NEW_DAY, day=2)
+    assert calls == ["gemini", "gemini"], f"A day response should not trigger a hedge: {calls}"
+    assert router.hedge_stats()["launched"] == 0
+    print("✅ Hedged day regeneration tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Day Regeneration Tests")
+    print("=" * 50)
+    test_regenerate_day_splices_and_totals()
+    test_regenerate_day_edges_and_errors()
+    test_hedged_regenerate_day_accepts_a_single_day()
+    print("\n🎉 All day regeneration tests completed!")
@@ -0,0 +1,210 @@
+"""
+Unit Tests for retries, backoff and deadlines
+These tests use fake sleeps and fake errors so no real waiting or API calls happen.
+"""
+
+import asyncio
+from unittest import mock
+
+import ai_client
+import planner
+from ai_client import _get_dummy_response
+from cache import ResponseCache, set_response_cache
+from ratelimit import RateLimitExceeded
+from retry import Deadline, DeadlineExceeded, MalformedResponseError, RetryPolicy, is_retryable
+
+
+class StatusError(Exception):
+    """Looks like an SDK error carrying an HTTP status code."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    """Named like openai.APITimeoutError."""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_error_classification():
+    """Timeouts, 429 and 5xx are retryable; client errors and local rejections are not."""
+    print("\n🔍 Testing retryable error classification...")
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(APITimeoutError())
+    assert is_retryable(TimeoutError())
+    assert is_retryable(MalformedResponseError("oops"))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("API key not set"))
+    assert not is_retryable(RateLimitExceeded("queue full"))
+    assert not is_retryable(DeadlineExceeded())
+    print("✅ Classification tests passed!")
+
+
+def test_backoff_is_jittered_and_capped():
+    """Backoff doubles per retry, is capped, and is scaled by the jitter."""
+    print("\n🔍 Testing backoff...")
+    policy = RetryPolicy(base_delay=1, max_delay=5, rng=lambda: 1.0)
+    assert [policy.backoff(n) for n in range(5)] == [1, 2, 4, 5, 5]
+    policy = RetryPolicy(base_delay=1, max_delay=5, rng=lambda: 0.25)
+    assert policy.backoff(2) == 1.0
+
+    error = StatusError(429)
+    error.response = mock.Mock(headers={"retry-after": "3"})
+    assert RetryPolicy(base_delay=1, rng=lambda: 0).backoff(0, error) == 3, "Retry-After is honoured"
+    print("✅ Backoff tests passed!")
+
+
+def test_retries_until_success():
+    """Transient errors are retried with backoff; permanent ones are raised at once."""
+    print("\n🔍 Testing retry loop...")
+    sleeps = []
+    policy = RetryPolicy(max_attempts=4, base_delay=1, sleep=sleeps.append, rng=lambda: 0.5)
+    outcomes = [StatusError(503), APITimeoutError(), "itinerary"]
+
+    def attempt(deadline):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call(attempt) == "itinerary"
+    assert sleeps == [0.5, 1.0]
+
+    calls = []
+
+    def unauthorized(deadline):
+        calls.append(1)
+        raise StatusError(401)
+
+    try:
+        policy.call(unauthorized)
+        assert False, "401 should not be retried"
+    except StatusError:
+        pass
+    assert len(calls) == 1
+    print("✅ Retry loop tests passed!")
+
+
+def test_deadline_stops_retries():
+    """No backoff sleep may run past the deadline."""
+    print("\n🔍 Testing deadlines...")
+    clock = FakeClock()
+    deadline = Deadline(2.0, clock=clock)
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    policy = RetryPolicy(max_attempts=10, base_delay=1, sleep=sleep, rng=lambda: 1.0)
+
+    def attempt(deadline):
+        clock.now += 0.2
+        raise StatusError(500)
+
+    try:
+        policy.call(attempt, deadline)
+        assert False, "Should give up at the deadline"
+    except StatusError:
+        pass
+    assert sleeps == [1], "The second backoff (2s) would pass the deadline"
+    assert clock.now <= 2.0
+
+    clock.now = 5.0
+    try:
+        deadline.check()
+        assert False
+    except DeadlineExceeded:
+        pass
+    assert Deadline().remaining() is None
+    print("✅ Deadline tests passed!")
+
+
+def test_deadline_becomes_provider_timeout():
+    """The remaining deadline is passed to the provider client as its timeout."""
+    print("\n🔍 Testing provider timeouts...")
+    seen = {}
+
+    def fake_call(prompt, api_key, timeout=None, max_tokens=None, schema=None):
+        seen["timeout"] = timeout
+        return "ok"
+
+    with mock.patch.object(ai_client, "get_api_key", return_value="key"), \
+         mock.patch.object(ai_client, "_check_provider_available"), \
+         mock.patch.object(ai_client, "_call_openai", fake_call):
+        ai_client._generate_with_provider("openai", "plan", Deadline(10))
+        assert 9 < seen["timeout"] <= 10
+        ai_client._generate_with_provider("openai", "plan")
+        assert seen["timeout"] is None
+
+        try:
+            ai_client._generate_with_provider("openai", "plan", Deadline(0))
+            assert False, "An expired deadline must not call the provider"
+        except DeadlineExceeded:
+            pass
+
+    assert ai_client._openai_request("plan", 5.0)["timeout"] == 5.0
+    assert "timeout" not in ai_client._groq_request("plan")
+    assert ai_client._gemini_options(3.0) == {"request_options": {"timeout": 3.0}}
+    print("✅ Provider timeout tests passed!")
+
+
+def test_plan_trip_retries_malformed_response():
+    """An unparseable response is retried before falling back."""
+    print("\n🔍 Testing malformed-response retries in plan_trip...")
+    set_response_cache(ResponseCache(path=None))
+    responses = iter(["Sorry, here is your trip: day one, walk around.", _get_dummy_response()])
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    try:
+        with mock.patch.object(planner, "generate_itinerary", side_effect=lambda prompt, **kw: next(responses)) as call, \
+             mock.patch.object(planner, "_retry_policy", policy):
+            itinerary, summary = planner.plan_trip("Kyoto", 2, 400, ["culture"], "train", "hostel")
+        assert call.call_count == 2
+        assert isinstance(itinerary, list) and itinerary[0]["day"] == 1
+        assert policy.retries == 1
+
+        with mock.patch.object(planner, "generate_itinerary", side_effect=StatusError(503)) as call, \
+             mock.patch.object(planner, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0)):
+            itinerary, _ = planner.plan_trip("Kyoto", 3, 400, ["culture"], "train", "hostel")
+        assert call.call_count == 3 and "error" in itinerary
+    finally:
+        set_response_cache(None)
+    print("✅ plan_trip retry tests passed!")
+
+
+def test_async_retries():
+    """The async policy retries without blocking the loop."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    attempts = []
+
+    async def attempt(deadline):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise StatusError(429)
+        return "done"
+
+    assert asyncio.run(policy.call_async(attempt, Deadline(5))) == "done"
+    assert len(attempts) == 3
+
+
+if __name__ == "__main__":
+    print("🧪 Running Retry Tests")
+    print("=" * 50)
+    test_error_classification()
+    test_backoff_is_jittered_and_capped()
+    test_retries_until_success()
+    test_deadline_stops_retries()
+    test_deadline_becomes_provider_timeout()
+    test_plan_trip_retries_malformed_response()
+    test_async_retries()
+    print("\n🎉 All retry tests completed!")
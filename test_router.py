@@ -0,0 +1,473 @@
+"""
+Unit Tests for provider routing
+These tests drive the circuit breakers and failover with fake providers and a fake clock.
+"""
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import ai_client
+import config
+import planner
+from cache import ResponseCache, set_response_cache
+from router import CircuitBreaker, NoProviderAvailableError, ProviderRouter, exclude_from_latency
+
+
+class FakeClock:
+    """A monotonic clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_states():
+    """A breaker opens at the threshold, goes half-open after the cooldown and closes on success."""
+    print("\n🔍 Testing circuit breaker states...")
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow_request(), "One trial request is allowed"
+    assert not breaker.allow_request(), "Only one trial at a time"
+    breaker.record_failure()
+    assert breaker.state == "open", "A failed trial reopens the breaker"
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow_request()
+    print("✅ Circuit breaker tests passed!")
+
+
+def test_failover_to_next_provider():
+    """A failing primary hands the request to the next provider and eventually trips."""
+    print("\n🔍 Testing failover...")
+    router = ProviderRouter(["gemini", "openai"], failure_threshold=2)
+    calls = []
+
+    def call(name):
+        calls.append(name)
+        if name == "gemini":
+            raise RuntimeError("503 Service Unavailable")
+        return f"itinerary from {name}"
+
+    assert router.call(call) == "itinerary from openai"
+    assert router.call(call) == "itinerary from openai"
+    assert calls == ["gemini", "openai", "gemini", "openai"]
+
+    calls.clear()
+    assert router.call(call) == "itinerary from openai"
+    assert calls == ["openai"], "The open breaker should skip gemini"
+    snapshot = router.snapshot()
+    assert snapshot["gemini"]["state"] == "open"
+    assert snapshot["openai"]["failures"] == 0
+    print("✅ Failover tests passed!")
+
+
+def test_local_errors_do_not_trip_breaker():
+    """Missing API keys fall through without opening the breaker."""
+    print("\n🔍 Testing configuration errors...")
+    router = ProviderRouter(["gemini"], failure_threshold=1, local_errors=(ValueError,))
+
+    def call(name):
+        raise ValueError("Gemini API key not set")
+
+    for _ in range(3):
+        try:
+            router.call(call)
+            assert False, "The configuration error should be raised"
+        except ValueError as e:
+            assert "API key" in str(e)
+    assert router.snapshot()["gemini"]["state"] == "closed"
+    print("✅ Configuration error tests passed!")
+
+
+def test_all_breakers_open():
+    """With every breaker open the router fails fast."""
+    print("\n🔍 Testing fail-fast when all providers are down...")
+    router = ProviderRouter(["gemini"], failure_threshold=1, reset_timeout=60)
+
+    def call(name):
+        raise RuntimeError("500 Internal Server Error")
+
+    try:
+        router.call(call)
+    except RuntimeError:
+        pass
+    try:
+        router.call(call)
+        assert False, "Should not call an open provider"
+    except NoProviderAvailableError:
+        pass
+    print("✅ Fail-fast tests passed!")
+
+
+def test_latency_mode_prefers_fastest():
+    """Latency mode orders providers by measured latency."""
+    print("\n🔍 Testing latency-aware ordering...")
+    router = ProviderRouter(["gemini", "openai", "groq"], mode="latency")
+    for latency in (2.0, 2.2, 1.8):
+        router.health["gemini"].record(latency, True)
+        router.health["openai"].record(latency / 4, True)
+        router.health["groq"].record(latency / 2, True)
+    assert router.ordered_providers() == ["openai", "groq", "gemini"]
+
+    for _ in range(3):
+        router.health["openai"].record(0.5, False)
+    assert router.ordered_providers()[0] == "groq", "Errors push a fast provider down"
+    print("✅ Latency ordering tests passed!")
+
+
+def test_stream_falls_back_before_first_chunk():
+    """Streaming switches provider only if nothing has been sent yet."""
+    print("\n🔍 Testing streaming failover...")
+    router = ProviderRouter(["gemini", "openai"])
+
+    def stream(name):
+        if name == "gemini":
+            raise RuntimeError("connection reset")
+        yield "{"
+        yield "}"
+
+    assert "".join(router.stream(stream)) == "{}"
+
+    def broken_midway(name):
+        yield "{"
+        raise RuntimeError("stream dropped")
+
+    chunks = []
+    try:
+        for chunk in router.stream(broken_midway):
+            chunks.append(chunk)
+        assert False, "A mid-stream failure should be raised"
+    except RuntimeError:
+        pass
+    assert chunks == ["{"], "No second provider after output was sent"
+    print("✅ Streaming failover tests passed!")
+
+
+def test_generate_itinerary_fails_over():
+    """generate_itinerary uses the router to fall back to another provider."""
+    print("\n🔍 Testing generate_itinerary failover...")
+    router = ProviderRouter(["groq", "gemini"])
+
+    def fake_generate(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        if provider == "groq":
+            raise RuntimeError("429 Too Many Requests")
+        return '{"itinerary": [], "summary": {}}'
+
+    with mock.patch.object(ai_client, "get_router", return_value=router), \
+         mock.patch.object(ai_client, "_generate_with_provider", side_effect=fake_generate):
+        assert ai_client.generate_itinerary("plan") == '{"itinerary": [], "summary": {}}'
+    assert router.snapshot()["groq"]["failures"] == 1
+    print("✅ generate_itinerary failover tests passed!")
+
+
+def test_hedge_races_slow_primary():
+    """A slow primary is raced by the next provider and the faster answer wins."""
+    print("\n🔍 Testing hedged requests...")
+    router = ProviderRouter(["gemini", "openai"])
+    release = threading.Event()
+    started = []
+
+    def call(name):
+        started.append(name)
+        if name == "gemini":
+            release.wait(2)
+            return '{"itinerary": "slow"}'
+        return '{"itinerary": "fast"}'
+
+    begin = time.monotonic()
+    result = router.call_hedged(call, delay=0.05, max_hedges=1)
+    elapsed = time.monotonic() - begin
+    release.set()
+    assert result == '{"itinerary": "fast"}'
+    assert started == ["gemini", "openai"]
+    assert elapsed < 1, "The hedge should answer long before the slow primary"
+    assert router.hedge_stats() == {"launched": 1, "won": 1, "win_rate": 1.0}
+    print("✅ Hedged request tests passed!")
+
+
+def test_hedge_budget_and_fast_primary():
+    """No hedge fires when the primary is fast, or when the budget is zero."""
+    print("\n🔍 Testing hedge budget...")
+    router = ProviderRouter(["gemini", "openai"])
+    started = []
+
+    def call(name):
+        started.append(name)
+        time.sleep(0.1 if name == "gemini" else 0)
+        return f"itinerary from {name}"
+
+    assert router.call_hedged(call, delay=1.0, max_hedges=1) == "itinerary from gemini"
+    assert router.call_hedged(call, delay=0.01, max_hedges=0) == "itinerary from gemini"
+    assert started == ["gemini", "gemini"]
+    assert router.hedge_stats()["launched"] == 0
+    print("✅ Hedge budget tests passed!")
+
+
+def test_hedge_ignores_invalid_and_failed_answers():
+    """A fast but invalid answer does not win; a failure fails over without spending budget."""
+    print("\n🔍 Testing hedged validation...")
+    router = ProviderRouter(["gemini", "openai", "groq"])
+
+    def call(name):
+        if name == "gemini":
+            raise RuntimeError("500")
+        if name == "openai":
+            return "Sorry, I cannot help with that."
+        time.sleep(0.05)
+        return '{"itinerary": []}'
+
+    accept = lambda text: '"itinerary"' in text
+    assert router.call_hedged(call, delay=5, max_hedges=1, accept=accept) == '{"itinerary": []}'
+    print("✅ Hedged validation tests passed!")
+
+
+def test_hedge_delay_uses_latency_percentile():
+    """The hedge delay follows the provider's latency once there are enough samples."""
+    print("\n🔍 Testing hedge delay...")
+    router = ProviderRouter(["gemini", "openai"])
+    assert router.hedge_delay("gemini", default=5, minimum=0.5) == 5
+    for i in range(20):
+        router.health["gemini"].record(1.0 + i * 0.1, True)
+    assert router.hedge_delay("gemini", percentile=95, default=5, minimum=0.5) == 2.8
+    assert router.hedge_delay("gemini", percentile=50, default=5, minimum=3) == 3
+    print("✅ Hedge delay tests passed!")
+
+
+def test_hedge_delay_follows_the_replacement():
+    """After the primary fails, the next hedge waits on its replacement's latency."""
+    print("\n🔍 Testing hedge delay after a replacement...")
+    router = ProviderRouter(["gemini", "openai", "groq"])
+    asked = []
+
+    def delay(name):
+        asked.append(name)
+        return 0.05
+
+    def call(name):
+        if name == "gemini":
+            raise RuntimeError("503 Service Unavailable")
+        time.sleep(0.3 if name == "openai" else 0.01)
+        return name
+
+    assert router.call_hedged(call, delay=delay, max_hedges=1) == "groq"
+    assert asked == ["gemini", "openai"], asked
+
+    async def call_async(name):
+        if name == "gemini":
+            raise RuntimeError("503 Service Unavailable")
+        await asyncio.sleep(0.3 if name == "openai" else 0.01)
+        return name
+
+    asked.clear()
+    router = ProviderRouter(["gemini", "openai", "groq"])
+    assert asyncio.run(router.call_hedged_async(call_async, delay=delay, max_hedges=1)) == "groq"
+    assert asked == ["gemini", "openai"], asked
+    print("✅ Replacement hedge delay tests passed!")
+
+
+def test_async_hedge_cancels_loser():
+    """The async hedge cancels the slower call."""
+    print("\n🔍 Testing async hedging...")
+    router = ProviderRouter(["gemini", "openai"])
+    cancelled = []
+
+    async def call(name):
+        if name == "gemini":
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+            return "slow"
+        await asyncio.sleep(0.01)
+        return "fast"
+
+    result = asyncio.run(router.call_hedged_async(call, delay=0.05, max_hedges=1))
+    assert result == "fast"
+    assert cancelled == ["gemini"]
+    assert router.snapshot()["gemini"]["failures"] == 0, "Cancelled losers are not failures"
+    print("✅ Async hedging tests passed!")
+
+
+def test_local_waits_are_not_provider_latency():
+    """Time spent queueing on the client-side rate limiter is left out of latency samples."""
+    print("\n🔍 Testing that local waits are excluded from latency...")
+    router = ProviderRouter(["gemini"])
+
+    def call(name):
+        time.sleep(0.2)
+        exclude_from_latency(0.2)
+        return "ok"
+
+    async def call_async(name):
+        await asyncio.sleep(0.2)
+        exclude_from_latency(0.2)
+        return "ok"
+
+    def stream(name):
+        time.sleep(0.2)
+        exclude_from_latency(0.2)
+        yield "ok"
+
+    router.call(call)
+    asyncio.run(router.call_async(call_async))
+    assert list(router.stream(stream)) == ["ok"]
+    router.call_hedged(call, delay=5)
+    assert router.health["gemini"].sample_count() == 4
+    assert router.health["gemini"].latency_percentile(100) < 0.1, router.snapshot()
+    exclude_from_latency(1.0)  # outside a provider call this is ignored
+    print("✅ Local wait tests passed!")
+
+
+def test_cancelled_trial_is_released():
+    """A cancelled call or an abandoned stream gives back the half-open trial slot."""
+    print("\n🔍 Testing trial release on cancellation...")
+    clock = FakeClock()
+    router = ProviderRouter(["gemini"], failure_threshold=1, reset_timeout=10)
+    breaker = router.health["gemini"].breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+
+    def half_open():
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.state == "half_open"
+
+    async def slow(name):
+        await asyncio.sleep(5)
+        return "late"
+
+    async def cancel_call():
+        task = asyncio.ensure_future(router.call_async(slow))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    half_open()
+    asyncio.run(cancel_call())
+    assert breaker.allow_request(), "The cancelled call's trial should be free again"
+
+    def chunks(name):
+        yield "one"
+        yield "two"
+
+    breaker.release_trial()
+    half_open()
+    stream = router.stream(chunks)
+    assert next(stream) == "one"
+    stream.close()
+    assert breaker.allow_request(), "Closing the stream should free the trial"
+    print("✅ Trial release tests passed!")
+
+
+def test_fallback_answers_are_not_cached_as_primary():
+    """SDK errors count against a provider, and its fallback's answer is not cached under its key."""
+    print("\n🔍 Testing failover with the cache...")
+    calls = []
+
+    def fake_generate(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        calls.append(provider)
+        if provider == "groq":
+            raise ValueError("Could not decode the response body")
+        return ai_client._get_dummy_response()
+
+    set_response_cache(ResponseCache(path=None))
+    try:
+        with mock.patch.multiple(config, AI_PROVIDER="groq", AI_ROUTING="failover", GROQ_API_KEY="k",
+                                 GEMINI_API_KEY="k", OPENAI_API_KEY=""), \
+             mock.patch.object(planner, "get_provider", return_value="groq"), \
+             mock.patch.object(ai_client, "_generate_with_provider", side_effect=fake_generate):
+            with ai_client.track_providers() as answered:
+                ai_client.generate_itinerary("plan", hedge_budget=0)
+            assert answered == ["gemini"]
+            assert ai_client.get_router().snapshot()["groq"]["failures"] == 1, "A decoding error is a provider failure"
+            for _ in range(2):
+                itinerary, _ = planner.plan_trip("Oslo", 3, 300, ["art"], "bus", "hostel", use_cache=True)
+                assert "error" not in itinerary
+    finally:
+        set_response_cache(None)
+    assert calls.count("gemini") == 3, "The fallback's itinerary must not be served from the groq key"
+    print("✅ Failover cache tests passed!")
+
+
+def test_single_routing_keeps_prompts_on_the_configured_provider():
+    """With single routing a failing provider is not replaced, even when other keys are set."""
+    print("\n🔍 Testing single-provider routing...")
+    calls = []
+
+    def fake_generate(provider, prompt, deadline=None, max_tokens=None, schema=None):
+        calls.append(provider)
+        raise RuntimeError("503 Service Unavailable")
+
+    with mock.patch.multiple(config, AI_PROVIDER="groq", AI_ROUTING="single", GROQ_API_KEY="k",
+                             GEMINI_API_KEY="k", OPENAI_API_KEY="k"), \
+         mock.patch.object(ai_client, "_generate_with_provider", side_effect=fake_generate):
+        try:
+            ai_client.generate_itinerary("plan", hedge_budget=1)
+            assert False, "The groq error should be raised"
+        except RuntimeError:
+            pass
+    assert calls == ["groq"], "No other provider may receive the prompt"
+    print("✅ Single-provider routing tests passed!")
+
+
+def test_concurrent_hedges_do_not_queue():
+    """Many concurrent hedged calls each get their own threads, so hedges start on time."""
+    print("\n🔍 Testing concurrent hedged calls...")
+    router = ProviderRouter(["gemini", "openai"])
+
+    def call(name):
+        time.sleep(1.0 if name == "gemini" else 0.01)
+        return name
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(router.call_hedged(call, delay=0.05)))
+               for _ in range(48)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    assert results == ["openai"] * 48
+    assert elapsed < 0.8, f"Hedges queued behind other requests ({elapsed:.2f}s)"
+    print("✅ Concurrent hedging tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Provider Router Tests")
+    print("=" * 50)
+    test_circuit_breaker_states()
+    test_failover_to_next_provider()
+    test_local_errors_do_not_trip_breaker()
+    test_all_breakers_open()
+    test_latency_mode_prefers_fastest()
+    test_stream_falls_back_before_first_chunk()
+    test_generate_itinerary_fails_over()
+    test_hedge_races_slow_primary()
+    test_hedge_budget_and_fast_primary()
+    test_hedge_ignores_invalid_and_failed_answers()
+    test_hedge_delay_uses_latency_percentile()
+    test_hedge_delay_follows_the_replacement()
+    test_async_hedge_cancels_loser()
+    test_local_waits_are_not_provider_latency()
+    test_cancelled_trial_is_released()
+    test_fallback_answers_are_not_cached_as_primary()
+    test_single_routing_keeps_prompts_on_the_configured_provider()
+    test_concurrent_hedges_do_not_queue()
+    print("\n🎉 All router tests completed!")
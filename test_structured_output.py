@@ -0,0 +1,91 @@
+"""
+Unit Tests for provider-native structured output
+These tests check the schema sent to each provider, that the planner requests it, and that parsing needs no rescue.
+"""
+
+import json
+from unittest import mock
+
+import ai_client
+import config
+import planner
+from ai_client import _get_dummy_response
+from itinerary_schema import DAY_SCHEMA, ITINERARY_SCHEMA, gemini_schema
+from test_fake_llm_server import PROMPT, FakeServer
+
+TRIP = ("Lisbon", 4, 400, ["food"], "walking", "hostel", "EUR")
+
+
+def test_provider_requests():
+    """One schema becomes OpenAI and Groq json_schema formats and a Gemini response_schema."""
+    print("\n🔍 Testing provider requests...")
+    with mock.patch.object(config, "OPENAI_MODEL", "gpt-4o-mini"):
+        openai_format = ai_client._openai_request(PROMPT, schema=ITINERARY_SCHEMA)["response_format"]
+    assert openai_format["type"] == "json_schema"
+    assert openai_format["json_schema"] == {"name": "itinerary", "schema": ITINERARY_SCHEMA, "strict": True}
+    for model in ("gpt-3.5-turbo", "gpt-4", "gpt-4-turbo"):
+        with mock.patch.object(config, "OPENAI_MODEL", model):
+            openai_format = ai_client._openai_request(PROMPT, schema=ITINERARY_SCHEMA)["response_format"]
+        assert openai_format == {"type": "json_object"}, f"{model} has no strict schemas; JSON mode instead"
+    groq_format = ai_client._groq_request(PROMPT, schema=DAY_SCHEMA)["text"]["format"]
+    assert groq_format["name"] == "day" and groq_format["strict"] and groq_format["schema"] is DAY_SCHEMA
+
+    generation = ai_client._gemini_options(max_tokens=500, schema=ITINERARY_SCHEMA)["generation_config"]
+    assert generation["response_mime_type"] == "application/json" and generation["max_output_tokens"] == 500
+    assert "additionalProperties" not in json.dumps(generation["response_schema"])
+    assert gemini_schema(ITINERARY_SCHEMA)["properties"]["itinerary"]["items"]["required"] == DAY_SCHEMA["required"]
+
+    assert "response_format" not in ai_client._openai_request(PROMPT)
+    assert "text" not in ai_client._groq_request(PROMPT)
+    assert ai_client._gemini_options() == {}
+    print("✅ Provider request tests passed!")
+
+
+def test_providers_accept_structured_requests():
+    """The real SDKs send the schemas, and the fake server never malforms structured answers."""
+    print("\n🔍 Testing structured requests against the fake server...")
+    with FakeServer(malformed_rate=1.0) as server:
+        for call in (ai_client._call_openai, ai_client._call_groq, ai_client._call_gemini):
+            itinerary, _ = planner._parse_ai_response(call(PROMPT, "fake-key", 5, 2000, ITINERARY_SCHEMA))
+            assert len(itinerary) == 4, call.__name__
+        ai_client._call_openai(PROMPT, "fake-key", 5)
+        stats = server.stats()
+    assert stats["malformed"] == 1, "Only the free-text request was malformed"
+    print("✅ Structured request tests passed!")
+
+
+def test_planner_uses_schemas():
+    """With structured output on, plans, streams and day edits send their schema and skip rescue parsing."""
+    print("\n🔍 Testing planner structured output...")
+    fake = mock.Mock(return_value=_get_dummy_response())
+    day = json.dumps({"day": 1, "activities": ["Museum"], "cost": 5, "transport": "bus", "notes": "Free"})
+    with mock.patch.object(planner, "AI_STRUCTURED_OUTPUT", True), \
+            mock.patch.object(planner, "AI_RESPONSE_FORMAT", "compact"), \
+            mock.patch.object(planner, "generate_itinerary", fake):
+        itinerary, _ = planner.plan_trip(*TRIP, use_cache=False)
+        assert fake.call_args.kwargs["schema"] is ITINERARY_SCHEMA
+        _, prompt, _ = planner._prepare_trip(*TRIP)
+        assert '"itinerary": [' in prompt, "Structured output uses the full format"
+
+        fake.return_value = day
+        planner.regenerate_day(itinerary, 1, *TRIP[:1], *TRIP[2:])
+        assert fake.call_args.kwargs["schema"] is DAY_SCHEMA
+
+        fenced = "Sure!\n```json\n" + _get_dummy_response() + "\n```"
+        assert planner._try_parse_ai_response(fenced) is None, "No rescue parsing of structured responses"
+    assert planner._try_parse_ai_response(fenced) is not None
+
+    fake.return_value = _get_dummy_response()
+    with mock.patch.object(planner, "generate_itinerary", fake):
+        planner.plan_trip(*TRIP, use_cache=False)
+    assert fake.call_args.kwargs["schema"] is None, "Free text by default"
+    print("✅ Planner structured output tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Structured Output Tests")
+    print("=" * 50)
+    test_provider_requests()
+    test_providers_accept_structured_requests()
+    test_planner_uses_schemas()
+    print("\n🎉 All structured output tests completed!")
@@ -0,0 +1,86 @@
+"""
+Unit Tests for output token budgeting
+These tests check the offline token estimator, how limits scale with the trip and adapt, and that they reach the provider.
+"""
+
+from unittest import mock
+
+import ai_client
+import planner
+import usage
+from ai_client import _get_dummy_response
+from token_budget import Budget, OutputBudget, estimate_tokens
+
+
+def test_estimate_tokens():
+    """The estimator is in the range of real tokenizers on itinerary JSON."""
+    print("\n🔍 Testing token estimates...")
+    text = _get_dummy_response()
+    tokens = estimate_tokens(text)
+    assert len(text) / 6 < tokens < len(text) / 2.5, tokens
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Visit the museum") == 3
+    assert estimate_tokens('{"cost": 1250}') > estimate_tokens("cost 1250"), "Symbols cost tokens"
+    print("✅ Token estimate tests passed!")
+
+
+def test_plan_scales_with_trip():
+    """Longer trips get larger limits; trips too long for the maximum use the compact prompt."""
+    print("\n🔍 Testing budget planning...")
+    budget = OutputBudget(minimum=256, maximum=4096)
+    limits = [budget.plan(days, 2) for days in (1, 3, 7, 14)]
+    assert OutputBudget(minimum=512).plan(1) == Budget(512, False), "Short trips get the minimum"
+    assert all(a.max_tokens < b.max_tokens for a, b in zip(limits, limits[1:]))
+    assert not any(limit.compact for limit in limits)
+    assert budget.plan(7, 5).max_tokens > budget.plan(7, 1).max_tokens, "More interests, more output"
+    month = budget.plan(30, 2)
+    assert month.compact and month.max_tokens <= 4096
+    print("✅ Budget planning tests passed!")
+
+
+def test_observe_and_escalate():
+    """Observed response sizes move the limit; retries get a larger one, capped at the maximum."""
+    print("\n🔍 Testing adaptation...")
+    budget = OutputBudget(minimum=100, maximum=4096, margin=1.0, smoothing=0.5)
+    before = budget.plan(5).max_tokens
+    for _ in range(5):
+        budget.observe(5, 1, budget.overhead + 5 * 300)
+    after = budget.plan(5).max_tokens
+    assert after > before and abs(budget.tokens_per_day - 300) < 10
+    budget.observe(5, 1, 0)
+    assert budget.observations == 5, "Empty responses are ignored"
+    assert budget.escalate(1000) == 1500
+    assert budget.escalate(4000) == 4096
+    print("✅ Adaptation tests passed!")
+
+
+def test_limit_reaches_provider():
+    """The planner passes the trip's limit to the AI client, which puts it in the request."""
+    print("\n🔍 Testing limit plumbing...")
+    def generate(prompt, **kwargs):
+        usage.record("openai", "gpt-4o-mini", 500, 400)
+        return _get_dummy_response()
+    fake = mock.Mock(side_effect=generate)
+    budget = OutputBudget()
+    with mock.patch.object(planner, "generate_itinerary", fake), \
+            mock.patch.object(planner, "_output_budget", budget):
+        expected = budget.plan(3, 1)
+        planner.plan_trip("Rome", 3, 300, ["food"], "bus", "hostel", use_cache=False)
+        _, prompt, output = planner._prepare_trip("Rome", 30, 3000, ["food"], "bus", "hostel", "USD")
+    assert fake.call_args.kwargs["max_tokens"] == expected.max_tokens
+    assert budget.observations == 1, "Usage of the parsed response was observed"
+    assert output.compact and "Keep it brief" in prompt
+    assert ai_client._openai_request("hi", max_tokens=321)["max_tokens"] == 321
+    assert ai_client._openai_request("hi")["max_tokens"] == ai_client.MAX_OUTPUT_TOKENS
+
+    print("✅ Limit plumbing tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Token Budget Tests")
+    print("=" * 50)
+    test_estimate_tokens()
+    test_plan_scales_with_trip()
+    test_observe_and_escalate()
+    test_limit_reaches_provider()
+    print("\n🎉 All token budget tests completed!")
@@ -0,0 +1,87 @@
+"""
+Unit Tests for token usage and cost accounting
+These tests read usage from provider responses and check the per-trip, provider, destination and duration totals.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import ai_client
+import usage
+from token_budget import estimate_tokens
+from batch import plan_trips
+from load_test import fake_provider
+from planner import plan_trip, plan_trip_async, plan_trip_stream
+
+
+def test_response_usage_formats():
+    """Usage is read from chat completions, the responses API and Gemini."""
+    print("\n🔍 Testing usage formats...")
+    chat = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=80))
+    responses = SimpleNamespace(usage=SimpleNamespace(input_tokens=50, output_tokens=20))
+    gemini = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=30, candidates_token_count=10,
+                                                            total_token_count=40))
+    assert ai_client._response_usage(chat) == (120, 80)
+    assert ai_client._response_usage(responses) == (50, 20)
+    assert ai_client._response_usage(gemini) == (30, 10)
+    assert ai_client._response_usage(None) == (None, None)
+    print("✅ Usage format tests passed!")
+
+
+def test_estimates_and_costs():
+    """Missing usage is estimated from text; costs come from the price table."""
+    print("\n🔍 Testing estimates and costs...")
+    with usage.track() as totals:
+        ai_client._record_usage("openai", "p" * 400, "r" * 200, None)
+        usage.record("gemini", "gemini-2.0-flash", 1_000_000, 1_000_000)
+        usage.record("groq", "unknown-model", 10, 10)
+    assert totals.calls == 3 and totals.estimated_calls == 1 and totals.unpriced_calls == 1
+    assert totals.prompt_tokens == estimate_tokens("p" * 400) + 1_000_000 + 10
+    assert abs(usage.estimate_cost(usage.TokenUsage("gemini", "gemini-2.0-flash", 1_000_000, 1_000_000, False))
+               - 0.5) < 1e-9
+    print("✅ Estimate and cost tests passed!")
+
+
+def test_plan_usage_through_fake_server():
+    """Each way of planning a trip reports the tokens its provider calls used."""
+    print("\n🔍 Testing usage of planned trips...")
+    usage.reset()
+    trip = ("Porto", 3, 300, ["food"], "walking", "hostel", "EUR")
+    with fake_provider(latency="fixed:0", seed=1):
+        with usage.track() as sync_usage:
+            itinerary, _ = plan_trip(*trip, use_cache=False)
+        with usage.track() as stream_usage:
+            events = list(plan_trip_stream(*trip, use_cache=False))
+
+        async def plan_async():
+            with usage.track() as totals:
+                await plan_trip_async("porto ", 5, 500, ["art"], "metro", "hostel", use_cache=False)
+            return totals
+        async_usage = asyncio.run(plan_async())
+        results = list(plan_trips([{"destination": "Oslo", "duration": 2, "budget": 200, "interests": ["art"],
+                                    "transport": "bus", "stay": "hostel"}], use_cache=False))
+
+    assert len(itinerary) == 3 and events[-1][0] == "summary"
+    for totals in (sync_usage, stream_usage, async_usage):
+        assert totals.calls == 1, totals.to_dict()
+        assert totals.prompt_tokens > 100 and totals.completion_tokens > 50
+        assert totals.estimated_calls == 0, "The fake server reports usage, including for streams"
+    assert results[0].usage["calls"] == 1 and results[0].usage["total_tokens"] > 0
+
+    stats = usage.stats()
+    assert stats["providers"]["openai"]["calls"] == 4
+    assert stats["destinations"]["Porto"]["trips"] == 3, "Destinations are normalized"
+    assert stats["destinations"]["Oslo"]["trips"] == 1
+    assert stats["durations"][3]["trips"] == 2 and stats["durations"][5]["trips"] == 1
+    assert stats["durations"][5]["tokens_per_trip"] > stats["durations"][3]["tokens_per_trip"], \
+        "Longer trips use more tokens"
+    print("✅ Planned trip usage tests passed!")
+
+
+if __name__ == "__main__":
+    print("🧪 Running Usage Tests")
+    print("=" * 50)
+    test_response_usage_formats()
+    test_estimates_and_costs()
+    test_plan_usage_through_fake_server()
+    print("\n🎉 All usage tests completed!")
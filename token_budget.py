@@ -0,0 +1,150 @@
+"""
+Output token budgeting for Student AI Travel Planner
+This module estimates token counts offline and sizes each request's output limit to the trip,
+learning from the sizes of earlier responses.
+"""
+
+import re
+import threading
+from collections import namedtuple
+
+# Words, digit runs, single symbols and whitespace runs, roughly how BPE tokenizers split text
+_PIECES = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+
+# Starting guesses, replaced by observed sizes as responses come in
+PRIOR_TOKENS_PER_DAY = 130
+PRIOR_OVERHEAD_TOKENS = 90
+# Extra output per day for each interest beyond the first (activities get more varied notes)
+TOKENS_PER_INTEREST_PER_DAY = 4
+# Share of the full size that a response written with the compact prompt takes
+COMPACT_RATIO = 0.6
+# How much a malformed (usually truncated) response grows the limit for the retry
+ESCALATION_FACTOR = 1.5
+
+# Output limit for one request; compact asks the prompt for shorter days so the trip fits
+Budget = namedtuple("Budget", ["max_tokens", "compact"])
+
+
+def estimate_tokens(text):
+    """
+    Estimate how many tokens a text is, without a tokenizer.
+
+    Common short words are one token and longer ones about one per 7
+    letters, digits go in groups of 3, every symbol is a token (JSON is
+    symbol-heavy), a single space joins the next word and longer runs of
+    whitespace (indentation) cost about one token per 4 characters.
+
+    Args:
+        text (str): Any text
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isalpha():
+            tokens += (len(piece) + 6) // 7
+        elif first.isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif first.isspace():
+            if len(piece) > 1 or first == "\n":
+                tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+class OutputBudget:
+    """
+    Picks the output token limit for a trip from its length and interest count.
+
+    The expected response size is an overhead (summary and JSON framing) plus
+    a per-day size. The per-day size starts at PRIOR_TOKENS_PER_DAY and
+    follows observed responses with an exponentially weighted average, so
+    it adapts to the model in use. A safety margin is added on top. Trips
+    too long to fit under the maximum at full detail get the compact prompt.
+    """
+
+    def __init__(self, minimum=256, maximum=4096, margin=1.3, tokens_per_day=PRIOR_TOKENS_PER_DAY,
+                 overhead=PRIOR_OVERHEAD_TOKENS, smoothing=0.2):
+        """
+        Args:
+            minimum (int): Smallest limit ever requested
+            maximum (int): Largest limit the model accepts
+            margin (float): Multiplier over the expected size
+            tokens_per_day (float): Initial per-day size
+            overhead (float): Tokens per response beyond the days
+            smoothing (float): Weight of each new observation (0-1)
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.margin = margin
+        self.tokens_per_day = float(tokens_per_day)
+        self.overhead = float(overhead)
+        self.smoothing = smoothing
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def expected_tokens(self, duration, interests=1, compact=False):
+        """
+        Expected size of a response for a trip.
+
+        Returns:
+            float: Tokens
+        """
+        per_day = self.tokens_per_day + TOKENS_PER_INTEREST_PER_DAY * max(0, interests - 1)
+        if compact:
+            per_day *= COMPACT_RATIO
+        return self.overhead + duration * per_day
+
+    def plan(self, duration, interests=1):
+        """
+        Choose the output limit and prompt detail for a trip.
+
+        Args:
+            duration (int): Trip length in days
+            interests (int): Number of interests
+
+        Returns:
+            Budget: max_tokens, and whether to use the compact prompt
+        """
+        full = self.expected_tokens(duration, interests) * self.margin
+        if full <= self.maximum:
+            return Budget(self._clamp(full), False)
+        return Budget(self._clamp(self.expected_tokens(duration, interests, compact=True) * self.margin), True)
+
+    def escalate(self, max_tokens):
+        """
+        Limit for retrying a response that came back malformed (usually cut off).
+
+        Returns:
+            int: A larger limit, capped at the maximum
+        """
+        return self._clamp(max_tokens * ESCALATION_FACTOR)
+
+    def observe(self, duration, interests, completion_tokens, compact=False):
+        """
+        Learn from the size of a complete, parseable response.
+
+        Args:
+            duration (int): Trip length in days
+            interests (int): Number of interests
+            completion_tokens (float): Tokens the response used
+            compact (bool): Whether the compact prompt was used
+        """
+        if duration <= 0 or completion_tokens <= 0:
+            return
+        per_day = (completion_tokens - self.overhead) / duration
+        if compact:
+            per_day /= COMPACT_RATIO
+        per_day -= TOKENS_PER_INTEREST_PER_DAY * max(0, interests - 1)
+        per_day = max(per_day, 10.0)
+        with self._lock:
+            self.tokens_per_day += self.smoothing * (per_day - self.tokens_per_day)
+            self.observations += 1
+
+    def _clamp(self, tokens):
+        return int(min(self.maximum, max(self.minimum, round(tokens))))
@@ -0,0 +1,199 @@
+"""
+Token usage and cost accounting for Student AI Travel Planner
+This module collects the token counts providers report and totals them per request, provider,
+destination and trip length, with an estimated cost from a price table.
+"""
+
+import contextlib
+import contextvars
+import threading
+from collections import namedtuple
+
+# Estimated list prices in USD per million tokens: (input, output). Edit to match your plan;
+# models not listed are counted in tokens but have no cost.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "openai/gpt-oss-20b": (0.10, 0.50),
+    "openai/gpt-oss-120b": (0.15, 0.75),
+}
+
+# One provider call. estimated is True when the provider reported no usage and
+# the counts come from token_budget.estimate_tokens().
+TokenUsage = namedtuple("TokenUsage", ["provider", "model", "prompt_tokens", "completion_tokens", "estimated"])
+
+# Totals that currently receive every recorded call (innermost last)
+_active = contextvars.ContextVar("usage_totals", default=())
+_lock = threading.Lock()
+_by_provider = {}
+_by_destination = {}
+_by_duration = {}
+
+
+class UsageTotals:
+    """Running totals of tokens and estimated cost over some set of provider calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.unpriced_calls = 0
+        self.estimated_calls = 0
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, call):
+        """Add one TokenUsage."""
+        self.calls += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        cost = estimate_cost(call)
+        if cost is None:
+            self.unpriced_calls += 1
+        else:
+            self.cost += cost
+        if call.estimated:
+            self.estimated_calls += 1
+
+    def merge(self, other):
+        """Add every call counted by another UsageTotals."""
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+        self.unpriced_calls += other.unpriced_calls
+        self.estimated_calls += other.estimated_calls
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost, 6),
+            "unpriced_calls": self.unpriced_calls,
+            "estimated_calls": self.estimated_calls,
+        }
+
+
+class _TripTotals(UsageTotals):
+    """UsageTotals for a group of trips, which also counts the trips."""
+
+    def __init__(self):
+        super().__init__()
+        self.trips = 0
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["trips"] = self.trips
+        data["tokens_per_trip"] = round(self.total_tokens / self.trips, 1) if self.trips else 0
+        return data
+
+
+def estimate_cost(call):
+    """
+    Estimate the price of one call from MODEL_PRICES.
+
+    Returns:
+        float: USD, or None if the model has no price
+    """
+    prices = MODEL_PRICES.get(call.model)
+    if prices is None:
+        return None
+    return (call.prompt_tokens * prices[0] + call.completion_tokens * prices[1]) / 1_000_000
+
+
+def record(provider, model, prompt_tokens, completion_tokens, estimated=False):
+    """
+    Count one provider call in the per-provider totals and in every active track() block.
+
+    Args:
+        provider (str): Provider that answered
+        model (str): Model that answered
+        prompt_tokens (int): Input tokens
+        completion_tokens (int): Output tokens
+        estimated (bool): True if the counts were estimated from text length
+
+    Returns:
+        TokenUsage: The recorded call
+    """
+    call = TokenUsage(provider, model, int(prompt_tokens or 0), int(completion_tokens or 0), estimated)
+    with _lock:
+        _by_provider.setdefault(provider, UsageTotals()).add(call)
+        for totals in _active.get():
+            totals.add(call)
+    return call
+
+
+@contextlib.contextmanager
+def track(totals=None):
+    """
+    Collect the usage of every provider call made inside a with block.
+
+    Blocks nest: a call counts towards every enclosing block. The block
+    follows the context of the code inside it, including asyncio tasks it
+    starts; threads started inside it must copy the context (see
+    contextvars.copy_context) to be counted.
+
+    Args:
+        totals (UsageTotals): Totals to add to; a new one by default
+
+    Yields:
+        UsageTotals: The totals being collected
+    """
+    totals = totals if totals is not None else UsageTotals()
+    token = _active.set(_active.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _active.reset(token)
+
+
+def record_trip(destination, duration, totals):
+    """
+    Add one planned trip's usage to the per-destination and per-duration totals.
+
+    Args:
+        destination (str): Destination as displayed
+        duration (int): Trip length in days
+        totals (UsageTotals): Usage of the provider calls made for the trip
+    """
+    with _lock:
+        for table, key in ((_by_destination, destination), (_by_duration, int(duration))):
+            group = table.get(key)
+            if group is None:
+                group = table[key] = _TripTotals()
+            group.trips += 1
+            group.merge(totals)
+
+
+def stats():
+    """
+    Return usage totals for this process.
+
+    Returns:
+        dict: "providers", "destinations" and "durations" (days), each mapping
+            a name to UsageTotals.to_dict() (trip groups also report trips and
+            tokens per trip)
+    """
+    with _lock:
+        return {
+            "providers": {name: totals.to_dict() for name, totals in _by_provider.items()},
+            "destinations": {name: totals.to_dict() for name, totals in _by_destination.items()},
+            "durations": {days: totals.to_dict() for days, totals in sorted(_by_duration.items())},
+        }
+
+
+def reset():
+    """Forget all totals."""
+    with _lock:
+        _by_provider.clear()
+        _by_destination.clear()
+        _by_duration.clear()